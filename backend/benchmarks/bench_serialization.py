@@ -0,0 +1,93 @@
+"""
+Compare the stdlib JSON path with ``shared.serialization``.
+
+Times model-to-record conversion and a full storage write/read of
+``--records`` participants (100k by default) for both paths::
+
+    cd backend
+    python benchmarks/bench_serialization.py --records 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from tinydb.storages import JSONStorage  # noqa: E402
+
+from shared.models import Participant, ParticipantStatus  # noqa: E402
+from shared.serialization import CODEC, FastJSONStorage, model_to_record  # noqa: E402
+
+
+def _participants(count: int) -> List[Participant]:
+    registered_at = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    return [
+        Participant(
+            id=f"participant-{index}",
+            event_id=f"event-{index % 50}",
+            user_id=f"user-{index}",
+            name=f"Participant {index}",
+            email=f"participant{index}@example.com",
+            skills=["python", "design"],
+            status=ParticipantStatus.PENDING,
+            registered_at=registered_at,
+        )
+        for index in range(count)
+    ]
+
+
+def _timed(label: str, func: Callable[[], Any]) -> float:
+    started = perf_counter()
+    func()
+    elapsed = perf_counter() - started
+    print(f"  {label:<28} {elapsed * 1000:10.1f} ms")
+    return elapsed
+
+
+def _storage_round_trip(storage_cls: type, path: Path, data: Dict[str, Any]) -> None:
+    storage = storage_cls(str(path))
+    try:
+        storage.write(data)
+        storage.read()
+    finally:
+        storage.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=100_000)
+    args = parser.parse_args()
+
+    models = _participants(args.records)
+    print(f"{args.records} records, fast codec: {CODEC}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        print("stdlib json")
+        old = _timed("json.loads(model.json())", lambda: [json.loads(m.json()) for m in models])
+        records = [model_to_record(m) for m in models]
+        data = {"participants": {str(i): r for i, r in enumerate(records, start=1)}}
+        old += _timed(
+            "JSONStorage write + read",
+            lambda: _storage_round_trip(JSONStorage, Path(directory) / "old.json", data),
+        )
+
+        print("shared.serialization")
+        new = _timed("model_to_record(model)", lambda: [model_to_record(m) for m in models])
+        new += _timed(
+            "FastJSONStorage write + read",
+            lambda: _storage_round_trip(FastJSONStorage, Path(directory) / "new.json", data),
+        )
+
+    print(f"total: {old * 1000:.1f} ms -> {new * 1000:.1f} ms ({old / new:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+File size and load time of ``db.json`` in each ``shared.compact`` format.
+
+    cd backend
+    python benchmarks/bench_storage_formats.py --records 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from shared import compact  # noqa: E402
+from shared.compact import CompactStorage, check_format  # noqa: E402
+from shared.serialization import dumps, loads  # noqa: E402
+
+
+def _participants(count: int) -> dict:
+    return {
+        "participants": {
+            str(index): {
+                "id": f"participant-{index}",
+                "event_id": f"event-{index % 50}",
+                "user_id": f"user-{index}",
+                "name": f"Participant {index}",
+                "email": f"participant{index}@example.com",
+                "skills": ["python", "design"],
+                "status": "pending",
+                "registered_at": "2025-01-01T00:00:00Z",
+                "profile_complete": False,
+            }
+            for index in range(1, count + 1)
+        }
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=100_000)
+    args = parser.parse_args()
+    data = _participants(args.records)
+
+    with tempfile.TemporaryDirectory() as directory:
+        baseline = Path(directory) / "db.json"
+        baseline.write_text(dumps(data), encoding="utf-8")
+        started = perf_counter()
+        loads(baseline.read_bytes())
+        print(f"{'json (db.json)':<22} {baseline.stat().st_size:>12,} B "
+              f"{(perf_counter() - started) * 1000:8.1f} ms")
+
+        for format in compact.FORMATS:
+            for compression in compact.COMPRESSIONS:
+                try:
+                    check_format(format, compression)
+                except ValueError:
+                    continue
+                path = Path(directory) / f"db-{format}-{compression}"
+                storage = CompactStorage(path, format=format, compression=compression)
+                storage.write(data)
+                started = perf_counter()
+                storage.read()
+                elapsed = (perf_counter() - started) * 1000
+                print(f"{format + '/' + compression:<22} {path.stat().st_size:>12,} B "
+                      f"{elapsed:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,9 +3,10 @@ from __future__ import annotations
 from fastapi import FastAPI
 
 from shared import get_settings, register_exception_handlers
+from shared.instrumentation import storage_metrics_router
 
 from .dependencies import DependencyBundle, init_dependencies
-from .routes import router
+from .routes import internal_router, router
 
 
 def create_app(bundle: DependencyBundle | None = None) -> FastAPI:
@@ -18,10 +19,14 @@ def create_app(bundle: DependencyBundle | None = None) -> FastAPI:
 
     dependency_bundle = init_dependencies(app, settings, bundle)
     app.include_router(router)
+    app.include_router(internal_router)
+    app.include_router(storage_metrics_router())
     register_exception_handlers(app)
 
     @app.on_event("shutdown")
     async def _shutdown() -> None:
+        if dependency_bundle.storage_executor is not None:
+            dependency_bundle.storage_executor.shutdown()
         dependency_bundle.db_manager.close()
 
     return app
@@ -1,11 +1,23 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import cast
+from datetime import datetime
+from typing import List, Optional, cast
 
-from fastapi import Depends, FastAPI, Request
+from fastapi import Depends, FastAPI, Query, Request
 
-from shared import DatabaseManager, Settings
+from shared import DatabaseManager, EventStatus, Settings
+from shared.event_counters import EventCounters
+from shared.executor import StorageExecutor
+from shared.filters import (
+    OP_AFTER,
+    OP_BEFORE,
+    OP_CONTAINS,
+    Condition,
+    ListQuery,
+    in_condition,
+    sort_order,
+)
 
 from .repository import EventsRepository
 from .service import EventsService
@@ -14,6 +26,7 @@ from .service import EventsService
 @dataclass
 class DependencyBundle:
     db_manager: DatabaseManager
+    storage_executor: Optional[StorageExecutor] = None
 
 
 def init_dependencies(
@@ -25,7 +38,14 @@ def init_dependencies(
         db_manager = DatabaseManager(settings)
         bundle = DependencyBundle(db_manager=db_manager)
 
+    if bundle.storage_executor is None:
+        bundle.storage_executor = StorageExecutor(
+            settings.storage_workers, settings.storage_max_queue
+        )
+
+    EventsRepository(bundle.db_manager).seed_changes()
     app.state.db_manager = bundle.db_manager
+    app.state.storage_executor = bundle.storage_executor
     return bundle
 
 
@@ -33,13 +53,50 @@ def get_db_manager(request: Request) -> DatabaseManager:
     return cast(DatabaseManager, request.app.state.db_manager)
 
 
+def get_storage_executor(request: Request) -> StorageExecutor:
+    return cast(StorageExecutor, request.app.state.storage_executor)
+
+
 def get_repository(
     db_manager: DatabaseManager = Depends(get_db_manager),
 ) -> EventsRepository:
     return EventsRepository(db_manager)
 
 
+def get_event_counters(
+    db_manager: DatabaseManager = Depends(get_db_manager),
+) -> EventCounters:
+    return EventCounters(db_manager)
+
+
 def get_events_service(
     repository: EventsRepository = Depends(get_repository),
 ) -> EventsService:
     return EventsService(repository)
+
+
+# Values accepted by ``sort``; the first one is the default.
+EVENT_SORTS = ("created_at", "start_date", "name")
+
+
+def get_list_query(
+    status: Optional[List[str]] = Query(None),
+    category: Optional[str] = None,
+    tag: Optional[str] = None,
+    start_after: Optional[datetime] = None,
+    start_before: Optional[datetime] = None,
+    sort: Optional[str] = None,
+) -> ListQuery:
+    conditions: List[Condition] = []
+    statuses = in_condition("status", status, [member.value for member in EventStatus])
+    if statuses is not None:
+        conditions.append(statuses)
+    if category is not None:
+        conditions.append(Condition("categories", OP_CONTAINS, category))
+    if tag is not None:
+        conditions.append(Condition("tags", OP_CONTAINS, tag))
+    if start_after is not None:
+        conditions.append(Condition("start_date", OP_AFTER, start_after.isoformat()))
+    if start_before is not None:
+        conditions.append(Condition("start_date", OP_BEFORE, start_before.isoformat()))
+    return ListQuery(tuple(conditions), sort_order(sort, EVENT_SORTS))
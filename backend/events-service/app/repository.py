@@ -1,17 +1,28 @@
 from __future__ import annotations
 
-import json
 from datetime import datetime
-from typing import Any, Dict, List, Optional, cast
+from typing import Any, Dict, List, Optional, Sequence, cast
 
-from tinydb import Query
+from shared import DatabaseManager, Event, model_to_record
+from shared.change_feed import EVENT_CHANGES_TABLE, OP_DELETE, OP_INSERT, OP_UPDATE, ChangeLog
+from shared.event_counters import COUNTER_FIELDS
+from shared.fieldsets import Fields
+from shared.filters import ListQuery
+from shared.pagination import Page, decode_cursor, page_of
 
-from shared import DatabaseManager, Event
+# Default sort key of list pages: creation time, then id to break ties.
+PAGE_ORDER = ("created_at", "id")
+# Events partitioned by status; live events have deleted_at None, so a status
+# filter only visits the events it returns.
+STATUS_INDEX = ("status", "deleted_at")
 
 
 class EventsRepository:
     def __init__(self, db_manager: DatabaseManager) -> None:
-        self._table = db_manager.table("events")
+        self._table = db_manager.table("events", indexes=["id", STATUS_INDEX])
+        self._cache = db_manager.record_cache
+        self._db_manager = db_manager
+        self._changes = ChangeLog(db_manager, EVENT_CHANGES_TABLE)
 
     def list_events(self, include_deleted: bool = False) -> List[Dict[str, Any]]:
         records: List[Dict[str, Any]] = [dict(record) for record in self._table.all()]
@@ -19,23 +30,79 @@ class EventsRepository:
             return records
         return [record for record in records if record.get("deleted_at") is None]
 
+    def list_page(
+        self,
+        *,
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None,
+        query: ListQuery = ListQuery(),
+        organizer_id: Optional[str] = None,
+        fields: Optional[Fields] = None,
+    ) -> Page[Dict[str, Any]]:
+        """Events that are not deleted and match ``query``, in its order or ``PAGE_ORDER``."""
+        order_by = query.order_by or PAGE_ORDER
+        records = self._table.find_page(
+            order_by,
+            after=decode_cursor(cursor, order_by),
+            limit=None if limit is None else limit + 1,
+            conditions=query.conditions,
+            **self._where(organizer_id),
+        )
+        return page_of(records, order_by, limit, fields=fields)
+
+    def count(self, *, query: ListQuery = ListQuery(), organizer_id: Optional[str] = None) -> int:
+        return self._table.count_where(conditions=query.conditions, **self._where(organizer_id))
+
+    @staticmethod
+    def _where(organizer_id: Optional[str]) -> Dict[str, Any]:
+        where: Dict[str, Any] = {"deleted_at": None}
+        if organizer_id is not None:
+            where["organizer_id"] = organizer_id
+        return where
+
     def get_event(self, event_id: str) -> Optional[Dict[str, Any]]:
-        record = self._table.get(Query().id == event_id)
+        return self._cache.get("events", event_id, lambda: self._load(event_id))
+
+    def get_many(self, event_ids: Sequence[str]) -> List[Optional[Dict[str, Any]]]:
+        """Records for ``event_ids`` in the same order, ``None`` for unknown ids."""
+        return self._cache.get_many("events", event_ids, self._load_many)
+
+    def _load_many(self, event_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        records = self._table.find_many("id", event_ids)
+        return {record["id"]: dict(cast(Dict[str, Any], record)) for record in records}
+
+    def _load(self, event_id: str) -> Optional[Dict[str, Any]]:
+        record = self._table.find_one(id=event_id)
         if record is None:
             return None
         return dict(cast(Dict[str, Any], record))
 
     def insert(self, payload: Event) -> Dict[str, Any]:
-        data: Dict[str, Any] = json.loads(payload.json())
-        self._table.insert(data)
+        data: Dict[str, Any] = model_to_record(payload)
+        with self._db_manager.transaction():
+            self._table.insert(data)
+            self._changes.append(OP_INSERT, data)
+        self._cache.invalidate("events", data["id"])
         return data
 
-    def update(self, event_id: str, payload: Event) -> Optional[Dict[str, Any]]:
-        existing = self.get_event(event_id)
-        if not existing:
+    def update(
+        self, event_id: str, payload: Event, *, op: str = OP_UPDATE
+    ) -> Optional[Dict[str, Any]]:
+        # The counters belong to EventCounters; keep the stored values.
+        fields = {
+            field: value
+            for field, value in model_to_record(payload).items()
+            if field not in COUNTER_FIELDS
+        }
+        with self._db_manager.transaction():
+            record = self._table.find_one(id=event_id)
+            if record is not None:
+                self._table.update_where(fields, id=event_id)
+                data: Dict[str, Any] = {**record, **fields}
+                self._changes.append(op, data)
+        self._cache.invalidate("events", event_id)
+        if record is None:
             return None
-        data: Dict[str, Any] = json.loads(payload.json())
-        self._table.update(data, Query().id == event_id)
         return data
 
     def soft_delete(self, event_id: str, deleted_at: datetime) -> Optional[Dict[str, Any]]:
@@ -43,5 +110,21 @@ class EventsRepository:
         if not existing:
             return None
         existing["deleted_at"] = deleted_at.isoformat()
-        self._table.update({"deleted_at": existing["deleted_at"]}, Query().id == event_id)
+        with self._db_manager.transaction():
+            self._table.update_where({"deleted_at": existing["deleted_at"]}, id=event_id)
+            self._changes.append(OP_DELETE, existing)
+        self._cache.invalidate("events", event_id)
         return existing
+
+    def list_changes(self, since: int, limit: int) -> Dict[str, Any]:
+        return self._changes.read(since, limit)
+
+    def seed_changes(self) -> int:
+        """Start an empty change log from the events already stored; returns how many."""
+        with self._db_manager.transaction():
+            if len(self._changes):
+                return 0
+            records = sorted(self._table.all(), key=lambda record: record.doc_id)
+            for record in records:
+                self._changes.append(OP_DELETE if record.get("deleted_at") else OP_INSERT, record)
+        return len(records)
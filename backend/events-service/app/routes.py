@@ -1,32 +1,81 @@
 from __future__ import annotations
 
-from typing import List
+from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, Request, Response, status
 
 from shared import Event, User
-from shared.middleware import get_current_user
-
-from .dependencies import get_events_service
-from .schemas import EventCreate, EventManagementResponse, EventStatusUpdate, EventUpdate
+from shared.change_feed import DEFAULT_BATCH
+from shared.conditional import make_etag, not_modified
+from shared.event_counters import EventCounters
+from shared.executor import StorageExecutor
+from shared.middleware import get_current_user, require_service
+from shared.fieldsets import json_response, parse_fields
+from shared.filters import ListQuery
+from shared.pagination import MAX_PAGE_SIZE
+
+from .dependencies import (
+    get_event_counters,
+    get_events_service,
+    get_list_query,
+    get_storage_executor,
+)
+from .schemas import (
+    EventCounterDeltas,
+    EventCreate,
+    EventManagementResponse,
+    EventStatusUpdate,
+    EventUpdate,
+)
 from .service import EventsService
 
 router = APIRouter(prefix="/api/events", tags=["events"])
+# Service-to-service endpoints; not routed through the gateway.
+internal_router = APIRouter(
+    prefix="/internal/events", tags=["internal"], dependencies=[Depends(require_service)]
+)
 
 
 @router.get("/management", response_model=EventManagementResponse)
 async def list_management(
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    query: ListQuery = Depends(get_list_query),
     user: User = Depends(get_current_user),
     service: EventsService = Depends(get_events_service),
-) -> EventManagementResponse:
-    return service.list_management(user)
+    executor: StorageExecutor = Depends(get_storage_executor),
+) -> Any:
+    selected = parse_fields(fields, Event)
+    result = await executor.run(
+        service.list_management, user, limit=limit, cursor=cursor, fields=selected, query=query
+    )
+    if selected is not None:
+        return json_response(result)
+    return result
 
 
 @router.get("/available", response_model=List[Event])
 async def list_available(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    query: ListQuery = Depends(get_list_query),
     service: EventsService = Depends(get_events_service),
-) -> List[Event]:
-    return service.list_available()
+    executor: StorageExecutor = Depends(get_storage_executor),
+) -> Any:
+    selected = parse_fields(fields, Event)
+    page = await executor.run(
+        service.list_available, limit=limit, cursor=cursor, fields=selected, query=query
+    )
+    # The body stays a plain list for existing clients; the cursor of the
+    # next page travels in a header.
+    headers = {"X-Next-Cursor": page.next_cursor} if page.next_cursor is not None else {}
+    if selected is not None:
+        return json_response(page.items, headers=headers)
+    response.headers.update(headers)
+    return page.items
 
 
 @router.post(
@@ -38,17 +87,32 @@ async def create_event(
     payload: EventCreate,
     user: User = Depends(get_current_user),
     service: EventsService = Depends(get_events_service),
+    executor: StorageExecutor = Depends(get_storage_executor),
 ) -> Event:
-    return service.create_event(user, payload)
+    return await executor.run(service.create_event, user, payload)
 
 
 @router.get("/{event_id}", response_model=Event)
 async def get_event(
     event_id: str,
+    request: Request,
+    response: Response,
+    fields: Optional[str] = None,
     user: User = Depends(get_current_user),
     service: EventsService = Depends(get_events_service),
-) -> Event:
-    return service.get_event(event_id)
+    executor: StorageExecutor = Depends(get_storage_executor),
+) -> Any:
+    selected = parse_fields(fields, Event)
+    version = await executor.run(service.event_version, event_id)
+    etag = make_etag(version, request.url.query)
+    unchanged = not_modified(request, etag)
+    if unchanged is not None:
+        return unchanged
+    result = await executor.run(service.get_event, event_id, fields=selected)
+    if selected is not None:
+        return json_response(result, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return result
 
 
 @router.put("/{event_id}", response_model=Event)
@@ -57,8 +121,9 @@ async def update_event(
     payload: EventUpdate,
     user: User = Depends(get_current_user),
     service: EventsService = Depends(get_events_service),
+    executor: StorageExecutor = Depends(get_storage_executor),
 ) -> Event:
-    return service.update_event(user, event_id, payload)
+    return await executor.run(service.update_event, user, event_id, payload)
 
 
 @router.delete("/{event_id}", response_model=Event)
@@ -66,8 +131,9 @@ async def delete_event(
     event_id: str,
     user: User = Depends(get_current_user),
     service: EventsService = Depends(get_events_service),
+    executor: StorageExecutor = Depends(get_storage_executor),
 ) -> Event:
-    return service.delete_event(user, event_id)
+    return await executor.run(service.delete_event, user, event_id)
 
 
 @router.patch("/{event_id}/status", response_model=Event)
@@ -76,5 +142,35 @@ async def update_event_status(
     payload: EventStatusUpdate,
     user: User = Depends(get_current_user),
     service: EventsService = Depends(get_events_service),
+    executor: StorageExecutor = Depends(get_storage_executor),
 ) -> Event:
-    return service.update_status(user, event_id, payload)
+    return await executor.run(service.update_status, user, event_id, payload)
+
+
+@internal_router.get("/changes")
+async def list_changes(
+    since: int = Query(0, ge=0),
+    limit: int = Query(DEFAULT_BATCH, ge=1, le=MAX_PAGE_SIZE),
+    service: EventsService = Depends(get_events_service),
+    executor: StorageExecutor = Depends(get_storage_executor),
+) -> Response:
+    changes = await executor.run(service.list_changes, since=since, limit=limit)
+    return json_response(changes)
+
+
+@internal_router.post("/counters")
+async def apply_counters(
+    payload: EventCounterDeltas,
+    counters: EventCounters = Depends(get_event_counters),
+    executor: StorageExecutor = Depends(get_storage_executor),
+) -> Dict[str, int]:
+    applied = await executor.run(counters.apply, payload.events, payload.batch)
+    return {"events": applied}
+
+
+@internal_router.post("/counters/reconcile")
+async def reconcile_counters(
+    counters: EventCounters = Depends(get_event_counters),
+    executor: StorageExecutor = Depends(get_storage_executor),
+) -> Dict[str, int]:
+    return await executor.run(counters.reconcile)
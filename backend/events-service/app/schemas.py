@@ -1,11 +1,12 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel, Field, validator
 
 from shared import Event, EventStatus
+from shared.event_counters import COUNTER_FIELDS
 
 
 class EventBase(BaseModel):
@@ -59,3 +60,19 @@ class EventStatusUpdate(BaseModel):
 class EventManagementResponse(BaseModel):
     events: List[Event]
     total: int
+    next_cursor: Optional[str] = None
+
+
+class EventCounterDeltas(BaseModel):
+    """Counter changes sent by the participants and projects services."""
+
+    events: Dict[str, Dict[str, int]]
+    # Id the sender keeps across retries of this batch; a repeated id is applied once.
+    batch: Optional[str] = Field(None, max_length=64)
+
+    @validator("events")
+    def validate_counters(cls, value: Dict[str, Dict[str, int]]) -> Dict[str, Dict[str, int]]:
+        unknown = {field for deltas in value.values() for field in deltas} - set(COUNTER_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown event counters: {sorted(unknown)}")
+        return value
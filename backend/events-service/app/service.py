@@ -1,10 +1,15 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
-from typing import List
+from typing import Any, Dict, List, Optional, Union
 from uuid import uuid4
 
 from shared import Event, EventStatus, ForbiddenError, NotFoundError, User, UserRole, ValidationError
+from shared.change_feed import OP_STATUS
+from shared.event_counters import COUNTER_FIELDS
+from shared.fieldsets import Fields, select_fields
+from shared.filters import OP_IN, Condition, ListQuery
+from shared.pagination import Page
 
 from .repository import EventsRepository
 from .schemas import EventCreate, EventManagementResponse, EventStatusUpdate, EventUpdate
@@ -36,27 +41,68 @@ class EventsService:
             raise NotFoundError("Event not found")
         return event
 
-    def list_management(self, user: User) -> EventManagementResponse:
-        records = self._repository.list_events()
-        events: List[Event] = [Event.parse_obj(record) for record in records]
-
-        if user.role == UserRole.ORGANIZER:
-            events = [event for event in events if event.organizer_id == user.id]
-
-        return EventManagementResponse(events=events, total=len(events))
-
-    def list_available(self) -> List[Event]:
-        records = self._repository.list_events()
-        events = [Event.parse_obj(record) for record in records]
-        return [
-            event
-            for event in events
-            if event.status in {EventStatus.PUBLISHED, EventStatus.ACTIVE}
-            and event.deleted_at is None
-        ]
+    def list_management(
+        self,
+        user: User,
+        *,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        fields: Optional[Fields] = None,
+        query: ListQuery = ListQuery(),
+    ) -> Union[EventManagementResponse, Dict[str, Any]]:
+        """With ``fields``, the records are returned as plain dicts without validation."""
+        organizer_id = user.id if user.role == UserRole.ORGANIZER else None
+        page = self._repository.list_page(
+            cursor=cursor, limit=limit, query=query, organizer_id=organizer_id, fields=fields
+        )
+        if limit is None and cursor is None:
+            total = len(page.items)
+        else:
+            total = self._repository.count(query=query, organizer_id=organizer_id)
+        if fields is not None:
+            return {"events": page.items, "total": total, "next_cursor": page.next_cursor}
+        events: List[Event] = [Event.parse_obj(record) for record in page.items]
+        return EventManagementResponse(events=events, total=total, next_cursor=page.next_cursor)
+
+    def list_available(
+        self,
+        *,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        fields: Optional[Fields] = None,
+        query: ListQuery = ListQuery(),
+    ) -> Page[Any]:
+        available = Condition(
+            "status", OP_IN, (EventStatus.PUBLISHED.value, EventStatus.ACTIVE.value)
+        )
+        page = self._repository.list_page(
+            cursor=cursor, limit=limit, query=query.where(available), fields=fields
+        )
+        if fields is not None:
+            return page
+        return Page([Event.parse_obj(record) for record in page.items], page.next_cursor)
 
-    def get_event(self, event_id: str) -> Event:
-        return self._load_event(event_id)
+    def event_version(self, event_id: str) -> str:
+        """Version token of the event for conditional GETs, without building the model."""
+        record = self._repository.get_event(event_id)
+        if not record or record.get("deleted_at") is not None:
+            raise NotFoundError("Event not found")
+        counters = ":".join(str(record.get(field, 0)) for field in COUNTER_FIELDS)
+        return f"{record['id']}:{record['updated_at']}:{counters}"
+
+    def list_changes(self, *, since: int, limit: int) -> Dict[str, Any]:
+        """Change feed page for replicas in other services; see ``shared.change_feed``."""
+        return self._repository.list_changes(since, limit)
+
+    def get_event(
+        self, event_id: str, *, fields: Optional[Fields] = None
+    ) -> Union[Event, Dict[str, Any]]:
+        if fields is None:
+            return self._load_event(event_id)
+        record = self._repository.get_event(event_id)
+        if not record or record.get("deleted_at") is not None:
+            raise NotFoundError("Event not found")
+        return select_fields(record, fields)
 
     def create_event(self, user: User, payload: EventCreate) -> Event:
         if user.role not in {UserRole.ORGANIZER, UserRole.ADMIN}:
@@ -144,7 +190,7 @@ class EventsService:
 
         event.status = payload.status
         event.updated_at = _utcnow()
-        record = self._repository.update(event_id, event)
+        record = self._repository.update(event_id, event, op=OP_STATUS)
         if not record:
             raise NotFoundError("Event not found")
         return Event.parse_obj(record)
@@ -28,6 +28,7 @@ from events_service_app import create_app  # type: ignore
 from events_service_app.dependencies import DependencyBundle  # type: ignore
 from shared.config import get_settings
 from shared.database import DatabaseManager
+from shared.middleware import SERVICE_TOKEN_HEADER, service_token
 
 
 @pytest.fixture()
@@ -57,5 +58,10 @@ def token_factory() -> Callable[[Dict], str]:
     return _create
 
 
+@pytest.fixture()
+def service_headers(client: TestClient) -> Dict[str, str]:
+    return {SERVICE_TOKEN_HEADER: service_token(get_settings())}
+
+
 def auth_header(token: str) -> Dict[str, str]:
     return {"Authorization": f"Bearer {token}"}
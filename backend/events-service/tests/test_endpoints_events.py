@@ -2,7 +2,18 @@ from __future__ import annotations
 
 from datetime import datetime, timedelta, timezone
 
-from shared.models import EventStatus
+from tinydb.storages import MemoryStorage
+
+from events_service_app.dependencies import DependencyBundle, init_dependencies  # type: ignore
+from events_service_app.repository import EventsRepository  # type: ignore
+from events_service_app.schemas import EventCreate, EventStatusUpdate  # type: ignore
+from events_service_app.service import EventsService  # type: ignore
+from shared.change_feed import EVENT_CHANGES_TABLE
+from shared.config import Settings
+from shared.database import DatabaseManager
+from shared.event_counters import EventCounters
+from shared.event_replica import EventReplica
+from shared.models import EventStatus, User, UserRole
 
 
 def _auth_header(token: str) -> dict:
@@ -46,6 +57,33 @@ def test_create_and_get_event(client, token_factory):
     assert detail.json()["id"] == event_id
 
 
+def test_get_event_honours_if_none_match(client, token_factory):
+    token = token_factory({"sub": "organizer-1", "role": "organizer"})
+    event_id = client.post(
+        "/api/events", json=_event_payload("Cached Event"), headers=_auth_header(token)
+    ).json()["id"]
+
+    first = client.get(f"/api/events/{event_id}", headers=_auth_header(token))
+    etag = first.headers["ETag"]
+    conditional = {**_auth_header(token), "If-None-Match": etag}
+    cached = client.get(f"/api/events/{event_id}", headers=conditional)
+    assert cached.status_code == 304
+    assert cached.content == b""
+    # Another representation of the same event has its own tag.
+    sparse = client.get(f"/api/events/{event_id}?fields=name", headers=conditional)
+    assert sparse.status_code == 200
+
+    updated = client.put(
+        f"/api/events/{event_id}",
+        json={"description": "Changed description"},
+        headers=_auth_header(token),
+    )
+    assert updated.status_code == 200
+    changed = client.get(f"/api/events/{event_id}", headers=conditional)
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+
 def test_management_filters_by_organizer(client, token_factory):
     organizer_token = token_factory({"sub": "organizer-1", "role": "organizer"})
     other_token = token_factory({"sub": "organizer-2", "role": "organizer"})
@@ -148,3 +186,287 @@ def test_available_events_endpoint(client, token_factory):
     names = [event["name"] for event in available.json()]
     assert "Published Event" in names
     assert "Draft Event" not in names
+
+
+def test_list_endpoints_paginate_with_cursor(client, token_factory):
+    admin_token = token_factory({"sub": "admin-1", "role": "admin"})
+    created = []
+    for index in range(5):
+        status = EventStatus.PUBLISHED if index % 2 else EventStatus.ACTIVE
+        response = client.post(
+            "/api/events",
+            json=_event_payload(f"Paged Event {index}", status=status),
+            headers=_auth_header(admin_token),
+        )
+        created.append(response.json()["id"])
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        page = client.get(
+            "/api/events/management", params=params, headers=_auth_header(admin_token)
+        ).json()
+        assert page["total"] == 5
+        seen.extend(event["id"] for event in page["events"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    # Every event exactly once, in the same order as the unpaginated list.
+    everything = client.get("/api/events/management", headers=_auth_header(admin_token)).json()
+    assert everything["next_cursor"] is None
+    assert seen == [event["id"] for event in everything["events"]]
+    assert sorted(seen) == sorted(created)
+
+    first = client.get("/api/events/available", params={"limit": 3})
+    rest = client.get(
+        "/api/events/available", params={"cursor": first.headers["X-Next-Cursor"]}
+    )
+    assert "X-Next-Cursor" not in rest.headers
+    assert [event["id"] for event in first.json() + rest.json()] == seen
+
+    invalid = client.get("/api/events/available", params={"cursor": "not-a-cursor"})
+    assert invalid.status_code == 422
+
+
+def test_sparse_fieldsets(client, token_factory):
+    token = token_factory({"sub": "organizer-1", "role": "organizer"})
+    created = client.post(
+        "/api/events",
+        json=_event_payload("Sparse Event", status=EventStatus.PUBLISHED),
+        headers=_auth_header(token),
+    ).json()
+
+    available = client.get("/api/events/available", params={"fields": "name,status"})
+    assert available.json() == [
+        {"id": created["id"], "name": "Sparse Event", "status": "published"}
+    ]
+    management = client.get(
+        "/api/events/management", params={"fields": "location"}, headers=_auth_header(token)
+    ).json()
+    assert management["events"] == [{"id": created["id"], "location": "Innovation Hub"}]
+    assert management["total"] == 1
+    detail = client.get(
+        f"/api/events/{created['id']}",
+        params={"fields": "start_date"},
+        headers=_auth_header(token),
+    )
+    assert detail.json() == {"id": created["id"], "start_date": created["start_date"]}
+
+    unknown = client.get("/api/events/available", params={"fields": "name,password"})
+    assert unknown.status_code == 422
+
+
+def test_list_endpoints_filter_and_sort(client, token_factory):
+    admin_token = token_factory({"sub": "admin-1", "role": "admin"})
+    now = datetime.now(timezone.utc)
+    specs = [
+        ("Late AI", EventStatus.PUBLISHED, ["ai"], 10),
+        ("Early Web", EventStatus.ACTIVE, ["web"], 3),
+        ("Draft AI", EventStatus.DRAFT, ["ai"], 5),
+        ("Mid AI", EventStatus.ACTIVE, ["ai", "web"], 7),
+    ]
+    ids = {}
+    for name, status, tags, days in specs:
+        payload = _event_payload(name, status=status)
+        payload["tags"] = tags
+        payload["start_date"] = (now + timedelta(days=days)).isoformat()
+        payload["end_date"] = (now + timedelta(days=days + 1)).isoformat()
+        response = client.post("/api/events", json=payload, headers=_auth_header(admin_token))
+        ids[name] = response.json()["id"]
+
+    def names(events):
+        by_id = {event_id: name for name, event_id in ids.items()}
+        return [by_id[event["id"]] for event in events]
+
+    available = client.get("/api/events/available", params={"tag": "ai", "sort": "start_date"})
+    assert names(available.json()) == ["Mid AI", "Late AI"]
+
+    management = client.get(
+        "/api/events/management",
+        params={
+            "status": "draft,active",
+            "start_after": (now + timedelta(days=4)).isoformat(),
+            "sort": "start_date",
+            "limit": 1,
+        },
+        headers=_auth_header(admin_token),
+    ).json()
+    assert names(management["events"]) == ["Draft AI"]
+    assert management["total"] == 2
+
+    by_name = client.get(
+        "/api/events/management",
+        params=[("status", "active"), ("status", "published"), ("sort", "name")],
+        headers=_auth_header(admin_token),
+    ).json()
+    assert names(by_name["events"]) == ["Early Web", "Late AI", "Mid AI"]
+
+    assert client.get("/api/events/available", params={"sort": "description"}).status_code == 422
+    assert client.get("/api/events/available", params={"status": "archived"}).status_code == 422
+
+
+def test_get_many_keeps_input_order():
+    manager = DatabaseManager(Settings(db_instrumentation=True), storage=MemoryStorage)
+    repository = EventsRepository(manager)
+    service = EventsService(repository)
+    admin = User(id="admin-1", role=UserRole.ADMIN)
+    ids = [
+        service.create_event(admin, EventCreate(**_event_payload(f"Event {index}"))).id
+        for index in range(4)
+    ]
+
+    records = repository.get_many([ids[2], "unknown", ids[0]])
+    assert [record and record["id"] for record in records] == [ids[2], None, ids[0]]
+    operations = manager.storage_metrics()["tables"]["events"]["operations"]
+    assert operations["find_many"]["calls"] == 1
+    assert operations["find_many"]["docs_scanned"] == 2
+
+
+def test_available_events_only_visit_matching_records():
+    manager = DatabaseManager(Settings(db_instrumentation=True), storage=MemoryStorage)
+    service = EventsService(EventsRepository(manager))
+    admin = User(id="admin-1", role=UserRole.ADMIN)
+    events = [
+        service.create_event(admin, EventCreate(**_event_payload(f"Event {index}")))
+        for index in range(6)
+    ]
+    published = EventStatusUpdate(status=EventStatus.PUBLISHED)
+    service.update_status(admin, events[0].id, published)
+    service.update_status(admin, events[1].id, published)
+    service.update_status(admin, events[1].id, EventStatusUpdate(status=EventStatus.ACTIVE))
+    service.update_status(admin, events[2].id, published)
+    service.delete_event(admin, events[2].id)
+
+    available = service.list_available()
+    assert sorted(event.id for event in available.items) == sorted(
+        event.id for event in events[:2]
+    )
+    operations = manager.storage_metrics()["tables"]["events"]["operations"]
+    assert operations["find_page"]["docs_scanned"] == 2
+
+
+def test_storage_metrics_endpoint(client):
+    response = client.get("/internal/metrics/storage")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["enabled"] is False
+    assert body["flush"] is None
+    assert body["executor"]["queue_depth"] == 0
+    assert body["executor"]["completed"] == 0
+
+
+def test_change_feed_replicates_every_write(client, token_factory, service_headers):
+    headers = _auth_header(token_factory({"sub": "admin-1", "role": "admin"}))
+    first = client.post("/api/events", json=_event_payload("First"), headers=headers).json()
+    second = client.post("/api/events", json=_event_payload("Second"), headers=headers).json()
+    client.put(f"/api/events/{first['id']}", json={"name": "First renamed"}, headers=headers)
+    client.patch(f"/api/events/{first['id']}/status", json={"status": "published"}, headers=headers)
+    client.delete(f"/api/events/{second['id']}", headers=headers)
+
+    page = client.get(
+        "/internal/events/changes", params={"since": 0, "limit": 3}, headers=service_headers
+    ).json()
+    assert [change["op"] for change in page["changes"]] == ["insert", "insert", "update"]
+    assert (page["last_seq"], page["has_more"]) == (3, True)
+    rest = client.get(
+        "/internal/events/changes", params={"since": 3}, headers=service_headers
+    ).json()
+    assert [change["op"] for change in rest["changes"]] == ["status", "delete"]
+    assert rest["changes"][0]["record"]["status"] == "published"
+    assert (rest["last_seq"], rest["has_more"]) == (5, False)
+
+    replica = EventReplica(
+        lambda since, limit: client.get(
+            "/internal/events/changes",
+            params={"since": since, "limit": limit},
+            headers=service_headers,
+        ).json(),
+        batch_size=2,
+    )
+    assert replica.get(first["id"]).name == "First renamed"
+    assert replica.get(second["id"]) is None
+    assert replica.stats()["last_seq"] == 5
+
+
+def test_existing_events_seed_an_empty_change_log():
+    manager = DatabaseManager(Settings(), storage=MemoryStorage)
+    service = EventsService(EventsRepository(manager))
+    admin = User(id="admin-1", role=UserRole.ADMIN)
+    event = service.create_event(admin, EventCreate(**_event_payload("Seeded")))
+    manager.table(EVENT_CHANGES_TABLE).truncate()
+
+    repository = EventsRepository(manager)
+    assert repository.seed_changes() == 1
+    assert repository.seed_changes() == 0
+    changes = repository.list_changes(0, 10)["changes"]
+    assert [(change["seq"], change["key"]) for change in changes] == [(1, event.id)]
+
+
+def test_updates_keep_counters_and_reconcile_recomputes_them(
+    client, token_factory, service_headers
+):
+    headers = _auth_header(token_factory({"sub": "admin-1", "role": "admin"}))
+    created = client.post("/api/events", json=_event_payload("Counted"), headers=headers)
+    event_id = created.json()["id"]
+    manager = client.app.state.db_manager
+    EventCounters(manager).adjust(event_id, submitted_projects=3)
+    etag = client.get(f"/api/events/{event_id}", headers=headers).headers["ETag"]
+
+    updated = client.put(f"/api/events/{event_id}", json={"name": "Renamed"}, headers=headers)
+    assert updated.json()["submitted_projects"] == 3
+
+    result = client.post("/internal/events/counters/reconcile", headers=service_headers).json()
+    assert result == {"events": 1, "corrected": 1}
+    detail = client.get(f"/api/events/{event_id}", headers={**headers, "If-None-Match": etag})
+    assert detail.status_code == 200
+    assert detail.json()["submitted_projects"] == 0
+
+
+def test_startup_keeps_counters_without_the_source_tables(client, token_factory):
+    headers = _auth_header(token_factory({"sub": "admin-1", "role": "admin"}))
+    created = client.post("/api/events", json=_event_payload("Restarted"), headers=headers)
+    event_id = created.json()["id"]
+    manager = client.app.state.db_manager
+    EventCounters(manager).adjust(event_id, registered_participants=4)
+
+    init_dependencies(client.app, Settings(), DependencyBundle(db_manager=manager))
+    detail = client.get(f"/api/events/{event_id}", headers=headers)
+    assert detail.json()["registered_participants"] == 4
+
+
+def test_counter_changes_from_other_services(client, token_factory, service_headers):
+    headers = _auth_header(token_factory({"sub": "admin-1", "role": "admin"}))
+    created = client.post("/api/events", json=_event_payload("Pushed"), headers=headers)
+    event_id = created.json()["id"]
+
+    deltas = {
+        event_id: {"submitted_projects": 2, "formed_teams": 1},
+        "missing": {"formed_teams": 1},
+    }
+    batch = {"batch": "batch-1", "events": deltas}
+    for _ in range(2):
+        applied = client.post("/internal/events/counters", json=batch, headers=service_headers)
+        assert applied.json() == {"events": 1}
+    detail = client.get(f"/api/events/{event_id}", headers=headers).json()
+    assert (detail["submitted_projects"], detail["formed_teams"]) == (2, 1)
+
+    unknown = {event_id: {"max_teams": 1}}
+    rejected = client.post(
+        "/internal/events/counters", json={"events": unknown}, headers=service_headers
+    )
+    assert rejected.status_code == 422
+
+
+def test_internal_endpoints_require_the_service_credential(client, token_factory):
+    user_headers = _auth_header(token_factory({"sub": "admin-1", "role": "admin"}))
+    deltas = {"events": {"any": {"formed_teams": 1}}}
+    for headers in ({}, user_headers, {"X-Service-Token": "forged"}):
+        applied = client.post("/internal/events/counters", json=deltas, headers=headers)
+        assert applied.status_code == 401
+        reconciled = client.post("/internal/events/counters/reconcile", headers=headers)
+        assert reconciled.status_code == 401
+        changes = client.get("/internal/events/changes", headers=headers)
+        assert changes.status_code == 401
@@ -1,13 +1,15 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import cast
+from typing import Optional, cast
 
 from fastapi import Depends, FastAPI, Request
 
 from shared import DatabaseManager, Settings
+from shared.event_reader import EventSource
+from shared.event_replica import create_event_source
+from shared.executor import StorageExecutor
 
-from .event_reader import EventReader
 from .repository import NotificationsRepository
 from .service import NotificationsService
 
@@ -15,7 +17,8 @@ from .service import NotificationsService
 @dataclass
 class DependencyBundle:
     db_manager: DatabaseManager
-    event_reader: EventReader
+    event_reader: EventSource
+    storage_executor: Optional[StorageExecutor] = None
 
 
 def init_dependencies(
@@ -25,11 +28,16 @@ def init_dependencies(
 ) -> DependencyBundle:
     if bundle is None:
         db_manager = DatabaseManager(settings)
-        bundle = DependencyBundle(
-            db_manager=db_manager, event_reader=EventReader(db_manager)
+        event_reader = create_event_source(settings, db_manager)
+        bundle = DependencyBundle(db_manager=db_manager, event_reader=event_reader)
+
+    if bundle.storage_executor is None:
+        bundle.storage_executor = StorageExecutor(
+            settings.storage_workers, settings.storage_max_queue
         )
 
     app.state.db_manager = bundle.db_manager
+    app.state.storage_executor = bundle.storage_executor
     app.state.event_reader = bundle.event_reader
     return bundle
 
@@ -38,8 +46,12 @@ def get_db_manager(request: Request) -> DatabaseManager:
     return cast(DatabaseManager, request.app.state.db_manager)
 
 
-def get_event_reader(request: Request) -> EventReader:
-    return cast(EventReader, request.app.state.event_reader)
+def get_storage_executor(request: Request) -> StorageExecutor:
+    return cast(StorageExecutor, request.app.state.storage_executor)
+
+
+def get_event_reader(request: Request) -> EventSource:
+    return cast(EventSource, request.app.state.event_reader)
 
 
 def get_repository(
@@ -50,7 +62,7 @@ def get_repository(
 
 def get_notifications_service(
     repository: NotificationsRepository = Depends(get_repository),
-    event_reader: EventReader = Depends(get_event_reader),
+    event_reader: EventSource = Depends(get_event_reader),
 ) -> NotificationsService:
     return NotificationsService(repository, event_reader)
 
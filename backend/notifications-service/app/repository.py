@@ -1,39 +1,52 @@
 from __future__ import annotations
 
-import json
 from typing import Any, Dict, List, Optional, cast
 
-from tinydb import Query
+from shared import DatabaseManager, Message, NotificationSettings, model_to_record
+from shared.pagination import Page, decode_cursor, page_of
 
-from shared import DatabaseManager, Message, NotificationSettings
+# Sort key of message pages: send time, then id to break ties.
+MESSAGE_ORDER = ("sent_at", "id")
 
 
 class NotificationsRepository:
     def __init__(self, db_manager: DatabaseManager) -> None:
-        self._messages = db_manager.table("messages")
-        self._settings = db_manager.table("notification_settings")
+        self._messages = db_manager.table("messages", indexes=["event_id"])
+        self._settings = db_manager.table("notification_settings", indexes=["event_id"])
 
     # Messages
     def list_messages(self, event_id: str) -> List[Dict[str, Any]]:
-        return [dict(record) for record in self._messages.search(Query().event_id == event_id)]
+        return [dict(record) for record in self._messages.find(event_id=event_id)]
+
+    def list_messages_page(
+        self, event_id: str, *, cursor: Optional[str] = None, limit: Optional[int] = None
+    ) -> Page[Dict[str, Any]]:
+        after = decode_cursor(cursor, MESSAGE_ORDER)
+        records = self._messages.find_page(
+            MESSAGE_ORDER,
+            after=after,
+            limit=None if limit is None else limit + 1,
+            event_id=event_id,
+        )
+        return page_of(records, MESSAGE_ORDER, limit)
+
+    def count_messages(self, event_id: str) -> int:
+        return self._messages.count_where(event_id=event_id)
 
     def insert_message(self, message: Message) -> Dict[str, Any]:
-        data: Dict[str, Any] = json.loads(message.json())
+        data: Dict[str, Any] = model_to_record(message)
         self._messages.insert(data)
         return data
 
     # Settings
     def get_settings(self, event_id: str) -> Optional[Dict[str, Any]]:
-        record = self._settings.get(Query().event_id == event_id)
+        record = self._settings.find_one(event_id=event_id)
         if record is None:
             return None
         return dict(cast(Dict[str, Any], record))
 
     def upsert_settings(self, settings: NotificationSettings) -> Dict[str, Any]:
-        data: Dict[str, Any] = json.loads(settings.json())
-        query = Query().event_id == settings.event_id
-        if self._settings.contains(query):
-            self._settings.update(data, query)
-        else:
+        data: Dict[str, Any] = model_to_record(settings)
+        if not self._settings.update_where(data, event_id=settings.event_id):
             self._settings.insert(data)
         return data
@@ -1,11 +1,15 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
 
 from shared import Message, User
+from shared.executor import StorageExecutor
 from shared.middleware import get_current_user
+from shared.pagination import MAX_PAGE_SIZE
 
-from .dependencies import get_notifications_service
+from .dependencies import get_notifications_service, get_storage_executor
 from .schemas import MessageCreate, MessagesListResponse, NotificationSettingsResponse, NotificationUpdate
 from .service import NotificationsService
 
@@ -18,17 +22,21 @@ async def send_message(
     payload: MessageCreate,
     user: User = Depends(get_current_user),
     service: NotificationsService = Depends(get_notifications_service),
+    executor: StorageExecutor = Depends(get_storage_executor),
 ) -> Message:
-    return service.send_message(user, event_id, payload)
+    return await executor.run(service.send_message, user, event_id, payload)
 
 
 @router.get("/messages", response_model=MessagesListResponse)
 async def list_messages(
     event_id: str,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     user: User = Depends(get_current_user),
     service: NotificationsService = Depends(get_notifications_service),
+    executor: StorageExecutor = Depends(get_storage_executor),
 ) -> MessagesListResponse:
-    return service.list_messages(user, event_id)
+    return await executor.run(service.list_messages, user, event_id, limit=limit, cursor=cursor)
 
 
 @router.put("/notifications", response_model=NotificationSettingsResponse)
@@ -37,5 +45,6 @@ async def update_settings(
     payload: NotificationUpdate,
     user: User = Depends(get_current_user),
     service: NotificationsService = Depends(get_notifications_service),
+    executor: StorageExecutor = Depends(get_storage_executor),
 ) -> NotificationSettingsResponse:
-    return service.update_settings(user, event_id, payload)
+    return await executor.run(service.update_settings, user, event_id, payload)
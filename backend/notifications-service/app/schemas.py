@@ -20,6 +20,7 @@ class NotificationUpdate(BaseModel):
 class MessagesListResponse(BaseModel):
     messages: List[Message]
     total: int
+    next_cursor: Optional[str] = None
 
 
 class NotificationSettingsResponse(BaseModel):
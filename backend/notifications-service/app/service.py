@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
-from typing import List
+from typing import List, Optional
 from uuid import uuid4
 
 from shared import (
@@ -13,8 +13,8 @@ from shared import (
     User,
     UserRole,
 )
+from shared.event_reader import EventSource
 
-from .event_reader import EventReader
 from .repository import NotificationsRepository
 from .schemas import MessageCreate, MessagesListResponse, NotificationSettingsResponse, NotificationUpdate
 
@@ -27,7 +27,7 @@ class NotificationsService:
     def __init__(
         self,
         repository: NotificationsRepository,
-        event_reader: EventReader,
+        event_reader: EventSource,
     ) -> None:
         self._repository = repository
         self._event_reader = event_reader
@@ -62,14 +62,23 @@ class NotificationsService:
         return Message.parse_obj(record)
 
     def list_messages(
-        self, user: User, event_id: str
+        self,
+        user: User,
+        event_id: str,
+        *,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
     ) -> MessagesListResponse:
         event = self._require_event(event_id)
         self._assert_event_access(user, event)
 
-        records = self._repository.list_messages(event_id)
-        messages: List[Message] = [Message.parse_obj(record) for record in records]
-        return MessagesListResponse(messages=messages, total=len(messages))
+        page = self._repository.list_messages_page(event_id, cursor=cursor, limit=limit)
+        messages: List[Message] = [Message.parse_obj(record) for record in page.items]
+        if limit is None and cursor is None:
+            total = len(messages)
+        else:
+            total = self._repository.count_messages(event_id)
+        return MessagesListResponse(messages=messages, total=total, next_cursor=page.next_cursor)
 
     def update_settings(
         self, user: User, event_id: str, payload: NotificationUpdate
@@ -28,10 +28,10 @@ if PACKAGE_NAME not in sys.modules:
 
 from notifications_service_app import create_app  # type: ignore
 from notifications_service_app.dependencies import DependencyBundle  # type: ignore
-from notifications_service_app.event_reader import EventReader  # type: ignore
 from shared import Event, EventStatus
 from shared.config import get_settings
 from shared.database import DatabaseManager
+from shared.event_reader import EventReader
 
 
 @pytest.fixture()
@@ -1,13 +1,24 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import cast
+from typing import List, Optional, cast
+
+from fastapi import Depends, FastAPI, Query, Request
+
+from shared import DatabaseManager, ParticipantStatus, Settings
+from shared.event_counters import CounterPublisher, create_counter_publisher
+from shared.event_reader import EventSource
+from shared.event_replica import create_event_source
+from shared.executor import StorageExecutor
+from shared.filters import (
+    OP_CONTAINS,
+    Condition,
+    ListQuery,
+    in_condition,
+    sort_order,
+)
+from shared.seats import SeatReservations
 
-from fastapi import Depends, FastAPI, Request
-
-from shared import DatabaseManager, Settings
-
-from .event_reader import EventReader
 from .repository import ParticipantsRepository
 from .service import ParticipantsService
 
@@ -15,7 +26,10 @@ from .service import ParticipantsService
 @dataclass
 class DependencyBundle:
     db_manager: DatabaseManager
-    event_reader: EventReader
+    event_reader: EventSource
+    storage_executor: Optional[StorageExecutor] = None
+    counter_publisher: Optional[CounterPublisher] = None
+    seat_reservations: Optional[SeatReservations] = None
 
 
 def init_dependencies(
@@ -25,12 +39,29 @@ def init_dependencies(
 ) -> DependencyBundle:
     if bundle is None:
         db_manager = DatabaseManager(settings)
-        bundle = DependencyBundle(
-            db_manager=db_manager, event_reader=EventReader(db_manager)
+        event_reader = create_event_source(settings, db_manager)
+        bundle = DependencyBundle(db_manager=db_manager, event_reader=event_reader)
+
+    if bundle.storage_executor is None:
+        bundle.storage_executor = StorageExecutor(
+            settings.storage_workers, settings.storage_max_queue
+        )
+
+    if bundle.seat_reservations is None:
+        bundle.seat_reservations = SeatReservations(
+            settings.registration_lock_dir or None,
+            timeout=settings.registration_lock_timeout,
         )
 
+    if bundle.counter_publisher is None:
+        bundle.counter_publisher = create_counter_publisher(settings)
+
+    ParticipantsRepository(bundle.db_manager).seed_counts()
     app.state.db_manager = bundle.db_manager
+    app.state.storage_executor = bundle.storage_executor
     app.state.event_reader = bundle.event_reader
+    app.state.counter_publisher = bundle.counter_publisher
+    app.state.seat_reservations = bundle.seat_reservations
     return bundle
 
 
@@ -38,19 +69,50 @@ def get_db_manager(request: Request) -> DatabaseManager:
     return cast(DatabaseManager, request.app.state.db_manager)
 
 
-def get_event_reader(request: Request) -> EventReader:
-    return cast(EventReader, request.app.state.event_reader)
+def get_storage_executor(request: Request) -> StorageExecutor:
+    return cast(StorageExecutor, request.app.state.storage_executor)
+
+
+def get_event_reader(request: Request) -> EventSource:
+    return cast(EventSource, request.app.state.event_reader)
+
+
+def get_counter_publisher(request: Request) -> CounterPublisher:
+    return cast(CounterPublisher, request.app.state.counter_publisher)
+
+
+def get_seat_reservations(request: Request) -> SeatReservations:
+    return cast(SeatReservations, request.app.state.seat_reservations)
 
 
 def get_repository(
     db_manager: DatabaseManager = Depends(get_db_manager),
+    counter_publisher: CounterPublisher = Depends(get_counter_publisher),
 ) -> ParticipantsRepository:
-    return ParticipantsRepository(db_manager)
+    return ParticipantsRepository(db_manager, counter_publisher)
 
 
 def get_participants_service(
     repository: ParticipantsRepository = Depends(get_repository),
-    event_reader: EventReader = Depends(get_event_reader),
+    event_reader: EventSource = Depends(get_event_reader),
+    seat_reservations: SeatReservations = Depends(get_seat_reservations),
 ) -> ParticipantsService:
-    return ParticipantsService(repository, event_reader)
+    return ParticipantsService(repository, event_reader, seat_reservations)
+
+
+# Values accepted by ``sort``; the first one is the default.
+PARTICIPANT_SORTS = ("registered_at", "name")
+
 
+def get_list_query(
+    status: Optional[List[str]] = Query(None),
+    skill: Optional[str] = None,
+    sort: Optional[str] = None,
+) -> ListQuery:
+    conditions: List[Condition] = []
+    statuses = in_condition("status", status, [member.value for member in ParticipantStatus])
+    if statuses is not None:
+        conditions.append(statuses)
+    if skill is not None:
+        conditions.append(Condition("skills", OP_CONTAINS, skill))
+    return ListQuery(tuple(conditions), sort_order(sort, PARTICIPANT_SORTS))
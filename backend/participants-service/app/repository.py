@@ -1,42 +1,168 @@
 from __future__ import annotations
 
-import json
-from typing import Any, Dict, List, Optional, cast
+from collections import Counter
+from contextlib import contextmanager
+from threading import local
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, cast
 
-from tinydb import Query
+from shared import DatabaseManager, Participant, model_to_record
+from shared.event_counters import (
+    ACTIVE_PARTICIPANT_STATUSES,
+    REGISTERED_PARTICIPANTS,
+    CounterPublisher,
+    registered_delta,
+)
+from shared.fieldsets import Fields
+from shared.filters import ListQuery
+from shared.pagination import Page, decode_cursor, page_of
 
-from shared import DatabaseManager, Participant
+# Sort key of list pages: registration time, then id to break ties.
+PAGE_ORDER = ("registered_at", "id")
+# Pending and approved participants per event, kept by this service in the
+# transaction of each participant write.
+COUNTS_TABLE = "participant_counts"
 
 
 class ParticipantsRepository:
-    def __init__(self, db_manager: DatabaseManager) -> None:
-        self._table = db_manager.table("participants")
+    def __init__(
+        self, db_manager: DatabaseManager, publisher: Optional[CounterPublisher] = None
+    ) -> None:
+        self._db_manager = db_manager
+        self._table = db_manager.table(
+            "participants",
+            indexes=["id", "event_id", ("event_id", "user_id")],
+        )
+        self._cache = db_manager.record_cache
+        self._counts = db_manager.table(COUNTS_TABLE, indexes=["event_id"])
+        self._publisher = publisher
+        # Counter changes of the transaction this thread is in.
+        self._local = local()
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        One storage transaction. The counter changes of the writes inside
+        are published once the outermost one commits, and dropped if it
+        rolls back.
+        """
+        outermost = getattr(self._local, "pending", None) is None
+        if outermost:
+            self._local.pending = []
+        try:
+            with self._db_manager.transaction():
+                yield
+        except BaseException:
+            if outermost:
+                self._local.pending = None
+            raise
+        if outermost:
+            pending: List[Tuple[str, int]] = self._local.pending
+            self._local.pending = None
+            if self._publisher is not None:
+                for event_id, delta in pending:
+                    self._publisher.add(event_id, **{REGISTERED_PARTICIPANTS: delta})
 
     def list_by_event(self, event_id: str) -> List[Dict[str, Any]]:
-        return [dict(record) for record in self._table.search(Query().event_id == event_id)]
+        return [dict(record) for record in self._table.find(event_id=event_id)]
+
+    def list_page(
+        self,
+        event_id: str,
+        *,
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None,
+        query: ListQuery = ListQuery(),
+        fields: Optional[Fields] = None,
+    ) -> Page[Dict[str, Any]]:
+        order_by = query.order_by or PAGE_ORDER
+        records = self._table.find_page(
+            order_by,
+            after=decode_cursor(cursor, order_by),
+            limit=None if limit is None else limit + 1,
+            conditions=query.conditions,
+            event_id=event_id,
+        )
+        return page_of(records, order_by, limit, fields=fields)
+
+    def table_version(self) -> str:
+        return self._db_manager.table_version("participants")
+
+    def count_by_event(self, event_id: str, *, query: ListQuery = ListQuery()) -> int:
+        return self._table.count_where(conditions=query.conditions, event_id=event_id)
 
     def get(self, participant_id: str) -> Optional[Dict[str, Any]]:
-        record = self._table.get(Query().id == participant_id)
+        return self._cache.get("participants", participant_id, lambda: self._load(participant_id))
+
+    def get_many(self, participant_ids: Sequence[str]) -> List[Optional[Dict[str, Any]]]:
+        """Records for ``participant_ids`` in the same order, ``None`` for unknown ids."""
+        return self._cache.get_many("participants", participant_ids, self._load_many)
+
+    def _load_many(self, participant_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        records = self._table.find_many("id", participant_ids)
+        return {record["id"]: dict(cast(Dict[str, Any], record)) for record in records}
+
+    def _load(self, participant_id: str) -> Optional[Dict[str, Any]]:
+        record = self._table.find_one(id=participant_id)
         if record is None:
             return None
         return dict(cast(Dict[str, Any], record))
 
+    def active_count(self, event_id: str) -> int:
+        """Pending and approved participants of the event, from the service's own counts."""
+        record = self._counts.find_one(event_id=event_id)
+        return 0 if record is None else int(record[REGISTERED_PARTICIPANTS])
+
+    def seed_counts(self) -> int:
+        """Fill an empty counts table from the stored participants; returns the events counted."""
+        with self._db_manager.transaction():
+            if len(self._counts):
+                return 0
+            counts = Counter(
+                record["event_id"]
+                for record in self._table.all()
+                if record.get("status") in ACTIVE_PARTICIPANT_STATUSES
+            )
+            for event_id, count in counts.items():
+                self._counts.insert({"event_id": event_id, REGISTERED_PARTICIPANTS: count})
+        return len(counts)
+
     def find_by_user(self, event_id: str, user_id: str) -> Optional[Dict[str, Any]]:
-        query = Query()
-        record = self._table.get((query.event_id == event_id) & (query.user_id == user_id))
+        record = self._table.find_one(event_id=event_id, user_id=user_id)
         if record is None:
             return None
         return dict(cast(Dict[str, Any], record))
 
     def insert(self, participant: Participant) -> Dict[str, Any]:
-        data: Dict[str, Any] = json.loads(participant.json())
-        self._table.insert(data)
+        """Insert the participant and count it on its event, in one transaction."""
+        data: Dict[str, Any] = model_to_record(participant)
+        with self.transaction():
+            self._table.insert(data)
+            self._count(data["event_id"], None, data["status"])
+        self._cache.invalidate("participants", data["id"])
         return data
 
     def update(self, participant_id: str, participant: Participant) -> Optional[Dict[str, Any]]:
-        existing = self.get(participant_id)
-        if not existing:
+        data: Dict[str, Any] = model_to_record(participant)
+        with self.transaction():
+            previous = self._table.find_one(id=participant_id)
+            if previous is not None:
+                # From the stored version, so concurrent updates never share one.
+                data["version"] = int(previous.get("version", 0)) + 1
+                self._table.update_where(data, id=participant_id)
+                self._count(data["event_id"], previous.get("status"), data["status"])
+        self._cache.invalidate("participants", participant_id)
+        if previous is None:
             return None
-        data: Dict[str, Any] = json.loads(participant.json())
-        self._table.update(data, Query().id == participant_id)
         return data
+
+    def _count(self, event_id: str, before: Optional[str], after: Optional[str]) -> None:
+        delta = registered_delta(before, after)
+        if not delta:
+            return
+        record = self._counts.find_one(event_id=event_id)
+        if record is None:
+            self._counts.insert({"event_id": event_id, REGISTERED_PARTICIPANTS: max(0, delta)})
+        else:
+            count = max(0, int(record[REGISTERED_PARTICIPANTS]) + delta)
+            self._counts.update_where({REGISTERED_PARTICIPANTS: count}, event_id=event_id)
+        self._local.pending.append((event_id, delta))
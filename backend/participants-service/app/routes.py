@@ -1,11 +1,18 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, Response, status
+from typing import Any, Optional
+
+from fastapi import APIRouter, Depends, Query, Request, Response, status
 
 from shared import Participant, User
+from shared.conditional import make_etag, not_modified
+from shared.executor import StorageExecutor
 from shared.middleware import get_current_user
+from shared.fieldsets import json_response, parse_fields
+from shared.filters import ListQuery
+from shared.pagination import MAX_PAGE_SIZE
 
-from .dependencies import get_participants_service
+from .dependencies import get_list_query, get_participants_service, get_storage_executor
 from .schemas import ParticipantRegistration, ParticipantsListResponse
 from .service import ParticipantsService
 
@@ -15,10 +22,35 @@ router = APIRouter(prefix="/api/events/{event_id}", tags=["participants"])
 @router.get("/participants", response_model=ParticipantsListResponse)
 async def list_participants(
     event_id: str,
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    query: ListQuery = Depends(get_list_query),
     user: User = Depends(get_current_user),
     service: ParticipantsService = Depends(get_participants_service),
-) -> ParticipantsListResponse:
-    return service.list_participants(user, event_id)
+    executor: StorageExecutor = Depends(get_storage_executor),
+) -> Any:
+    selected = parse_fields(fields, Participant)
+    version = await executor.run(service.participants_version, user, event_id)
+    etag = make_etag(version, request.url.query)
+    unchanged = not_modified(request, etag)
+    if unchanged is not None:
+        return unchanged
+    result = await executor.run(
+        service.list_participants,
+        user,
+        event_id,
+        limit=limit,
+        cursor=cursor,
+        fields=selected,
+        query=query,
+    )
+    if selected is not None:
+        return json_response(result, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return result
 
 
 @router.post(
@@ -31,8 +63,9 @@ async def register_participant(
     payload: ParticipantRegistration,
     user: User = Depends(get_current_user),
     service: ParticipantsService = Depends(get_participants_service),
+    executor: StorageExecutor = Depends(get_storage_executor),
 ) -> Participant:
-    return service.register_participant(user, event_id, payload)
+    return await executor.run(service.register_participant, user, event_id, payload)
 
 
 @router.post("/participants/{participant_id}/approve", response_model=Participant)
@@ -41,8 +74,9 @@ async def approve_participant(
     participant_id: str,
     user: User = Depends(get_current_user),
     service: ParticipantsService = Depends(get_participants_service),
+    executor: StorageExecutor = Depends(get_storage_executor),
 ) -> Participant:
-    return service.approve_participant(user, event_id, participant_id)
+    return await executor.run(service.approve_participant, user, event_id, participant_id)
 
 
 @router.post("/participants/{participant_id}/reject", response_model=Participant)
@@ -51,8 +85,9 @@ async def reject_participant(
     participant_id: str,
     user: User = Depends(get_current_user),
     service: ParticipantsService = Depends(get_participants_service),
+    executor: StorageExecutor = Depends(get_storage_executor),
 ) -> Participant:
-    return service.reject_participant(user, event_id, participant_id)
+    return await executor.run(service.reject_participant, user, event_id, participant_id)
 
 
 @router.get("/participants/export")
@@ -60,8 +95,9 @@ async def export_participants(
     event_id: str,
     user: User = Depends(get_current_user),
     service: ParticipantsService = Depends(get_participants_service),
+    executor: StorageExecutor = Depends(get_storage_executor),
 ) -> Response:
-    csv_data = service.export_participants(user, event_id)
+    csv_data = await executor.run(service.export_participants, user, event_id)
     return Response(
         content=csv_data,
         media_type="text/csv",
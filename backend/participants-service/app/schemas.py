@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import List
+from typing import List, Optional
 
 from pydantic import BaseModel, Field
 
@@ -17,3 +17,4 @@ class ParticipantRegistration(BaseModel):
 class ParticipantsListResponse(BaseModel):
     participants: List[Participant]
     total: int
+    next_cursor: Optional[str] = None
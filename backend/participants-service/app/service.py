@@ -3,7 +3,7 @@ from __future__ import annotations
 import csv
 import io
 from datetime import datetime, timezone
-from typing import List
+from typing import Any, ContextManager, Dict, List, Optional, Union
 from uuid import uuid4
 
 from shared import (
@@ -17,8 +17,12 @@ from shared import (
     UserRole,
     ValidationError,
 )
+from shared.event_counters import registered_delta
+from shared.event_reader import EventSource
+from shared.fieldsets import Fields
+from shared.filters import ListQuery
+from shared.seats import SeatReservations, Seats
 
-from .event_reader import EventReader
 from .repository import ParticipantsRepository
 from .schemas import ParticipantRegistration, ParticipantsListResponse
 
@@ -31,10 +35,18 @@ class ParticipantsService:
     def __init__(
         self,
         repository: ParticipantsRepository,
-        event_reader: EventReader,
+        event_reader: EventSource,
+        seat_reservations: Optional[SeatReservations] = None,
     ) -> None:
         self._repository = repository
         self._event_reader = event_reader
+        # Share one instance between requests: the locks live in it.
+        self._seat_reservations = seat_reservations or SeatReservations()
+
+    def _hold_seats(self, event_id: str) -> ContextManager[Seats]:
+        return self._seat_reservations.hold(
+            event_id, lambda: self._repository.active_count(event_id)
+        )
 
     def _require_event(self, event_id: str) -> Event:
         event = self._event_reader.get(event_id)
@@ -54,13 +66,39 @@ class ParticipantsService:
         if user.role == UserRole.USER:
             raise ForbiddenError("Users cannot manage participants")
 
-    def list_participants(self, user: User, event_id: str) -> ParticipantsListResponse:
+    def participants_version(self, user: User, event_id: str) -> str:
+        """Version token of the event's participant list, after the same access checks."""
         event = self._require_event(event_id)
         self._assert_event_access(user, event)
+        return f"{event_id}:{self._repository.table_version()}"
 
-        records = self._repository.list_by_event(event_id)
-        participants: List[Participant] = [Participant.parse_obj(r) for r in records]
-        return ParticipantsListResponse(participants=participants, total=len(participants))
+    def list_participants(
+        self,
+        user: User,
+        event_id: str,
+        *,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        fields: Optional[Fields] = None,
+        query: ListQuery = ListQuery(),
+    ) -> Union[ParticipantsListResponse, Dict[str, Any]]:
+        """With ``fields``, the records are returned as plain dicts without validation."""
+        event = self._require_event(event_id)
+        self._assert_event_access(user, event)
+
+        page = self._repository.list_page(
+            event_id, cursor=cursor, limit=limit, query=query, fields=fields
+        )
+        if limit is None and cursor is None:
+            total = len(page.items)
+        else:
+            total = self._repository.count_by_event(event_id, query=query)
+        if fields is not None:
+            return {"participants": page.items, "total": total, "next_cursor": page.next_cursor}
+        participants: List[Participant] = [Participant.parse_obj(r) for r in page.items]
+        return ParticipantsListResponse(
+            participants=participants, total=total, next_cursor=page.next_cursor
+        )
 
     def register_participant(
         self, user: User, event_id: str, payload: ParticipantRegistration
@@ -69,38 +107,36 @@ class ParticipantsService:
         if event.status != EventStatus.PUBLISHED:
             raise ValidationError("Registrations are only allowed for published events")
 
-        existing = self._repository.find_by_user(event_id, user.id)
-        if existing:
-            raise ValidationError("User already registered for this event")
-
-        current_participants = [
-            Participant.parse_obj(record)
-            for record in self._repository.list_by_event(event_id)
-        ]
-        active_count = sum(
-            1
-            for participant in current_participants
-            if participant.status in {ParticipantStatus.PENDING, ParticipantStatus.APPROVED}
-        )
-        status = (
-            ParticipantStatus.WAITLIST
-            if active_count >= event.max_participants
-            else ParticipantStatus.PENDING
-        )
+        # The duplicate check, capacity check and insert must not interleave
+        # with a concurrent registration for the same event, in any worker;
+        # the event's seat reservation orders them without holding up other
+        # events. The seats are taken before the insert and given back if it
+        # fails. Nothing here grows with the event.
+        with self._hold_seats(event_id) as seats:
+            existing = self._repository.find_by_user(event_id, user.id)
+            if existing or not seats.claim(user.id):
+                raise ValidationError("User already registered for this event")
+
+            status = (
+                ParticipantStatus.WAITLIST
+                if seats.taken >= event.max_participants
+                else ParticipantStatus.PENDING
+            )
 
-        participant = Participant(
-            id=str(uuid4()),
-            event_id=event_id,
-            user_id=user.id,
-            name=payload.name,
-            email=payload.email,
-            skills=payload.skills,
-            status=status,
-            registered_at=_utcnow(),
-            profile_complete=payload.profile_complete,
-        )
+            participant = Participant(
+                id=str(uuid4()),
+                event_id=event_id,
+                user_id=user.id,
+                name=payload.name,
+                email=payload.email,
+                skills=payload.skills,
+                status=status,
+                registered_at=_utcnow(),
+                profile_complete=payload.profile_complete,
+            )
 
-        record = self._repository.insert(participant)
+            seats.change(registered_delta(None, status.value))
+            record = self._repository.insert(participant)
         return Participant.parse_obj(record)
 
     def approve_participant(
@@ -109,19 +145,24 @@ class ParticipantsService:
         event = self._require_event(event_id)
         self._assert_event_access(user, event)
 
-        participant = self._require_participant(participant_id)
-        if participant.event_id != event_id:
-            raise NotFoundError("Participant not part of this event")
-        if participant.status not in {
-            ParticipantStatus.PENDING,
-            ParticipantStatus.WAITLIST,
-        }:
-            raise ValidationError("Only pending or waitlisted participants can be approved")
-
-        participant.status = ParticipantStatus.APPROVED
-        record = self._repository.update(participant_id, participant)
-        if not record:
-            raise NotFoundError("Participant not found")
+        # Held like a registration so two status changes of one participant
+        # cannot both pass the check below.
+        with self._hold_seats(event_id) as seats:
+            participant = self._require_participant(participant_id)
+            if participant.event_id != event_id:
+                raise NotFoundError("Participant not part of this event")
+            if participant.status not in {
+                ParticipantStatus.PENDING,
+                ParticipantStatus.WAITLIST,
+            }:
+                raise ValidationError("Only pending or waitlisted participants can be approved")
+
+            status = ParticipantStatus.APPROVED
+            seats.change(registered_delta(participant.status.value, status.value))
+            participant.status = status
+            record = self._repository.update(participant_id, participant)
+            if not record:
+                raise NotFoundError("Participant not found")
         return Participant.parse_obj(record)
 
     def reject_participant(
@@ -130,21 +171,24 @@ class ParticipantsService:
         event = self._require_event(event_id)
         self._assert_event_access(user, event)
 
-        participant = self._require_participant(participant_id)
-        if participant.event_id != event_id:
-            raise NotFoundError("Participant not part of this event")
-        if participant.status == ParticipantStatus.REJECTED:
-            raise ValidationError("Participant is already rejected")
-        if participant.status not in {
-            ParticipantStatus.PENDING,
-            ParticipantStatus.WAITLIST,
-        }:
-            raise ValidationError("Only pending or waitlisted participants can be rejected")
-
-        participant.status = ParticipantStatus.REJECTED
-        record = self._repository.update(participant_id, participant)
-        if not record:
-            raise NotFoundError("Participant not found")
+        with self._hold_seats(event_id) as seats:
+            participant = self._require_participant(participant_id)
+            if participant.event_id != event_id:
+                raise NotFoundError("Participant not part of this event")
+            if participant.status == ParticipantStatus.REJECTED:
+                raise ValidationError("Participant is already rejected")
+            if participant.status not in {
+                ParticipantStatus.PENDING,
+                ParticipantStatus.WAITLIST,
+            }:
+                raise ValidationError("Only pending or waitlisted participants can be rejected")
+
+            status = ParticipantStatus.REJECTED
+            seats.change(registered_delta(participant.status.value, status.value))
+            participant.status = status
+            record = self._repository.update(participant_id, participant)
+            if not record:
+                raise NotFoundError("Participant not found")
         return Participant.parse_obj(record)
 
     def export_participants(self, user: User, event_id: str) -> str:
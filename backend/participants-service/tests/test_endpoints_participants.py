@@ -1,5 +1,22 @@
 from __future__ import annotations
 
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from tinydb.storages import MemoryStorage
+
+from participants_service_app.repository import ParticipantsRepository  # type: ignore
+from participants_service_app.schemas import ParticipantRegistration  # type: ignore
+from participants_service_app.service import ParticipantsService  # type: ignore
+from shared.config import Settings
+from shared.event_counters import CounterPublisher
+from shared.database import DatabaseManager
+from shared.event_reader import EventReader
+from shared.errors import ValidationError
+from shared.models import Participant, ParticipantStatus, User, UserRole
+from shared.seats import SeatReservations
+
 
 def _auth_header(token: str) -> dict:
     return {"Authorization": f"Bearer {token}"}
@@ -95,3 +112,143 @@ def test_export_participants(client, token_factory, event_factory):
     )
     assert export.status_code == 200
     assert "text/csv" in export.headers["Content-Type"]
+
+
+def test_registration_counter_follows_participant_status(
+    client, db_manager, token_factory, event_factory
+):
+    event = event_factory(organizer_id="organizer-1", max_participants=2)
+    organizer = _auth_header(token_factory({"sub": "organizer-1", "role": "organizer"}))
+
+    def registered() -> int:
+        client.app.state.counter_publisher.flush()
+        return db_manager.table("events").find_one(id=event.id)["registered_participants"]
+
+    participants = [
+        client.post(
+            f"/api/events/{event.id}/register",
+            json=_registration_payload(suffix),
+            headers=_auth_header(token_factory({"sub": f"user-{suffix}", "role": "user"})),
+        ).json()
+        for suffix in "ABC"
+    ]
+    assert [p["status"] for p in participants] == ["pending", "pending", "waitlist"]
+    assert registered() == 2
+
+    base = f"/api/events/{event.id}/participants"
+    client.post(f"{base}/{participants[0]['id']}/approve", headers=organizer)
+    assert registered() == 2
+    client.post(f"{base}/{participants[1]['id']}/reject", headers=organizer)
+    assert registered() == 1
+    client.post(f"{base}/{participants[2]['id']}/approve", headers=organizer)
+    assert registered() == 2
+
+
+def test_counts_are_seeded_from_stored_participants():
+    manager = DatabaseManager(Settings(), storage=MemoryStorage)
+    manager.table("participants").insert_multiple(
+        [
+            {"id": "p-1", "event_id": "e-1", "status": "approved"},
+            {"id": "p-2", "event_id": "e-1", "status": "waitlist"},
+            {"id": "p-3", "event_id": "e-2", "status": "pending"},
+        ]
+    )
+    repository = ParticipantsRepository(manager)
+    assert repository.seed_counts() == 2
+    assert repository.seed_counts() == 0
+    assert [repository.active_count(event_id) for event_id in ("e-1", "e-2", "e-3")] == [1, 1, 0]
+
+
+def test_counter_changes_are_published_when_the_outer_transaction_commits():
+    manager = DatabaseManager(Settings(), storage=MemoryStorage)
+    sent: list = []
+    publisher = CounterPublisher(lambda deltas, batch_id: sent.append(deltas))
+    repository = ParticipantsRepository(manager, publisher)
+
+    def participant(participant_id: str) -> Participant:
+        return Participant(
+            id=participant_id,
+            event_id="e-1",
+            user_id=participant_id,
+            name="Someone",
+            email="someone@example.com",
+            skills=["python"],
+            status=ParticipantStatus.PENDING,
+            registered_at=datetime.now(timezone.utc),
+        )
+
+    try:
+        with repository.transaction():
+            repository.insert(participant("p-1"))
+            raise ValidationError("rolled back")
+    except ValidationError:
+        pass
+    with repository.transaction():
+        repository.insert(participant("p-2"))
+    publisher.close()
+    assert sent == [{"e-1": {"registered_participants": 1}}]
+    assert repository.active_count("e-1") == 1
+
+
+def test_registration_cost_does_not_grow_with_the_event(event_factory):
+    manager = DatabaseManager(Settings(db_instrumentation=True), storage=MemoryStorage)
+    event = event_factory(max_participants=5)
+    manager.table("events").insert(json.loads(event.json()))
+    service = ParticipantsService(ParticipantsRepository(manager), EventReader(manager))
+
+    def cost() -> tuple:
+        metrics = manager.storage_metrics()
+        table = metrics["tables"].get("participants", {})
+        scanned = sum(op["docs_scanned"] for op in table.get("operations", {}).values())
+        transactions = metrics["transactions"]
+        return scanned, transactions["undo_documents"], transactions["table_copies"]
+
+    def register(index: int) -> tuple:
+        before = cost()
+        user = User(id=f"user-{index}", role=UserRole.USER)
+        payload = ParticipantRegistration(**_registration_payload(str(index)))
+        participant = service.register_participant(user, event.id, payload)
+        return participant.status, tuple(after - then for after, then in zip(cost(), before))
+
+    results = [register(index) for index in range(8)]
+    assert [status for status, _ in results] == ["pending"] * 5 + ["waitlist"] * 3
+    # Documents scanned and copied for rollback are the same for every
+    # registration of one outcome after the first, however many came
+    # before, and no whole table is ever copied.
+    assert len({costs for status, costs in results[1:] if status == "pending"}) == 1
+    assert len({costs for status, costs in results[1:] if status == "waitlist"}) == 1
+    assert all(costs[2] == 0 for _, costs in results)
+
+
+def test_concurrent_registrations_keep_capacity_and_uniqueness(event_factory, tmp_path):
+    event = event_factory(max_participants=5)
+    # Two "workers" that never see each other's storage, sharing only the
+    # seat directory.
+    managers = [DatabaseManager(Settings(), storage=MemoryStorage) for _ in range(2)]
+    services = []
+    for manager in managers:
+        manager.table("events").insert(json.loads(event.json()))
+        services.append(
+            ParticipantsService(
+                ParticipantsRepository(manager),
+                EventReader(manager),
+                SeatReservations(tmp_path, timeout=5),
+            )
+        )
+
+    def register(index: int) -> str:
+        # Each user tries three times, through both workers.
+        user = User(id=f"user-{index % 12}", role=UserRole.USER)
+        payload = ParticipantRegistration(**_registration_payload(str(index)))
+        try:
+            return services[index // 12 % 2].register_participant(user, event.id, payload).status
+        except ValidationError:
+            return "duplicate"
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        statuses = list(pool.map(register, range(36)))
+    assert statuses.count("pending") == 5
+    assert statuses.count("waitlist") == 7
+    assert statuses.count("duplicate") == 24
+    counts = [ParticipantsRepository(manager).active_count(event.id) for manager in managers]
+    assert sum(counts) == 5
@@ -1,40 +1,145 @@
 from __future__ import annotations
 
-import json
-from typing import Any, Dict, List, Optional, cast
+from contextlib import contextmanager
+from threading import local
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, cast
 
-from tinydb import Query
+from shared import DatabaseManager, Project, model_to_record
+from shared.event_counters import FORMED_TEAMS, SUBMITTED_PROJECTS, CounterPublisher
+from shared.fieldsets import Fields
+from shared.filters import ListQuery
+from shared.pagination import Page, decode_cursor, page_of
 
-from shared import DatabaseManager, Project
+# Sort key of list pages: creation time, then id to break ties.
+PAGE_ORDER = ("created_at", "id")
+# Projects of a team, to keep the event's formed_teams count.
+TEAM_INDEX = ("event_id", "team_name")
 
 
 class ProjectsRepository:
-    def __init__(self, db_manager: DatabaseManager) -> None:
-        self._table = db_manager.table("projects")
+    def __init__(
+        self, db_manager: DatabaseManager, publisher: Optional[CounterPublisher] = None
+    ) -> None:
+        self._db_manager = db_manager
+        self._table = db_manager.table("projects", indexes=["id", "event_id", TEAM_INDEX])
+        self._cache = db_manager.record_cache
+        self._publisher = publisher
+        # Counter changes of the transaction this thread is in.
+        self._local = local()
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        One storage transaction. The counter changes of the writes inside
+        are published once the outermost one commits, and dropped if it
+        rolls back.
+        """
+        outermost = getattr(self._local, "pending", None) is None
+        if outermost:
+            self._local.pending = []
+        try:
+            with self._db_manager.transaction():
+                yield
+        except BaseException:
+            if outermost:
+                self._local.pending = None
+            raise
+        if outermost:
+            pending: List[Tuple[str, int, int]] = self._local.pending
+            self._local.pending = None
+            if self._publisher is not None:
+                for event_id, projects, teams in pending:
+                    self._publisher.add(
+                        event_id, **{SUBMITTED_PROJECTS: projects, FORMED_TEAMS: teams}
+                    )
 
     def list_by_event(self, event_id: str) -> List[Dict[str, Any]]:
-        records: List[Dict[str, Any]] = [dict(record) for record in self._table.search(Query().event_id == event_id)]
-        return records
+        return [dict(record) for record in self._table.find(event_id=event_id)]
+
+    def list_page(
+        self,
+        event_id: str,
+        *,
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None,
+        query: ListQuery = ListQuery(),
+        fields: Optional[Fields] = None,
+    ) -> Page[Dict[str, Any]]:
+        order_by = query.order_by or PAGE_ORDER
+        records = self._table.find_page(
+            order_by,
+            after=decode_cursor(cursor, order_by),
+            limit=None if limit is None else limit + 1,
+            conditions=query.conditions,
+            event_id=event_id,
+        )
+        return page_of(records, order_by, limit, fields=fields)
+
+    def table_version(self) -> str:
+        return self._db_manager.table_version("projects")
+
+    def count_by_event(self, event_id: str, *, query: ListQuery = ListQuery()) -> int:
+        return self._table.count_where(conditions=query.conditions, event_id=event_id)
 
     def get(self, project_id: str) -> Optional[Dict[str, Any]]:
-        record = self._table.get(Query().id == project_id)
+        return self._cache.get("projects", project_id, lambda: self._load(project_id))
+
+    def get_many(self, project_ids: Sequence[str]) -> List[Optional[Dict[str, Any]]]:
+        """Records for ``project_ids`` in the same order, ``None`` for unknown ids."""
+        return self._cache.get_many("projects", project_ids, self._load_many)
+
+    def _load_many(self, project_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        records = self._table.find_many("id", project_ids)
+        return {record["id"]: dict(cast(Dict[str, Any], record)) for record in records}
+
+    def _load(self, project_id: str) -> Optional[Dict[str, Any]]:
+        record = self._table.find_one(id=project_id)
         if record is None:
             return None
         return dict(cast(Dict[str, Any], record))
 
     def insert(self, project: Project) -> Dict[str, Any]:
-        data: Dict[str, Any] = json.loads(project.json())
-        self._table.insert(data)
+        """Insert the project and count it (and a new team) on its event."""
+        data: Dict[str, Any] = model_to_record(project)
+        with self.transaction():
+            new_team = self._table.find_one(
+                event_id=data["event_id"], team_name=data["team_name"]
+            ) is None
+            self._table.insert(data)
+            self._count(data["event_id"], 1, int(new_team))
+        self._cache.invalidate("projects", data["id"])
         return data
 
     def update(self, project_id: str, project: Project) -> Optional[Dict[str, Any]]:
-        existing = self.get(project_id)
-        if not existing:
+        """
+        Write ``project`` with the stored version plus one. Reading that
+        version in the same transaction keeps concurrent updates from
+        sharing one (and with it one ETag).
+        """
+        data: Dict[str, Any] = model_to_record(project)
+        with self.transaction():
+            previous = self._table.find_one(id=project_id)
+            if previous is not None:
+                data["version"] = int(previous.get("version", 0)) + 1
+                self._table.update_where(data, id=project_id)
+        self._cache.invalidate("projects", project_id)
+        if previous is None:
             return None
-        data: Dict[str, Any] = json.loads(project.json())
-        self._table.update(data, Query().id == project_id)
         return data
 
     def delete(self, project_id: str) -> bool:
-        removed = self._table.remove(Query().id == project_id)
-        return bool(removed)
+        with self.transaction():
+            record = self._table.find_one(id=project_id)
+            if record is not None:
+                self._table.remove_where(id=project_id)
+                last_of_team = self._table.find_one(
+                    event_id=record["event_id"], team_name=record["team_name"]
+                ) is None
+                self._count(record["event_id"], -1, -int(last_of_team))
+        self._cache.invalidate("projects", project_id)
+        return record is not None
+
+    def _count(self, event_id: str, projects: int, teams: int) -> None:
+        # Published when the outermost transaction commits, so the events
+        # service never counts a rolled-back write.
+        self._local.pending.append((event_id, projects, teams))
@@ -1,13 +1,18 @@
 from __future__ import annotations
 
-from typing import List
+from typing import Any, Optional
 
-from fastapi import APIRouter, Depends, Response, status
+from fastapi import APIRouter, Depends, Query, Request, Response, status
 
 from shared import Project, User
+from shared.conditional import make_etag, not_modified
+from shared.executor import StorageExecutor
 from shared.middleware import get_current_user
+from shared.fieldsets import json_response, parse_fields
+from shared.filters import ListQuery
+from shared.pagination import MAX_PAGE_SIZE
 
-from .dependencies import get_projects_service
+from .dependencies import get_list_query, get_projects_service, get_storage_executor
 from .schemas import ProjectCreate, ProjectStatusUpdate, ProjectsListResponse
 from .service import ProjectsService
 
@@ -17,10 +22,35 @@ router = APIRouter(prefix="/api/events/{event_id}/projects", tags=["projects"])
 @router.get("", response_model=ProjectsListResponse)
 async def list_projects(
     event_id: str,
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    query: ListQuery = Depends(get_list_query),
     user: User = Depends(get_current_user),
     service: ProjectsService = Depends(get_projects_service),
-) -> ProjectsListResponse:
-    return service.list_projects(user, event_id)
+    executor: StorageExecutor = Depends(get_storage_executor),
+) -> Any:
+    selected = parse_fields(fields, Project)
+    version = await executor.run(service.projects_version, user, event_id)
+    etag = make_etag(version, request.url.query)
+    unchanged = not_modified(request, etag)
+    if unchanged is not None:
+        return unchanged
+    result = await executor.run(
+        service.list_projects,
+        user,
+        event_id,
+        limit=limit,
+        cursor=cursor,
+        fields=selected,
+        query=query,
+    )
+    if selected is not None:
+        return json_response(result, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return result
 
 
 @router.post("", response_model=Project, status_code=status.HTTP_201_CREATED)
@@ -29,18 +59,35 @@ async def create_project(
     payload: ProjectCreate,
     user: User = Depends(get_current_user),
     service: ProjectsService = Depends(get_projects_service),
+    executor: StorageExecutor = Depends(get_storage_executor),
 ) -> Project:
-    return service.create_project(user, event_id, payload)
+    return await executor.run(service.create_project, user, event_id, payload)
 
 
 @router.get("/{project_id}", response_model=Project)
 async def get_project(
     event_id: str,
     project_id: str,
+    request: Request,
+    response: Response,
+    fields: Optional[str] = None,
     user: User = Depends(get_current_user),
     service: ProjectsService = Depends(get_projects_service),
-) -> Project:
-    return service.get_project(user, event_id, project_id)
+    executor: StorageExecutor = Depends(get_storage_executor),
+) -> Any:
+    selected = parse_fields(fields, Project)
+    version = await executor.run(service.project_version, user, event_id, project_id)
+    etag = make_etag(version, request.url.query)
+    unchanged = not_modified(request, etag)
+    if unchanged is not None:
+        return unchanged
+    result = await executor.run(
+        service.get_project, user, event_id, project_id, fields=selected
+    )
+    if selected is not None:
+        return json_response(result, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return result
 
 
 @router.patch("/{project_id}/status", response_model=Project)
@@ -50,8 +97,9 @@ async def update_project_status(
     payload: ProjectStatusUpdate,
     user: User = Depends(get_current_user),
     service: ProjectsService = Depends(get_projects_service),
+    executor: StorageExecutor = Depends(get_storage_executor),
 ) -> Project:
-    return service.update_status(user, event_id, project_id, payload)
+    return await executor.run(service.update_status, user, event_id, project_id, payload)
 
 
 @router.delete("/{project_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -60,6 +108,7 @@ async def delete_project(
     project_id: str,
     user: User = Depends(get_current_user),
     service: ProjectsService = Depends(get_projects_service),
+    executor: StorageExecutor = Depends(get_storage_executor),
 ) -> Response:
-    service.delete_project(user, event_id, project_id)
+    await executor.run(service.delete_project, user, event_id, project_id)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -24,3 +24,4 @@ class ProjectStatusUpdate(BaseModel):
 class ProjectsListResponse(BaseModel):
     projects: List[Project]
     total: int
+    next_cursor: Optional[str] = None
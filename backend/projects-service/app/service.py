@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
-from typing import List
+from typing import Any, Dict, List, Optional, Union
 from uuid import uuid4
 
 from shared import (
@@ -15,8 +15,10 @@ from shared import (
     UserRole,
     ValidationError,
 )
+from shared.event_reader import EventSource
+from shared.fieldsets import Fields, select_fields
+from shared.filters import ListQuery
 
-from .event_reader import EventReader
 from .repository import ProjectsRepository
 from .schemas import ProjectCreate, ProjectStatusUpdate, ProjectsListResponse
 
@@ -29,7 +31,7 @@ class ProjectsService:
     def __init__(
         self,
         repository: ProjectsRepository,
-        event_reader: EventReader,
+        event_reader: EventSource,
     ) -> None:
         self._repository = repository
         self._event_reader = event_reader
@@ -50,20 +52,71 @@ class ProjectsService:
         if user.role == UserRole.ORGANIZER and event.organizer_id != user.id:
             raise ForbiddenError("Organizers can only manage their own events")
 
-    def list_projects(self, user: User, event_id: str) -> ProjectsListResponse:
+    def projects_version(self, user: User, event_id: str) -> str:
+        """Version token of the event's project list, after the same access checks."""
         event = self._require_event(event_id)
         if user.role == UserRole.ORGANIZER:
             self._assert_event_access(user, event)
+        return f"{event_id}:{self._repository.table_version()}"
 
-        records = self._repository.list_by_event(event_id)
-        projects: List[Project] = [Project.parse_obj(record) for record in records]
-        return ProjectsListResponse(projects=projects, total=len(projects))
+    def project_version(self, user: User, event_id: str, project_id: str) -> str:
+        event = self._require_event(event_id)
+        if user.role == UserRole.ORGANIZER:
+            self._assert_event_access(user, event)
+        record = self._repository.get(project_id)
+        if not record:
+            raise NotFoundError("Project not found")
+        if record.get("event_id") != event_id:
+            raise NotFoundError("Project not associated with this event")
+        return f"{project_id}:{record.get('version', 0)}"
 
-    def get_project(self, user: User, event_id: str, project_id: str) -> Project:
+    def list_projects(
+        self,
+        user: User,
+        event_id: str,
+        *,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        fields: Optional[Fields] = None,
+        query: ListQuery = ListQuery(),
+    ) -> Union[ProjectsListResponse, Dict[str, Any]]:
+        """With ``fields``, the records are returned as plain dicts without validation."""
         event = self._require_event(event_id)
         if user.role == UserRole.ORGANIZER:
             self._assert_event_access(user, event)
 
+        page = self._repository.list_page(
+            event_id, cursor=cursor, limit=limit, query=query, fields=fields
+        )
+        if limit is None and cursor is None:
+            total = len(page.items)
+        else:
+            total = self._repository.count_by_event(event_id, query=query)
+        if fields is not None:
+            return {"projects": page.items, "total": total, "next_cursor": page.next_cursor}
+        projects: List[Project] = [Project.parse_obj(record) for record in page.items]
+        return ProjectsListResponse(projects=projects, total=total, next_cursor=page.next_cursor)
+
+    def get_project(
+        self,
+        user: User,
+        event_id: str,
+        project_id: str,
+        *,
+        fields: Optional[Fields] = None,
+    ) -> Union[Project, Dict[str, Any]]:
+        event = self._require_event(event_id)
+        if user.role == UserRole.ORGANIZER:
+            self._assert_event_access(user, event)
+
+        if fields is not None:
+            record = self._repository.get(project_id)
+            if not record:
+                raise NotFoundError("Project not found")
+            if record.get("event_id") != event_id:
+                raise NotFoundError("Project not associated with this event")
+            return select_fields(record, fields)
+
         project = self._require_project(project_id)
         if project.event_id != event_id:
             raise NotFoundError("Project not associated with this event")
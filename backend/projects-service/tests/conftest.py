@@ -28,10 +28,11 @@ if PACKAGE_NAME not in sys.modules:
 
 from projects_service_app import create_app  # type: ignore
 from projects_service_app.dependencies import DependencyBundle  # type: ignore
-from projects_service_app.event_reader import EventReader  # type: ignore
 from shared import Event, EventStatus
 from shared.config import get_settings
 from shared.database import DatabaseManager
+from shared.event_counters import CounterPublisher, EventCounters
+from shared.event_reader import EventReader
 
 
 @pytest.fixture()
@@ -50,6 +51,8 @@ def client(db_manager: DatabaseManager) -> Generator[TestClient, None, None]:
     bundle = DependencyBundle(
         db_manager=db_manager,
         event_reader=EventReader(db_manager),
+        # Stands in for the events service, which shares the test storage.
+        counter_publisher=CounterPublisher(EventCounters(db_manager).apply),
     )
     app = create_app(bundle)
     with TestClient(app) as test_client:
@@ -1,6 +1,9 @@
 from __future__ import annotations
 
-from shared.models import ProjectStatus
+from projects_service_app.repository import ProjectsRepository  # type: ignore
+from shared.errors import ValidationError
+from shared.event_counters import CounterPublisher
+from shared.models import Project, ProjectStatus
 
 
 def _auth_header(token: str) -> dict:
@@ -57,6 +60,19 @@ def test_get_project_details(client, token_factory, event_factory):
     assert detail.status_code == 200
     assert detail.json()["id"] == created["id"]
 
+    sparse = client.get(
+        f"/api/events/{event.id}/projects/{created['id']}",
+        params={"fields": "title,status"},
+        headers=_auth_header(token),
+    )
+    assert sparse.json() == {"id": created["id"], "title": "Project A", "status": "submitted"}
+    listed = client.get(
+        f"/api/events/{event.id}/projects",
+        params={"fields": "team_name"},
+        headers=_auth_header(token),
+    ).json()
+    assert listed["projects"] == [{"id": created["id"], "team_name": "Team Alpha"}]
+
 
 def test_update_project_status(client, token_factory, event_factory):
     event = event_factory(organizer_id="organizer-1")
@@ -95,3 +111,109 @@ def test_delete_project(client, token_factory, event_factory):
     )
     assert delete_response.status_code == 204
 
+
+def test_conditional_get_of_projects(client, token_factory, event_factory):
+    event = event_factory(organizer_id="organizer-1")
+    organizer_token = token_factory({"sub": "organizer-1", "role": "organizer"})
+    user_token = token_factory({"sub": "user-123", "role": "user"})
+    project = client.post(
+        f"/api/events/{event.id}/projects",
+        json=_project_payload(),
+        headers=_auth_header(user_token),
+    ).json()
+    assert project["version"] == 0
+
+    list_url = f"/api/events/{event.id}/projects"
+    detail_url = f"{list_url}/{project['id']}"
+    listed = client.get(list_url, headers=_auth_header(user_token))
+    detail = client.get(detail_url, headers=_auth_header(user_token))
+    for url, response in ((list_url, listed), (detail_url, detail)):
+        etag = response.headers["ETag"]
+        cached = client.get(url, headers={**_auth_header(user_token), "If-None-Match": etag})
+        assert cached.status_code == 304
+        assert cached.headers["ETag"] == etag
+
+    updated = client.patch(
+        f"{detail_url}/status",
+        json={"status": "approved"},
+        headers=_auth_header(organizer_token),
+    )
+    assert updated.json()["version"] == 1
+    for url, response in ((list_url, listed), (detail_url, detail)):
+        etag = response.headers["ETag"]
+        fresh = client.get(url, headers={**_auth_header(user_token), "If-None-Match": etag})
+        assert fresh.status_code == 200
+        assert fresh.headers["ETag"] != etag
+
+
+def test_updates_from_a_stale_read_get_distinct_versions(
+    client, db_manager, token_factory, event_factory
+):
+    event = event_factory()
+    token = token_factory({"sub": "user-123", "role": "user"})
+    created = client.post(
+        f"/api/events/{event.id}/projects",
+        json=_project_payload(),
+        headers=_auth_header(token),
+    ).json()
+
+    repository = ProjectsRepository(db_manager)
+    stale = Project.parse_obj(repository.get(created["id"]))
+    first = repository.update(stale.id, stale.copy(update={"progress": 50}))
+    second = repository.update(stale.id, stale.copy(update={"progress": 75}))
+    assert (first["version"], second["version"]) == (1, 2)
+    assert repository.get(stale.id)["version"] == 2
+
+
+def test_project_counters_on_the_event(client, db_manager, token_factory, event_factory):
+    event = event_factory(organizer_id="organizer-1")
+    organizer = _auth_header(token_factory({"sub": "organizer-1", "role": "organizer"}))
+    user = _auth_header(token_factory({"sub": "user-123", "role": "user"}))
+
+    def counters() -> tuple:
+        client.app.state.counter_publisher.flush()
+        record = db_manager.table("events").find_one(id=event.id)
+        return record["submitted_projects"], record["formed_teams"]
+
+    ids = [
+        client.post(
+            f"/api/events/{event.id}/projects",
+            json={**_project_payload(), "team_name": team},
+            headers=user,
+        ).json()["id"]
+        for team in ("Team Alpha", "Team Alpha", "Team Beta")
+    ]
+    assert counters() == (3, 2)
+
+    client.delete(f"/api/events/{event.id}/projects/{ids[0]}", headers=organizer)
+    assert counters() == (2, 2)
+    client.delete(f"/api/events/{event.id}/projects/{ids[2]}", headers=organizer)
+    assert counters() == (1, 1)
+
+
+def test_counter_changes_are_published_when_the_outer_transaction_commits(
+    client, db_manager, token_factory, event_factory
+):
+    event = event_factory()
+    token = token_factory({"sub": "user-123", "role": "user"})
+    created = client.post(
+        f"/api/events/{event.id}/projects",
+        json=_project_payload(),
+        headers=_auth_header(token),
+    ).json()
+    project = Project.parse_obj(created)
+
+    sent: list = []
+    publisher = CounterPublisher(lambda deltas, batch_id: sent.append(deltas))
+    repository = ProjectsRepository(db_manager, publisher)
+    try:
+        with repository.transaction():
+            repository.delete(project.id)
+            raise ValidationError("rolled back")
+    except ValidationError:
+        pass
+    assert repository.get(project.id) is not None
+    with repository.transaction():
+        repository.insert(project.copy(update={"id": "p-2", "team_name": "Team Beta"}))
+    publisher.close()
+    assert sent == [{event.id: {"submitted_projects": 1, "formed_teams": 1}}]
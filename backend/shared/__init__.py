@@ -8,6 +8,7 @@ from .errors import (  # noqa: F401
     ForbiddenError,
     NotFoundError,
     ServiceError,
+    ServiceUnavailableError,
     UnauthorizedError,
     ValidationError,
     register_exception_handlers,
@@ -26,6 +27,7 @@ from .models import (  # noqa: F401
     User,
     UserRole,
 )
+from .serialization import model_to_record  # noqa: F401
 
 __all__ = [
     "DatabaseManager",
@@ -40,6 +42,7 @@ __all__ = [
     "Project",
     "ProjectStatus",
     "ServiceError",
+    "ServiceUnavailableError",
     "Settings",
     "UnauthorizedError",
     "User",
@@ -48,6 +51,7 @@ __all__ = [
     "decode_jwt",
     "get_current_user",
     "get_settings",
+    "model_to_record",
     "register_exception_handlers",
     "require_role",
 ]
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Dict, Hashable, List, Mapping, Optional, Sequence, Tuple, TypeVar
+
+Record = Dict[str, Any]
+K = TypeVar("K", bound=Hashable)
+
+
+class RecordCache:
+    """
+    Bounded LRU cache of records keyed by table and id.
+
+    Repositories read point lookups through :meth:`get` and call
+    :meth:`invalidate` for every id they write. ``refresh`` runs before each
+    lookup so changes reloaded from other processes drop the affected tables
+    first. Callers get shallow copies, like the repositories' own ``dict()``
+    copies. ``max_entries=0`` disables caching but still counts misses.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        *,
+        refresh: Optional[Callable[[], None]] = None,
+    ) -> None:
+        self.max_entries = max(0, max_entries)
+        self._refresh = refresh
+        self._lock = Lock()
+        self._entries: "OrderedDict[Tuple[str, Hashable], Record]" = OrderedDict()
+        # Bumped on every invalidation; a load that raced with one is not stored.
+        self._epoch = 0
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+        self._evictions = 0
+
+    def get(
+        self, table: str, key: Hashable, load: Callable[[], Optional[Record]]
+    ) -> Optional[Record]:
+        """Cached record for ``key``, calling ``load`` on a miss. ``None`` is not cached."""
+        if self._refresh is not None:
+            self._refresh()
+        with self._lock:
+            record = self._entries.get((table, key))
+            if record is not None:
+                self._entries.move_to_end((table, key))
+                self._hits += 1
+                return dict(record)
+            self._misses += 1
+            epoch = self._epoch
+        loaded = load()
+        if loaded is None or not self.max_entries:
+            return loaded
+        with self._lock:
+            if self._epoch == epoch:
+                self._store(table, key, loaded)
+        return loaded
+
+    def get_many(
+        self,
+        table: str,
+        keys: Sequence[K],
+        load_many: Callable[[List[K]], Mapping[K, Record]],
+    ) -> List[Optional[Record]]:
+        """
+        Records for ``keys`` in the same order (``None`` where missing). The
+        misses are loaded with a single ``load_many`` call, which returns the
+        records it found keyed by their key.
+        """
+        if self._refresh is not None:
+            self._refresh()
+        found: Dict[K, Record] = {}
+        with self._lock:
+            for key in keys:
+                record = self._entries.get((table, key))
+                if record is not None:
+                    self._entries.move_to_end((table, key))
+                    found[key] = record
+            missing = list(dict.fromkeys(key for key in keys if key not in found))
+            self._hits += len(keys) - len(missing)
+            self._misses += len(missing)
+            epoch = self._epoch
+        if missing:
+            loaded = load_many(missing)
+            found.update(loaded)
+            if loaded and self.max_entries:
+                with self._lock:
+                    if self._epoch == epoch:
+                        for key, record in loaded.items():
+                            self._store(table, key, record)
+        return [dict(found[key]) if key in found else None for key in keys]
+
+    def invalidate(self, table: str, key: Optional[Hashable] = None) -> None:
+        """Drop ``key`` from ``table``, or the whole table when ``key`` is ``None``."""
+        with self._lock:
+            self._epoch += 1
+            self._invalidations += 1
+            if key is not None:
+                self._entries.pop((table, key), None)
+                return
+            for cached in [cached for cached in self._entries if cached[0] == table]:
+                del self._entries[cached]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+
+    def _store(self, table: str, key: Hashable, record: Record) -> None:
+        self._entries[(table, key)] = dict(record)
+        self._entries.move_to_end((table, key))
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "max_entries": self.max_entries,
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / lookups, 3) if lookups else 0.0,
+                "invalidations": self._invalidations,
+                "evictions": self._evictions,
+            }
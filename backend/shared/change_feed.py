@@ -0,0 +1,135 @@
+"""
+Append-only change logs that other services replicate from.
+
+A :class:`ChangeLog` stores one document per write to the table it follows,
+holding the operation and the full record after the write; counter
+changes (``OP_COUNTERS``) only hold the record's key and the counters, as
+they are written for every batch of registrations and projects. The log is never
+deleted from, so its document ids are assigned in order without gaps and
+double as sequence numbers: :meth:`ChangeLog.read` fetches documents
+``since + 1 ...`` by id instead of scanning the log.
+
+Sequence numbers only mean something within one history of the log, its
+epoch. Writing change 1 (a new database, or a log that was emptied and
+reseeded) starts a new epoch. Reads report the epoch and the log's ``head``
+sequence, and consumers start over from ``since=0`` when the epoch changes
+or ``head`` falls behind the sequence they hold (a restored backup).
+
+Producers expose ``read`` over HTTP (``GET /internal/events/changes``);
+consumers pull it through :class:`HttpChangeFeed`, or call ``read`` directly
+when they share the storage.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Mapping, Optional, cast
+from uuid import uuid4
+
+import httpx
+
+from .database import DatabaseManager
+from .errors import ServiceUnavailableError
+from .middleware import SERVICE_TOKEN_HEADER
+
+OP_INSERT = "insert"
+OP_UPDATE = "update"
+OP_STATUS = "status"
+OP_DELETE = "delete"
+# Only counter fields changed: ``record`` holds the key and their new values.
+OP_COUNTERS = "counters"
+
+# Changes returned per read unless the caller asks for fewer.
+DEFAULT_BATCH = 500
+
+# Change log of the ``events`` table, served as ``GET /internal/events/changes``.
+EVENT_CHANGES_TABLE = "event_changes"
+
+# Current epoch of every change log, keyed by the log's table name.
+EPOCHS_TABLE = "change_log_epochs"
+
+# ``read(since, limit)``: {"epoch": str, "head": int, "changes": [...],
+# "last_seq": int, "has_more": bool}
+ChangeFeed = Callable[[int, int], Mapping[str, Any]]
+
+
+class ChangeLog:
+    """Change log of the records keyed by ``key_field``, stored in table ``name``."""
+
+    def __init__(self, db_manager: DatabaseManager, name: str, *, key_field: str = "id") -> None:
+        self._db_manager = db_manager
+        self._name = name
+        self._table = db_manager.table(name)
+        self._epochs = db_manager.table(EPOCHS_TABLE, indexes=["log"])
+        self._key_field = key_field
+
+    def append(self, op: str, record: Mapping[str, Any]) -> int:
+        """Record ``op`` on ``record``; returns its sequence number. Call it in the write's transaction."""
+        with self._db_manager.transaction():
+            seq = self._table.insert(
+                {
+                    "key": record[self._key_field],
+                    "op": op,
+                    "record": dict(record),
+                    "recorded_at": datetime.now(timezone.utc).isoformat(),
+                }
+            )
+            if seq == 1:
+                self._new_epoch()
+        return seq
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    @property
+    def epoch(self) -> str:
+        """Id of the log's current history."""
+        record = self._epochs.find_one(log=self._name)
+        if record is not None:
+            return str(record["epoch"])
+        with self._db_manager.transaction():
+            record = self._epochs.find_one(log=self._name)
+            return str(record["epoch"]) if record is not None else self._new_epoch()
+
+    def read(self, since: int = 0, limit: int = DEFAULT_BATCH) -> Dict[str, Any]:
+        """Up to ``limit`` changes with a sequence number above ``since``, oldest first."""
+        epoch = self.epoch
+        documents = cast(List[Any], self._table.get(doc_ids=list(range(since + 1, since + limit + 2))))
+        documents.sort(key=lambda document: document.doc_id)
+        changes = [{"seq": document.doc_id, **document} for document in documents[:limit]]
+        return {
+            "epoch": epoch,
+            "head": len(self._table),
+            "changes": changes,
+            "last_seq": changes[-1]["seq"] if changes else since,
+            "has_more": len(documents) > limit,
+        }
+
+    def _new_epoch(self) -> str:
+        epoch = uuid4().hex
+        if not self._epochs.update_where({"epoch": epoch}, log=self._name):
+            self._epochs.insert({"log": self._name, "epoch": epoch})
+        return epoch
+
+
+class HttpChangeFeed:
+    """
+    Reads a producer's change log over HTTP, e.g. ``<events service>/internal/events/changes``,
+    presenting ``token`` as the service credential.
+    """
+
+    def __init__(self, url: str, *, token: Optional[str] = None, timeout: float = 5.0) -> None:
+        self._url = url
+        headers = {SERVICE_TOKEN_HEADER: token} if token is not None else None
+        self._client = httpx.Client(timeout=timeout, headers=headers)
+
+    def __call__(self, since: int, limit: int) -> Mapping[str, Any]:
+        try:
+            response = self._client.get(self._url, params={"since": since, "limit": limit})
+            response.raise_for_status()
+        except httpx.HTTPError as exc:
+            raise ServiceUnavailableError(f"Change feed unavailable: {exc}") from exc
+        return cast(Mapping[str, Any], response.json())
+
+    def close(self) -> None:
+        self._client.close()
@@ -0,0 +1,240 @@
+"""
+Compact on-disk formats for TinyDB data.
+
+``CompactStorage`` stores the database as MessagePack or as a column-per-field
+JSON layout, optionally compressed with gzip or zstd. Existing ``db.json``
+files are converted losslessly with :func:`convert`, also available as::
+
+    python -m shared.compact data/db.json data/db.msgpack.zst --format msgpack --compression zstd
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from tinydb.storages import Storage
+
+from .serialization import dumps, loads
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None  # type: ignore[assignment]
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+Tables = Dict[str, Dict[str, Dict[str, Any]]]
+
+FORMAT_JSON = "json"
+FORMAT_MSGPACK = "msgpack"
+FORMAT_COLUMNAR = "columnar"
+FORMATS = (FORMAT_JSON, FORMAT_MSGPACK, FORMAT_COLUMNAR)
+
+COMPRESSION_NONE = "none"
+COMPRESSION_GZIP = "gzip"
+COMPRESSION_ZSTD = "zstd"
+COMPRESSIONS = (COMPRESSION_NONE, COMPRESSION_GZIP, COMPRESSION_ZSTD)
+
+_FORMAT_SUFFIXES = {
+    FORMAT_JSON: ".json",
+    FORMAT_MSGPACK: ".msgpack",
+    FORMAT_COLUMNAR: ".columnar.json",
+}
+_COMPRESSION_SUFFIXES = {
+    COMPRESSION_NONE: "",
+    COMPRESSION_GZIP: ".gz",
+    COMPRESSION_ZSTD: ".zst",
+}
+
+
+def check_format(format: str, compression: str) -> None:
+    """Raise ``ValueError`` for unknown or unavailable format options."""
+    if format not in FORMATS:
+        raise ValueError(f"Unsupported database format: {format}")
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unsupported database compression: {compression}")
+    if format == FORMAT_MSGPACK and msgpack is None:
+        raise ValueError("DB_FORMAT=msgpack requires the 'msgpack' package")
+    if compression == COMPRESSION_ZSTD and zstandard is None:
+        raise ValueError("DB_COMPRESSION=zstd requires the 'zstandard' package")
+
+
+def storage_path(path: Union[str, Path], format: str, compression: str) -> Path:
+    """Data file for ``format``/``compression`` next to the JSON ``path``."""
+    path = Path(path)
+    stem = path.name[: -len(path.suffix)] if path.suffix else path.name
+    suffix = _FORMAT_SUFFIXES[format] + _COMPRESSION_SUFFIXES[compression]
+    return path.with_name(stem + suffix)
+
+
+# Column layout
+def to_columns(data: Tables) -> Dict[str, Any]:
+    """
+    Store each table as one list per field instead of one dict per document.
+
+    ``missing`` lists the rows that lack a field, so absent fields and
+    ``None`` values survive the round trip.
+    """
+    tables: Dict[str, Any] = {}
+    for name, table in data.items():
+        documents = list(table.values())
+        fields = dict.fromkeys(field for document in documents for field in document)
+        columns: Dict[str, List[Any]] = {}
+        missing: Dict[str, List[int]] = {}
+        for field in fields:
+            column = columns[field] = []
+            for row, document in enumerate(documents):
+                if field in document:
+                    column.append(document[field])
+                else:
+                    column.append(None)
+                    missing.setdefault(field, []).append(row)
+        encoded: Dict[str, Any] = {"ids": list(table), "columns": columns}
+        if missing:
+            encoded["missing"] = missing
+        tables[name] = encoded
+    return {"layout": FORMAT_COLUMNAR, "version": 1, "tables": tables}
+
+
+def from_columns(encoded: Dict[str, Any]) -> Tables:
+    data: Tables = {}
+    for name, table in encoded.get("tables", {}).items():
+        ids = table["ids"]
+        documents: List[Dict[str, Any]] = [{} for _ in ids]
+        missing = table.get("missing", {})
+        for field, column in table["columns"].items():
+            absent = set(missing.get(field, ()))
+            for row, value in enumerate(column):
+                if row not in absent:
+                    documents[row][field] = value
+        data[name] = dict(zip(ids, documents))
+    return data
+
+
+# Encoding
+def encode(data: Tables, format: str, compression: str) -> bytes:
+    if format == FORMAT_MSGPACK:
+        raw = msgpack.packb(data, use_bin_type=True)
+    elif format == FORMAT_COLUMNAR:
+        raw = dumps(to_columns(data)).encode("utf-8")
+    else:
+        raw = dumps(data).encode("utf-8")
+    if compression == COMPRESSION_GZIP:
+        return gzip.compress(raw, compresslevel=6)
+    if compression == COMPRESSION_ZSTD:
+        return zstandard.ZstdCompressor(level=3).compress(raw)
+    return raw
+
+
+def decode(raw: bytes, format: str, compression: str) -> Tables:
+    if compression == COMPRESSION_GZIP:
+        raw = gzip.decompress(raw)
+    elif compression == COMPRESSION_ZSTD:
+        raw = zstandard.ZstdDecompressor().decompress(raw)
+    if format == FORMAT_MSGPACK:
+        return msgpack.unpackb(raw, raw=False, strict_map_key=False)
+    if format == FORMAT_COLUMNAR:
+        return from_columns(loads(raw))
+    return loads(raw)
+
+
+class CompactStorage(Storage):
+    """
+    TinyDB storage for the compact formats.
+
+    The whole file is rewritten on each ``write`` through a temporary file
+    and ``os.replace``, so readers never see a half-written compressed file.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        *,
+        format: str = FORMAT_MSGPACK,
+        compression: str = COMPRESSION_NONE,
+    ) -> None:
+        super().__init__()
+        check_format(format, compression)
+        self._path = Path(path)
+        self._format = format
+        self._compression = compression
+
+    def read(self) -> Optional[Tables]:
+        try:
+            raw = self._path.read_bytes()
+        except FileNotFoundError:
+            return None
+        if not raw:
+            return None
+        return decode(raw, self._format, self._compression)
+
+    def write(self, data: Tables) -> None:
+        payload = encode(data, self._format, self._compression)
+        temporary = self._path.with_name(self._path.name + ".tmp")
+        with open(temporary, "wb") as handle:
+            handle.write(payload)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temporary, self._path)
+
+
+def convert(
+    source: Union[str, Path],
+    target: Union[str, Path],
+    *,
+    format: str,
+    compression: str = COMPRESSION_NONE,
+) -> None:
+    """
+    Convert a ``db.json`` file to ``format``/``compression`` at ``target``.
+
+    The result is decoded again and compared with the source before it
+    replaces ``target``; a mismatch raises ``ValueError`` and leaves no file.
+    """
+    check_format(format, compression)
+    source = Path(source)
+    target = Path(target)
+    text = source.read_text(encoding="utf-8")
+    data: Tables = loads(text) if text.strip() else {}
+    payload = encode(data, format, compression)
+    if decode(payload, format, compression) != data:
+        raise ValueError(f"Converting {source} to {format} is not lossless")
+    temporary = target.with_name(target.name + ".tmp")
+    with open(temporary, "wb") as handle:
+        handle.write(payload)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(temporary, target)
+    logger.info(
+        "Converted %s (%d bytes) to %s (%d bytes)",
+        source,
+        len(text.encode("utf-8")),
+        target,
+        len(payload),
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Convert a TinyDB JSON file to a compact format.")
+    parser.add_argument("source", help="existing db.json")
+    parser.add_argument("target", nargs="?", help="output file (default: next to source)")
+    parser.add_argument("--format", choices=FORMATS, default=FORMAT_MSGPACK)
+    parser.add_argument("--compression", choices=COMPRESSIONS, default=COMPRESSION_NONE)
+    args = parser.parse_args(argv)
+    target = args.target or storage_path(args.source, args.format, args.compression)
+    convert(args.source, target, format=args.format, compression=args.compression)
+    print(target)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Conditional GETs: ``ETag`` headers and ``304 Not Modified`` responses.
+
+Routes ask the service for a cheap version token first (a record's
+``updated_at``/``version`` or :meth:`DatabaseManager.table_version`), build
+the tag with :func:`make_etag` and answer a matching ``If-None-Match`` with
+:func:`not_modified` before the payload is loaded or serialized.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from typing import Any, Optional
+
+from fastapi import Request, Response
+
+
+def make_etag(*parts: Any) -> str:
+    """Weak entity tag derived from ``parts``; include anything the body depends on."""
+    raw = "\x1f".join(str(part) for part in parts).encode("utf-8")
+    return f'W/"{hashlib.blake2b(raw, digest_size=12).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of ``etag`` against an ``If-None-Match`` header value."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """A ``304`` response when the request already holds ``etag``, otherwise ``None``."""
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return None
@@ -16,12 +16,55 @@ except Exception:  # Fallback to Pydantic v1
     _USES_PYDANTIC_V2 = False
 
 
+# Development default; must be overridden anywhere the services are reachable.
+DEFAULT_JWT_SECRET = "dev-secret-key"
+
+
 class Settings(_BaseSettings):
     """Global settings shared between services."""
 
-    jwt_secret: str = Field("dev-secret-key", env="JWT_SECRET")
+    jwt_secret: str = Field(DEFAULT_JWT_SECRET, env="JWT_SECRET")
     jwt_algorithm: str = Field("HS256", env="JWT_ALGORITHM")
     db_path: str = Field("./data/db.json", env="DB_PATH")
+    # Storage engine behind DatabaseManager: "tinydb" (JSON file) or "sqlite"
+    db_backend: str = Field("tinydb", env="DB_BACKEND")
+    # One file per table next to db_path instead of a single JSON file
+    db_shard_tables: bool = Field(False, env="DB_SHARD_TABLES")
+    # On-disk encoding: "json", "msgpack" or "columnar"; "none", "gzip" or "zstd"
+    db_format: str = Field("json", env="DB_FORMAT")
+    db_compression: str = Field("none", env="DB_COMPRESSION")
+    # Append-only journal instead of whole-file rewrites (TinyDB backend only)
+    db_journal: bool = Field(False, env="DB_JOURNAL")
+    db_journal_compact_bytes: int = Field(4 * 1024 * 1024, env="DB_JOURNAL_COMPACT_BYTES")
+    db_journal_fsync: bool = Field(False, env="DB_JOURNAL_FSYNC")
+    # Write-behind flushing of the JSON file: whichever bound is hit first
+    db_flush_max_delay: float = Field(1.0, env="DB_FLUSH_MAX_DELAY")
+    db_flush_max_dirty: int = Field(1000, env="DB_FLUSH_MAX_DIRTY")
+    # Seconds between checks for changes made by other processes (<0 disables)
+    db_reload_interval: float = Field(1.0, env="DB_RELOAD_INTERVAL")
+    # One process owns the data file; other workers talk to it over a Unix socket
+    db_single_writer: bool = Field(False, env="DB_SINGLE_WRITER")
+    db_writer_socket: str = Field("", env="DB_WRITER_SOCKET")
+    # LRU of repository point lookups by id (0 disables; off for sqlite and single-writer)
+    db_record_cache_size: int = Field(1024, env="DB_RECORD_CACHE_SIZE")
+    # Parsed events kept by shared.event_reader.EventReader; seconds of staleness (0 disables)
+    event_cache_size: int = Field(512, env="EVENT_CACHE_SIZE")
+    event_cache_ttl: float = Field(5.0, env="EVENT_CACHE_TTL")
+    # Where other services read events: "storage" (shared data file) or "replica"
+    # (in-memory copy fed by the events service's /internal/events/changes)
+    event_source: str = Field("storage", env="EVENT_SOURCE")
+    events_service_url: str = Field("http://localhost:8002", env="EVENTS_SERVICE_URL")
+    event_replica_poll_interval: float = Field(1.0, env="EVENT_REPLICA_POLL_INTERVAL")
+    # Registrations hold a per-event seat reservation; a directory shared by the
+    # workers extends it across processes. Waits longer than the timeout get a 503.
+    registration_lock_dir: str = Field("", env="REGISTRATION_LOCK_DIR")
+    registration_lock_timeout: float = Field(0.5, env="REGISTRATION_LOCK_TIMEOUT")
+    # Per-table operation counters at /internal/metrics/storage
+    db_instrumentation: bool = Field(False, env="DB_INSTRUMENTATION")
+    db_slow_op_ms: float = Field(50.0, env="DB_SLOW_OP_MS")
+    # Thread pool that runs storage work off the event loop (queue 0 = unbounded)
+    storage_workers: int = Field(4, env="STORAGE_WORKERS")
+    storage_max_queue: int = Field(256, env="STORAGE_MAX_QUEUE")
     service_name: str = Field("service", env="SERVICE_NAME")
     log_level: str = Field("INFO", env="LOG_LEVEL")
     port: int = Field(8000, env="PORT")
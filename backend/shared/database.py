@@ -1,15 +1,68 @@
 from __future__ import annotations
 
+import hashlib
+import logging
+import os
+import re
+import uuid
+from contextlib import contextmanager
 from pathlib import Path
-from threading import Lock
-from typing import Optional, Type
+from threading import Lock, RLock
+from time import monotonic, sleep
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Type,
+    Union,
+    cast,
+)
 
 from tinydb import TinyDB
-from tinydb.middlewares import CachingMiddleware
-from tinydb.storages import JSONStorage, Storage
-from tinydb.table import Table
+from tinydb.storages import Storage
 
-from .config import Settings
+from .cache import RecordCache
+from .compact import (
+    COMPRESSION_NONE,
+    FORMAT_JSON,
+    CompactStorage,
+    check_format,
+    convert,
+    storage_path,
+)
+from .config import DEFAULT_JWT_SECRET, Settings
+from .errors import ServiceUnavailableError
+from .flush import WriteBehindMiddleware
+from .indexing import IndexedTable, UndoLog, normalize_index
+from .instrumentation import InstrumentedTable, StorageMetrics
+from .journal import JournalStorage
+from .observers import Change, Observer, ObserverRegistry
+from .serialization import FastJSONStorage, dumps, loads
+from .sqlite_backend import SQLiteDatabase, SQLiteTable
+from .writer import (
+    OwnerUnavailableError,
+    RemoteTable,
+    StorageClient,
+    StorageServer,
+    socket_address,
+    try_lock,
+)
+
+logger = logging.getLogger(__name__)
+
+BACKEND_TINYDB = "tinydb"
+BACKEND_SQLITE = "sqlite"
+
+_SHARD_NAME = re.compile(r"^[A-Za-z0-9_-]+$")
+
+# How long a worker keeps retrying while the single-writer owner starts up.
+_OWNER_RETRIES = 50
+_OWNER_RETRY_DELAY = 0.1
 
 
 class DatabaseManager:
@@ -18,6 +71,36 @@ class DatabaseManager:
 
     Services should create a single instance on startup and reuse it across
     requests. Tests can instantiate the manager with an in-memory storage.
+    Setting ``DB_BACKEND=sqlite`` swaps the JSON file for an indexed SQLite
+    database exposing the same ``table()`` API, and ``DB_JOURNAL=true``
+    keeps TinyDB but persists writes through :class:`JournalStorage`.
+
+    With ``DB_SHARD_TABLES=true`` every TinyDB table lives in its own file
+    next to ``DB_PATH`` (``db.events.json`` for ``db.json``), opened on the
+    first ``table(name)`` call. A missing shard is seeded from the table in
+    the single-file database, if there is one.
+
+    ``DB_FORMAT``/``DB_COMPRESSION`` select a :class:`CompactStorage` file
+    (``db.msgpack.zst`` and so on), converted from ``db.json`` on first use.
+
+    TinyDB tables are wrapped in :class:`IndexedTable`; callers declare the
+    fields they look up by through ``table(name, indexes=...)``.
+
+    Several services open the same JSON file. Table operations check the
+    file for changes made by other processes at most once every
+    ``DB_RELOAD_INTERVAL`` seconds and reload only the tables that changed;
+    :meth:`generation` counts those reloads per table.
+
+    :attr:`record_cache` caches repository point lookups; reloads and
+    transaction rollbacks drop the affected tables from it.
+
+    :meth:`observe` registers callbacks for the writes this process commits
+    to a table; see :mod:`shared.observers`.
+
+    With ``DB_SINGLE_WRITER=true`` the first process to lock ``<DB_PATH>.lock``
+    owns the storage and serves the others over a Unix socket; their
+    ``table()`` handles forward each call to the owner. If the owner exits, the
+    next worker that cannot reach it takes the lock over.
     """
 
     _lock = Lock()
@@ -32,28 +115,540 @@ class DatabaseManager:
         self._settings = settings
         self._storage_class = storage
         self._path_override = path_override
-        self._db = self._create_db()
-
-    def _create_db(self) -> TinyDB:
-        if self._storage_class:
-            return TinyDB(storage=self._storage_class)
+        self._table_lock = RLock()
+        self._tables: Dict[str, IndexedTable] = {}
+        # Write-behind storages keyed by shard name ("" for the single file).
+        self._write_behinds: Dict[str, WriteBehindMiddleware] = {}
+        self._shards: Dict[str, TinyDB] = {}
+        self._legacy_tables: Optional[Dict[str, Any]] = None
+        self._generations: Dict[str, int] = {}
+        # Writes per table in this process; see table_version().
+        self._writes: Dict[str, int] = {}
+        self._instance = uuid.uuid4().hex[:12]
+        # Undo logs of the tables the open transaction wrote, for rollback.
+        self._transaction: Optional[Dict[str, UndoLog]] = None
+        self._transaction_stats = {
+            "committed": 0,
+            "rolled_back": 0,
+            "undo_documents": 0,
+            "table_copies": 0,
+        }
+        # Changes made by the open transaction, published once it commits.
+        self._pending_changes: Optional[List[Change]] = None
+        self._observers = ObserverRegistry()
+        self._last_reload_check = monotonic()
+        self._metrics: Optional[StorageMetrics] = (
+            StorageMetrics(settings.db_slow_op_ms) if settings.db_instrumentation else None
+        )
+        self._sharded = (
+            storage is None
+            and settings.db_shard_tables
+            and settings.db_backend.lower() == BACKEND_TINYDB
+        )
+        self._format = settings.db_format.lower()
+        self._compression = settings.db_compression.lower()
+        self._compact = (self._format, self._compression) != (FORMAT_JSON, COMPRESSION_NONE)
+        if storage is None and self._compact:
+            check_format(self._format, self._compression)
+        self._path = self._resolve_path() if storage is None else None
+        self._db: Optional[Union[TinyDB, SQLiteDatabase]] = None
+        # Other processes write through a SQLite file or the single-writer
+        # owner without telling us, so cached records would go stale there.
+        cacheable = (
+            settings.db_backend.lower() == BACKEND_TINYDB and not settings.db_single_writer
+        )
+        self._record_cache = RecordCache(
+            settings.db_record_cache_size if cacheable else 0, refresh=self._maybe_refresh
+        )
+        self._owner_guard = Lock()
+        self._owner_lock: Optional[IO[str]] = None
+        self._server: Optional[StorageServer] = None
+        self._client: Optional[StorageClient] = None
+        if (
+            storage is None
+            and settings.db_single_writer
+            and settings.db_backend.lower() == BACKEND_TINYDB
+        ):
+            self._join_single_writer()
+        elif not self._sharded:
+            self._db = self._create_db()
 
+    def _resolve_path(self) -> Path:
         path = (
             Path(self._path_override)
             if self._path_override
             else self._settings.ensure_data_dir()
         )
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return path
+
+    def _create_db(self) -> Union[TinyDB, SQLiteDatabase]:
+        if self._storage_class:
+            return TinyDB(storage=self._storage_class)
+
+        assert self._path is not None
+        path = self._path
+        backend = self._settings.db_backend.lower()
 
         with self._lock:
-            path.parent.mkdir(parents=True, exist_ok=True)
-            return TinyDB(path, storage=CachingMiddleware(JSONStorage))
+            if backend == BACKEND_SQLITE:
+                if path.suffix == ".json":
+                    path = path.with_suffix(".sqlite3")
+                database = SQLiteDatabase(path)
+                database.after_write = self._after_write
+                return database
+            if backend != BACKEND_TINYDB:
+                raise ValueError(f"Unsupported database backend: {self._settings.db_backend}")
+            return self._open_tinydb(path, "")
+
+    def _open_tinydb(self, path: Path, shard: str) -> TinyDB:
+        if self._settings.db_journal:
+            if self._compact:
+                raise ValueError("DB_FORMAT and DB_COMPRESSION are not supported with DB_JOURNAL")
+            return TinyDB(
+                path,
+                storage=JournalStorage,
+                compact_threshold=self._settings.db_journal_compact_bytes,
+                fsync=self._settings.db_journal_fsync,
+            )
+        storage_cls: Type[Storage] = FastJSONStorage
+        options: Dict[str, Any] = {}
+        if self._compact:
+            data_path = self._data_path(path)
+            if not data_path.exists() and path.exists() and path.stat().st_size:
+                convert(path, data_path, format=self._format, compression=self._compression)
+            storage_cls = CompactStorage
+            options = {"format": self._format, "compression": self._compression}
+            path = data_path
+        write_behind = WriteBehindMiddleware(
+            storage_cls,
+            lock=self._table_lock,
+            max_delay=self._settings.db_flush_max_delay,
+            max_dirty=self._settings.db_flush_max_dirty,
+        )
+        self._write_behinds[shard] = write_behind
+        return TinyDB(path, storage=write_behind, **options)
+
+    def _data_path(self, path: Path) -> Path:
+        if not self._compact:
+            return path
+        return storage_path(path, self._format, self._compression)
+
+    # Single writer
+    def _join_single_writer(self) -> None:
+        assert self._path is not None
+        if self._settings.jwt_secret == DEFAULT_JWT_SECRET:
+            # The socket's authkey is derived from it, and a known key would
+            # let anyone on the host send pickled requests to the owner.
+            raise ValueError("DB_SINGLE_WRITER requires JWT_SECRET to be changed from its default")
+        self._writer_address = socket_address(self._path, self._settings.db_writer_socket)
+        self._writer_authkey = hashlib.sha256(self._settings.jwt_secret.encode()).digest()
+        if not self._try_become_owner():
+            self._client = StorageClient(self._writer_address, self._writer_authkey)
+
+    def _try_become_owner(self) -> bool:
+        assert self._path is not None
+        handle = try_lock(self._path.with_name(self._path.name + ".lock"))
+        if handle is None:
+            return False
+        self._owner_lock = handle
+        if not self._sharded:
+            self._db = self._create_db()
+        self._server = StorageServer(self, self._writer_address, self._writer_authkey)
+        client, self._client = self._client, None
+        if client is not None:
+            client.close()
+        logger.info("Process %s owns %s", os.getpid(), self._path)
+        return True
+
+    def _call_owner(self, request: tuple, local: Callable[[], Any]) -> Any:
+        for _ in range(_OWNER_RETRIES):
+            client = self._client
+            if client is None:
+                return local()
+            try:
+                return client.call(request)
+            except OwnerUnavailableError as exc:
+                if exc.sent or client.in_transaction:
+                    raise ServiceUnavailableError("Storage owner went away") from exc
+                with self._owner_guard:
+                    if self._client is client and self._try_become_owner():
+                        continue
+            sleep(_OWNER_RETRY_DELAY)
+        raise ServiceUnavailableError("Storage owner is not reachable")
+
+    def _call_owner_table(
+        self,
+        name: str,
+        indexes: tuple,
+        method: str,
+        args: tuple,
+        kwargs: Dict[str, Any],
+    ) -> Any:
+        return self._call_owner(
+            ("table", name, indexes, method, args, kwargs),
+            lambda: getattr(self.local_table(name, indexes), method)(*args, **kwargs),
+        )
+
+    def _call_owner_manager(self, method: str, *args: Any) -> Any:
+        return self._call_owner(
+            ("manager", method, args, {}),
+            lambda: getattr(self, method)(*args),
+        )
+
+    # Sharding
+    def shard_path(self, name: str) -> Path:
+        """File that holds table ``name`` when tables are sharded."""
+        if not _SHARD_NAME.match(name):
+            raise ValueError(f"Invalid table name for a shard file: {name!r}")
+        assert self._path is not None
+        return self._path.with_name(f"{self._path.stem}.{name}{self._path.suffix}")
+
+    def _shard(self, name: str) -> TinyDB:
+        shard = self._shards.get(name)
+        if shard is None:
+            path = self.shard_path(name)
+            with self._lock:
+                if not self._data_path(path).exists():
+                    self._seed_shard(name, path)
+                shard = self._open_tinydb(path, name)
+            self._shards[name] = shard
+        return shard
+
+    def _seed_shard(self, name: str, path: Path) -> None:
+        """Copy ``name`` out of the single-file database into a new shard."""
+        if path.exists():
+            return
+        if self._legacy_tables is None:
+            self._legacy_tables = {}
+            assert self._path is not None
+            if self._path.exists() and self._path.stat().st_size:
+                with open(self._path, "r", encoding="utf-8") as handle:
+                    self._legacy_tables = loads(handle.read())
+        table = self._legacy_tables.get(name)
+        if not table:
+            return
+        temporary = path.with_name(f"{path.name}.{os.getpid()}.seed")
+        with open(temporary, "w", encoding="utf-8") as handle:
+            handle.write(dumps({name: table}))
+        try:
+            # link() refuses to overwrite, so a shard another process created
+            # in the meantime wins.
+            os.link(temporary, path)
+            logger.info("Seeded shard %s from %s", path, self._path)
+        except FileExistsError:
+            pass
+        finally:
+            temporary.unlink()
 
     @property
-    def db(self) -> TinyDB:
+    def db(self) -> Union[TinyDB, SQLiteDatabase]:
+        if self._db is None:
+            raise RuntimeError("This process has no single local database to return")
         return self._db
 
-    def table(self, name: str) -> Table:
-        return self._db.table(name)
+    def table(
+        self,
+        name: str,
+        *,
+        indexes: Sequence[Union[str, Sequence[str]]] = (),
+    ) -> Union[IndexedTable, SQLiteTable, RemoteTable, InstrumentedTable]:
+        table: Union[IndexedTable, SQLiteTable, RemoteTable]
+        if self._client is not None:
+            keys = tuple(normalize_index(fields) for fields in indexes)
+            table = RemoteTable(self._call_owner_table, name, keys)
+        else:
+            table = self.local_table(name, indexes)
+        if self._metrics is not None:
+            return InstrumentedTable(table, self._metrics)
+        return table
+
+    def local_table(
+        self,
+        name: str,
+        indexes: Sequence[Union[str, Sequence[str]]] = (),
+    ) -> Union[IndexedTable, SQLiteTable]:
+        """The table in this process, without instrumentation or forwarding."""
+        sqlite = self._sqlite()
+        if sqlite is not None:
+            sqlite_table = sqlite.table(name)
+            for fields in indexes:
+                sqlite_table.ensure_index(fields)
+            return sqlite_table
+
+        with self._table_lock:
+            table = self._tables.get(name)
+            if table is None:
+                table = IndexedTable(
+                    self._tinydb(name).table(name),
+                    self._table_lock,
+                    refresh=self._maybe_refresh,
+                    before_write=self._before_write,
+                    after_write=self._after_write,
+                )
+                self._tables[name] = table
+            for fields in indexes:
+                table.ensure_index(fields)
+            return table
+
+    def _sqlite(self) -> Optional[SQLiteDatabase]:
+        # TinyDB's base class is built at runtime, so type checkers cannot
+        # narrow ``self._db`` with isinstance() while TinyDB is in the union.
+        if isinstance(self._db, SQLiteDatabase):
+            return cast(SQLiteDatabase, self._db)
+        return None
+
+    def _tinydb(self, name: str) -> TinyDB:
+        """The TinyDB database that holds table ``name``."""
+        if self._sharded:
+            return self._shard(name)
+        database = self.db
+        assert isinstance(database, TinyDB)
+        return database
+
+    @property
+    def record_cache(self) -> RecordCache:
+        return self._record_cache
+
+    @contextmanager
+    def transaction(self, *, durable: bool = False) -> Iterator[None]:
+        """
+        Run several table operations atomically.
+
+        The table lock is held for the whole block, so other threads neither
+        see intermediate state nor interleave their writes, and the
+        write-behind flusher picks up all changes in one snapshot. If the
+        block raises, every table it wrote to is restored. Nested
+        transactions join the outermost one. ``durable=True`` waits for the
+        flush before returning.
+        """
+        if isinstance(self._db, SQLiteDatabase):
+            with self._db.transaction():
+                yield
+            return
+
+        client = self._client
+        if client is not None:
+            try:
+                with client.transaction():
+                    yield
+            except OwnerUnavailableError as exc:
+                raise ServiceUnavailableError("Storage owner went away") from exc
+            return
+
+        changes: List[Change] = []
+        undo_logs: Dict[str, UndoLog] = {}
+        with self._table_lock:
+            outermost = self._transaction is None
+            if outermost:
+                self._transaction = undo_logs
+                self._pending_changes = changes
+            committed = False
+            try:
+                yield
+                committed = True
+            except BaseException:
+                if outermost:
+                    self._rollback()
+                raise
+            finally:
+                if outermost:
+                    self._count_transaction(undo_logs, committed)
+                    self._transaction = None
+                    self._pending_changes = None
+        self._observers.publish(changes)
+        if durable and outermost:
+            self.commit()
+
+    def _before_write(self, table: IndexedTable) -> Optional[UndoLog]:
+        self._writes[table.name] = self._writes.get(table.name, 0) + 1
+        if self._transaction is None:
+            return None
+        undo = self._transaction.get(table.name)
+        if undo is None:
+            undo = self._transaction[table.name] = UndoLog()
+        return undo
+
+    def _count_transaction(self, undo_logs: Dict[str, UndoLog], committed: bool) -> None:
+        stats = self._transaction_stats
+        stats["committed" if committed else "rolled_back"] += 1
+        for undo in undo_logs.values():
+            stats["undo_documents"] += len(undo)
+            stats["table_copies"] += undo.table is not None
+
+    def _after_write(self, change: Change) -> None:
+        if self._pending_changes is not None:
+            self._pending_changes.append(change)
+        else:
+            self._observers.publish([change])
+
+    def _rollback(self) -> None:
+        assert self._transaction is not None
+        for name, undo in self._transaction.items():
+            self._tables[name].rollback(undo)
+            self._record_cache.invalidate(name)
+            self._writes[name] = self._writes.get(name, 0) + 1
+
+    def observe(
+        self, table: str, observer: Observer, *, asynchronous: bool = False
+    ) -> Callable[[], None]:
+        """
+        Call ``observer`` with a :class:`Change` for every write committed to
+        ``table`` through this process; returns a function that unregisters it.
+        ``asynchronous=True`` delivers from a background thread instead of
+        the writing one.
+        """
+        return self._observers.register(table, observer, asynchronous=asynchronous)
+
+    def drain_observers(self) -> None:
+        """Wait until asynchronous observers have seen every change published so far."""
+        self._observers.drain()
+
+    def observer_stats(self) -> Dict[str, Any]:
+        return self._observers.stats()
+
+    def refresh(self) -> List[str]:
+        """
+        Reload tables that another process changed on disk.
+
+        Returns the reloaded table names. SQLite sees other writers on its
+        own, and the journal storage is single-process, so this only acts on
+        write-behind JSON files.
+        """
+        if self._client is not None:
+            return self._call_owner_manager("refresh")
+        if not self._write_behinds:
+            return []
+        with self._table_lock:
+            changed: List[str] = []
+            for write_behind in list(self._write_behinds.values()):
+                changed.extend(write_behind.refresh())
+            for name in changed:
+                self._generations[name] = self._generations.get(name, 0) + 1
+                self._record_cache.invalidate(name)
+                table = self._tables.get(name)
+                if table is not None:
+                    table.reload()
+            return changed
+
+    def generation(self, name: str) -> int:
+        """Number of times ``name`` was reloaded from changes made elsewhere."""
+        if self._client is not None:
+            return self._call_owner_manager("generation", name)
+        return self._generations.get(name, 0)
+
+    def table_version(self, name: str) -> str:
+        """
+        Opaque token that changes whenever table ``name`` changes, for
+        ``ETag`` headers on list responses.
+
+        TinyDB tables combine this process's write counter with the reload
+        :meth:`generation`; the instance id keeps tokens from repeating after a
+        restart. Workers of the same file hand out different tokens, except in
+        single-writer mode, where the owner answers for all of them.
+        """
+        if self._client is not None:
+            return self._call_owner_manager("table_version", name)
+        if isinstance(self._db, SQLiteDatabase):
+            return f"{self._instance}.{self._db.version(name)}"
+        self._maybe_refresh()
+        with self._table_lock:
+            return f"{self._instance}.{self.generation(name)}.{self._writes.get(name, 0)}"
+
+    def external_version(self, name: str) -> str:
+        """
+        Like :meth:`table_version`, but only changes for writes that
+        :meth:`observe` does not report: reloads of changes other processes
+        made, commits of other SQLite connections, and every write for a
+        single-writer client, whose writes run in the owner.
+        """
+        if self._client is not None:
+            return self._call_owner_manager("table_version", name)
+        if isinstance(self._db, SQLiteDatabase):
+            return f"{self._instance}.{self._db.data_version()}"
+        self._maybe_refresh()
+        return f"{self._instance}.{self.generation(name)}"
+
+    def _maybe_refresh(self) -> None:
+        interval = self._settings.db_reload_interval
+        if interval < 0 or not self._write_behinds:
+            return
+        now = monotonic()
+        if now - self._last_reload_check < interval:
+            return
+        self._last_reload_check = now
+        self.refresh()
+
+    def flush(self) -> None:
+        """Write pending changes to disk now."""
+        if self._client is not None:
+            self._call_owner_manager("flush")
+            return
+        for write_behind in list(self._write_behinds.values()):
+            write_behind.flush()
+
+    def commit(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every write made so far is durable (group commit).
+
+        Storages without write-behind caching persist on each write, so this
+        returns immediately for them.
+        """
+        if self._client is not None:
+            return self._call_owner_manager("commit", timeout)
+        deadline = None if timeout is None else monotonic() + timeout
+        for write_behind in list(self._write_behinds.values()):
+            remaining = None if deadline is None else max(0.0, deadline - monotonic())
+            if not write_behind.commit(remaining):
+                return False
+        return True
+
+    def flush_metrics(self) -> Optional[Dict[str, Any]]:
+        """Flush latency and dirty-write counters, when write-behind is active."""
+        if self._client is not None:
+            return self._call_owner_manager("flush_metrics")
+        if not self._write_behinds:
+            return None
+        if not self._sharded:
+            return self._write_behinds[""].metrics()
+        shards = {name: wb.metrics() for name, wb in self._write_behinds.items()}
+        flushes = sum(m["flushes"] for m in shards.values())
+        total_ms = sum(m["avg_flush_ms"] * m["flushes"] for m in shards.values())
+        return {
+            "dirty_writes": sum(m["dirty_writes"] for m in shards.values()),
+            "oldest_dirty_ms": max(m["oldest_dirty_ms"] for m in shards.values()),
+            "flushes": flushes,
+            "failed_flushes": sum(m["failed_flushes"] for m in shards.values()),
+            "flushed_writes": sum(m["flushed_writes"] for m in shards.values()),
+            "last_flush_ms": max(m["last_flush_ms"] for m in shards.values()),
+            "max_flush_ms": max(m["max_flush_ms"] for m in shards.values()),
+            "avg_flush_ms": round(total_ms / flushes, 3) if flushes else 0.0,
+            "max_delay_s": self._settings.db_flush_max_delay,
+            "max_dirty": self._settings.db_flush_max_dirty,
+            "shards": shards,
+        }
+
+    def storage_metrics(self) -> Dict[str, Any]:
+        """Operation counters (when ``DB_INSTRUMENTATION`` is on), flush and cache metrics."""
+        metrics: Dict[str, Any] = {"enabled": self._metrics is not None}
+        if self._metrics is not None:
+            metrics.update(self._metrics.snapshot())
+        metrics["flush"] = self.flush_metrics()
+        metrics["record_cache"] = self._record_cache.stats()
+        metrics["transactions"] = dict(self._transaction_stats)
+        if self._settings.db_single_writer:
+            metrics["single_writer"] = "client" if self._client is not None else "owner"
+        return metrics
 
     def close(self) -> None:
-        self._db.close()
+        self._observers.close()
+        if self._client is not None:
+            self._client.close()
+        if self._server is not None:
+            self._server.close()
+        for shard in self._shards.values():
+            shard.close()
+        if self._db is not None:
+            self._db.close()
+        if self._owner_lock is not None:
+            self._owner_lock.close()
@@ -43,6 +43,12 @@ class ValidationError(ServiceError):
     code = "validation_error"
 
 
+class ServiceUnavailableError(ServiceError):
+    status_code = 503
+    detail = "Service temporarily unavailable"
+    code = "service_unavailable"
+
+
 def register_exception_handlers(app: FastAPI) -> None:
     """Register exception handlers for shared service errors."""
 
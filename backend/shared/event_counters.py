@@ -0,0 +1,346 @@
+"""
+Denormalized per-event counters: ``registered_participants``,
+``submitted_projects`` and ``formed_teams`` on the event record.
+
+The events service owns the ``events`` table, so only it writes the
+counters. The participants and projects services hand their changes to a
+:class:`CounterPublisher` once the write being counted has committed; it
+sends them to ``POST /internal/events/counters``, which applies them with
+:meth:`EventCounters.apply`. Each batch carries an id and the events
+service remembers the ids it applied, so a batch retried after a lost
+response is not counted twice. :meth:`EventCounters.reconcile` recomputes all
+of them in one pass over the participants and projects tables, for data
+written before the counters were maintained or changes that were lost.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections import Counter
+from threading import Condition, Thread
+from time import monotonic
+from typing import Any, Callable, Dict, Mapping, Optional, Set, Tuple, cast
+from uuid import uuid4
+
+import httpx
+
+from .change_feed import EVENT_CHANGES_TABLE, OP_COUNTERS, ChangeLog
+from .config import Settings
+from .database import DatabaseManager
+from .errors import ServiceUnavailableError
+from .middleware import SERVICE_TOKEN_HEADER, service_token
+from .models import ParticipantStatus
+
+logger = logging.getLogger(__name__)
+
+REGISTERED_PARTICIPANTS = "registered_participants"
+SUBMITTED_PROJECTS = "submitted_projects"
+FORMED_TEAMS = "formed_teams"
+COUNTER_FIELDS = (REGISTERED_PARTICIPANTS, SUBMITTED_PROJECTS, FORMED_TEAMS)
+
+# Participants holding a place: counted as registered and against max_participants.
+ACTIVE_PARTICIPANT_STATUSES = frozenset(
+    {ParticipantStatus.PENDING.value, ParticipantStatus.APPROVED.value}
+)
+
+# event id -> counter name -> amount to add.
+CounterDeltas = Dict[str, Dict[str, int]]
+
+# Ids of the last applied batches, for spotting retries of a batch that was applied.
+COUNTER_BATCHES_TABLE = "event_counter_batches"
+BATCH_HISTORY = 1024
+
+
+def registered_delta(before: Optional[str], after: Optional[str]) -> int:
+    """How ``registered_participants`` changes when a participant moves ``before`` -> ``after``."""
+    return int(after in ACTIVE_PARTICIPANT_STATUSES) - int(before in ACTIVE_PARTICIPANT_STATUSES)
+
+
+def _checked(deltas: Mapping[str, int]) -> Dict[str, int]:
+    deltas = {field: int(delta) for field, delta in deltas.items() if delta}
+    unknown = set(deltas) - set(COUNTER_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown event counters: {sorted(unknown)}")
+    return deltas
+
+
+class EventCounters:
+    """Maintains the counters of the records in the ``events`` table."""
+
+    def __init__(self, db_manager: DatabaseManager) -> None:
+        self._db_manager = db_manager
+        self._events = db_manager.table("events", indexes=["id"])
+        self._batches = db_manager.table(COUNTER_BATCHES_TABLE, indexes=["batch"])
+        self._changes = ChangeLog(db_manager, EVENT_CHANGES_TABLE)
+
+    def adjust(self, event_id: str, **deltas: int) -> Optional[Dict[str, Any]]:
+        """
+        Add ``deltas`` (counter name -> amount) to the event's counters,
+        never going below zero; returns the updated record, or ``None`` for
+        an unknown event.
+        """
+        deltas = _checked(deltas)
+        if not deltas:
+            return None
+        with self._db_manager.transaction():
+            record = self._events.find_one(id=event_id)
+            if record is None:
+                return None
+            return self._add(event_id, record, deltas)
+
+    def apply(
+        self, deltas: Mapping[str, Mapping[str, int]], batch_id: Optional[str] = None
+    ) -> int:
+        """
+        Apply a batch from :class:`CounterPublisher` in one transaction;
+        returns how many of its events exist. Unknown events are skipped.
+        A ``batch_id`` among the last ``BATCH_HISTORY`` applied is a retry
+        and changes nothing.
+        """
+        checked = {event_id: _checked(values) for event_id, values in deltas.items()}
+        applied = 0
+        with self._db_manager.transaction():
+            if batch_id is not None:
+                seen = self._batches.find_one(batch=batch_id)
+                if seen is not None:
+                    return int(seen["events"])
+            for event_id, values in checked.items():
+                record = self._events.find_one(id=event_id)
+                if record is None:
+                    continue
+                applied += 1
+                if values:
+                    self._add(event_id, record, values)
+            if batch_id is not None:
+                self._remember(batch_id, applied)
+        return applied
+
+    def reconcile(self) -> Dict[str, int]:
+        """
+        Recompute every event's counters from the participants and projects
+        tables, writing only those that differ. Returns how many events
+        were checked and corrected. Those tables must be the real ones: run
+        against empty copies it would reset every counter to zero.
+        """
+        participants = self._db_manager.table("participants")
+        projects = self._db_manager.table("projects")
+        with self._db_manager.transaction():
+            registered: Counter[str] = Counter()
+            for participant in participants.all():
+                if participant.get("status") in ACTIVE_PARTICIPANT_STATUSES:
+                    registered[participant["event_id"]] += 1
+            submitted: Counter[str] = Counter()
+            teams: Set[Tuple[str, str]] = set()
+            for project in projects.all():
+                submitted[project["event_id"]] += 1
+                teams.add((project["event_id"], project.get("team_name", "")))
+            formed = Counter(event_id for event_id, _ in teams)
+
+            checked = corrected = 0
+            for record in self._events.all():
+                checked += 1
+                event_id = record["id"]
+                values = {
+                    REGISTERED_PARTICIPANTS: registered[event_id],
+                    SUBMITTED_PROJECTS: submitted[event_id],
+                    FORMED_TEAMS: formed[event_id],
+                }
+                if all(record.get(field, 0) == value for field, value in values.items()):
+                    continue
+                self._write(event_id, record, values)
+                corrected += 1
+        return {"events": checked, "corrected": corrected}
+
+    def _remember(self, batch_id: str, applied: int) -> None:
+        doc_id = self._batches.insert({"batch": batch_id, "events": applied})
+        expired = doc_id - BATCH_HISTORY
+        if expired > 0 and self._batches.contains(doc_id=expired):
+            self._batches.remove(doc_ids=[expired])
+
+    def _add(
+        self, event_id: str, record: Mapping[str, Any], deltas: Dict[str, int]
+    ) -> Dict[str, Any]:
+        values = {
+            field: max(0, int(record.get(field) or 0) + delta) for field, delta in deltas.items()
+        }
+        return self._write(event_id, record, values)
+
+    def _write(
+        self, event_id: str, record: Mapping[str, Any], values: Dict[str, int]
+    ) -> Dict[str, Any]:
+        self._events.update_where(values, id=event_id)
+        self._changes.append(OP_COUNTERS, {"id": event_id, **values})
+        updated = {**record, **values}
+        self._db_manager.record_cache.invalidate("events", event_id)
+        return updated
+
+
+class CounterPublisher:
+    """
+    Sends counter changes to the service that owns the events.
+
+    :meth:`add` merges the change into the pending deltas of its event and
+    returns at once; a background thread hands everything pending to
+    ``send(deltas, batch_id)`` in one call, so a burst of registrations
+    costs one request. A failed batch is resent unchanged, under the same
+    id, every ``retry_delay`` seconds, while new changes keep merging into
+    the next batch. While the receiver is unreachable at most
+    ``max_pending_events`` events wait for that next batch; changes for
+    further events are dropped and counted. Dropped changes, and changes
+    still pending when the process dies, are lost; run
+    ``POST /internal/events/counters/reconcile`` to repair the counters.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[CounterDeltas, str], Any],
+        *,
+        retry_delay: float = 1.0,
+        max_pending_events: int = 10_000,
+        close: Optional[Callable[[], None]] = None,
+    ) -> None:
+        self._send = send
+        self.retry_delay = retry_delay
+        self.max_pending_events = max_pending_events
+        self._close = close
+        self._state = Condition()
+        self._pending: CounterDeltas = {}
+        # The batch being sent, kept with its id until the receiver acknowledges it.
+        self._batch: Optional[Tuple[str, CounterDeltas]] = None
+        self._closed = False
+        self._batches = 0
+        self._failures = 0
+        self._dropped = 0
+        # Failed attempts, and whether changes were dropped, since the last batch went through.
+        self._outage = 0
+        self._dropping = False
+        self._thread = Thread(target=self._run, name="event-counters", daemon=True)
+        self._thread.start()
+
+    def add(self, event_id: str, **deltas: int) -> None:
+        deltas = _checked(deltas)
+        if not deltas:
+            return
+        with self._state:
+            if event_id not in self._pending and len(self._pending) >= self.max_pending_events:
+                if not self._dropping:
+                    self._dropping = True
+                    logger.warning(
+                        "Counter changes of %d events are pending; dropping changes for others",
+                        len(self._pending),
+                    )
+                self._dropped += 1
+                return
+            self._merge({event_id: deltas})
+            self._state.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until everything added so far was sent; ``False`` on timeout."""
+        with self._state:
+            return self._state.wait_for(
+                lambda: not self._pending and self._batch is None, timeout
+            )
+
+    def stats(self) -> Dict[str, int]:
+        with self._state:
+            pending = set(self._pending)
+            if self._batch is not None:
+                pending.update(self._batch[1])
+            return {
+                "pending_events": len(pending),
+                "batches": self._batches,
+                "failures": self._failures,
+                "dropped": self._dropped,
+            }
+
+    def close(self, timeout: float = 5.0) -> None:
+        if not self.flush(timeout):
+            pending = self.stats()["pending_events"]
+            logger.warning("Dropping the counter changes of %d events", pending)
+        with self._state:
+            self._closed = True
+            self._state.notify_all()
+        self._thread.join(timeout)
+        if self._close is not None:
+            self._close()
+
+    def _merge(self, deltas: CounterDeltas) -> None:
+        for event_id, values in deltas.items():
+            pending = self._pending.setdefault(event_id, {})
+            for field, delta in values.items():
+                total = pending.get(field, 0) + delta
+                if total:
+                    pending[field] = total
+                else:
+                    pending.pop(field, None)
+            if not pending:
+                del self._pending[event_id]
+
+    def _run(self) -> None:
+        while True:
+            with self._state:
+                self._state.wait_for(
+                    lambda: bool(self._pending) or self._batch is not None or self._closed
+                )
+                if self._closed:
+                    return
+                if self._batch is None:
+                    self._batch = (uuid4().hex, self._pending)
+                    self._pending = {}
+                batch_id, deltas = self._batch
+            try:
+                self._send(deltas, batch_id)
+            except Exception:
+                with self._state:
+                    self._failures += 1
+                    self._outage += 1
+                    if self._outage == 1:
+                        logger.warning(
+                            "Sending counter changes failed; retrying every %ss",
+                            self.retry_delay,
+                            exc_info=True,
+                        )
+                    retry_at = monotonic() + self.retry_delay
+                    while not self._closed and monotonic() < retry_at:
+                        self._state.wait(retry_at - monotonic())
+                continue
+            with self._state:
+                if self._outage:
+                    logger.info("Counter changes sent after %d failed attempts", self._outage)
+                    self._outage = 0
+                self._dropping = False
+                self._batches += 1
+                self._batch = None
+                self._state.notify_all()
+
+
+class HttpCounterSink:
+    """
+    Posts counter changes to ``<events service>/internal/events/counters``,
+    presenting ``token`` as the service credential.
+    """
+
+    def __init__(self, url: str, *, token: Optional[str] = None, timeout: float = 5.0) -> None:
+        self._url = url
+        headers = {SERVICE_TOKEN_HEADER: token} if token is not None else None
+        self._client = httpx.Client(timeout=timeout, headers=headers)
+
+    def __call__(self, deltas: CounterDeltas, batch_id: str) -> Mapping[str, Any]:
+        try:
+            response = self._client.post(self._url, json={"batch": batch_id, "events": deltas})
+            response.raise_for_status()
+        except httpx.HTTPError as exc:
+            raise ServiceUnavailableError(f"Event counters unavailable: {exc}") from exc
+        return cast(Mapping[str, Any], response.json())
+
+    def close(self) -> None:
+        self._client.close()
+
+
+def create_counter_publisher(settings: Settings) -> CounterPublisher:
+    """A publisher sending to the events service at ``EVENTS_SERVICE_URL``."""
+    sink = HttpCounterSink(
+        settings.events_service_url.rstrip("/") + "/internal/events/counters",
+        token=service_token(settings),
+    )
+    return CounterPublisher(sink, close=sink.close)
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+from typing import Any, Callable, Dict, List, Optional, Protocol, Sequence, Tuple
+
+from .database import DatabaseManager
+from .models import Event
+from .observers import OP_TRUNCATE, Change
+
+
+class EventSource(Protocol):
+    """What services need to look events up: :class:`EventReader` or ``EventReplica``."""
+
+    def get(self, event_id: str) -> Optional[Event]: ...
+
+    def get_many(self, event_ids: Sequence[str]) -> List[Optional[Event]]: ...
+
+    def stats(self) -> Dict[str, Any]: ...
+
+    def close(self) -> None: ...
+
+
+class EventReader:
+    """
+    Read-only access to the events table for the services that do not own it.
+
+    Parsed :class:`Event` models are kept in an LRU of up to ``max_entries``
+    for at most ``max_age`` seconds. Writes this process makes to ``events``
+    drop just the entries they touch, through a write observer. Each lookup
+    also compares :meth:`DatabaseManager.external_version` of ``events`` with
+    the version the cache was filled under and drops everything when it
+    moved, so changes reloaded from other processes are seen at once too;
+    ``max_age`` bounds staleness where they are not. Either limit set to
+    ``0`` disables caching. The returned events are shared between callers
+    and must not be modified.
+    """
+
+    def __init__(
+        self,
+        db_manager: DatabaseManager,
+        *,
+        max_entries: int = 512,
+        max_age: float = 5.0,
+        clock: Callable[[], float] = monotonic,
+    ) -> None:
+        self._db_manager = db_manager
+        self._table = db_manager.table("events", indexes=["id"])
+        self.max_entries = max(0, max_entries) if max_age > 0 else 0
+        self.max_age = max_age
+        self._clock = clock
+        self._lock = Lock()
+        # event id -> (event, expiry time, document id)
+        self._entries: "OrderedDict[str, Tuple[Event, float, Optional[int]]]" = OrderedDict()
+        # document id -> event id of the cached entries, for the write observer
+        self._doc_ids: Dict[int, str] = {}
+        self._version: Optional[str] = None
+        # Observed writes so far; loads that overlap one are not cached.
+        self._changes = 0
+        self._hits = 0
+        self._misses = 0
+        self._expirations = 0
+        self._invalidations = 0
+        self._evictions = 0
+        self._write_evictions = 0
+        self._unobserve = (
+            db_manager.observe("events", self._on_change) if self.max_entries else None
+        )
+
+    def get(self, event_id: str) -> Optional[Event]:
+        return self.get_many([event_id])[0]
+
+    def get_many(self, event_ids: Sequence[str]) -> List[Optional[Event]]:
+        """Events for ``event_ids`` in the same order; ``None`` for unknown or deleted ones."""
+        found: Dict[str, Event] = {}
+        version = self._db_manager.external_version("events") if self.max_entries else None
+        now = self._clock()
+        with self._lock:
+            if version != self._version:
+                if self._entries:
+                    self._invalidations += 1
+                    self._clear()
+                self._version = version
+            changes = self._changes
+            for event_id in event_ids:
+                entry = self._entries.get(event_id)
+                if entry is None:
+                    continue
+                event, expires, _ = entry
+                if expires <= now:
+                    self._discard(event_id)
+                    self._expirations += 1
+                    continue
+                self._entries.move_to_end(event_id)
+                found[event_id] = event
+            missing = list(dict.fromkeys(i for i in event_ids if i not in found))
+            self._hits += len(event_ids) - len(missing)
+            self._misses += len(missing)
+
+        if missing:
+            loaded = {
+                record["id"]: (Event.parse_obj(record), getattr(record, "doc_id", None))
+                for record in self._table.find_many("id", missing)
+            }
+            found.update((event_id, event) for event_id, (event, _) in loaded.items())
+            self._store(loaded, version, changes, now + self.max_age)
+        return [self._live(found.get(event_id)) for event_id in event_ids]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "max_entries": self.max_entries,
+                "max_age": self.max_age,
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / lookups, 3) if lookups else 0.0,
+                "expirations": self._expirations,
+                "invalidations": self._invalidations,
+                "evictions": self._evictions,
+                "write_evictions": self._write_evictions,
+            }
+
+    def close(self) -> None:
+        if self._unobserve is not None:
+            self._unobserve()
+            self._unobserve = None
+
+    def _on_change(self, change: Change) -> None:
+        with self._lock:
+            self._changes += 1
+            if change.op == OP_TRUNCATE:
+                self._clear()
+                return
+            for doc_id in change.doc_ids:
+                event_id = self._doc_ids.get(doc_id)
+                if event_id is not None:
+                    self._discard(event_id)
+                    self._write_evictions += 1
+
+    def _store(
+        self,
+        events: Dict[str, Tuple[Event, Optional[int]]],
+        version: Optional[str],
+        changes: int,
+        expires: float,
+    ) -> None:
+        if not self.max_entries:
+            return
+        with self._lock:
+            # A write landed while loading, so the records may predate it.
+            if version != self._version or changes != self._changes:
+                return
+            for event_id, (event, doc_id) in events.items():
+                self._discard(event_id)
+                self._entries[event_id] = (event, expires, doc_id)
+                if doc_id is not None:
+                    self._doc_ids[doc_id] = event_id
+                if len(self._entries) > self.max_entries:
+                    self._discard(next(iter(self._entries)))
+                    self._evictions += 1
+
+    def _discard(self, event_id: str) -> None:
+        entry = self._entries.pop(event_id, None)
+        if entry is not None and entry[2] is not None:
+            self._doc_ids.pop(entry[2], None)
+
+    def _clear(self) -> None:
+        self._entries.clear()
+        self._doc_ids.clear()
+
+    @staticmethod
+    def _live(event: Optional[Event]) -> Optional[Event]:
+        if event is None or event.deleted_at is not None:
+            return None
+        return event
@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import logging
+from threading import Lock
+from time import monotonic
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence
+
+from .change_feed import DEFAULT_BATCH, OP_COUNTERS, OP_DELETE, ChangeFeed, HttpChangeFeed
+from .config import Settings
+from .database import DatabaseManager
+from .errors import ServiceUnavailableError
+from .event_reader import EventReader, EventSource
+from .middleware import service_token
+from .models import Event
+
+logger = logging.getLogger(__name__)
+
+EVENT_SOURCE_STORAGE = "storage"
+EVENT_SOURCE_REPLICA = "replica"
+
+# Resets tolerated within one sync before giving up until the next one.
+_MAX_RESETS = 3
+# Unknown ids remembered at most; the set is dropped when it grows past this.
+_MAX_MISSING = 4096
+
+
+class EventReplica:
+    """
+    In-memory copy of the live events, kept current from the events
+    service's change feed.
+
+    A lookup first pulls new changes when the last sync is older than
+    ``poll_interval`` seconds, and once more for an id it does not know, so
+    an event created a moment ago is found; an id still unknown after that
+    is not pulled for again until ``miss_ttl`` seconds later. When the feed
+    reports a new epoch, or a head behind the replica's sequence, the
+    replica is rebuilt from the start of the log and swapped in once
+    complete. If the feed cannot be reached the replica keeps answering from
+    what it has; before its first successful sync, lookups raise
+    ``ServiceUnavailableError``. The returned events are shared between
+    callers and must not be modified.
+    """
+
+    def __init__(
+        self,
+        feed: ChangeFeed,
+        *,
+        poll_interval: float = 1.0,
+        batch_size: int = DEFAULT_BATCH,
+        miss_ttl: float = 1.0,
+        clock: Callable[[], float] = monotonic,
+        close: Optional[Callable[[], None]] = None,
+    ) -> None:
+        self._feed = feed
+        self.poll_interval = poll_interval
+        self.miss_ttl = miss_ttl
+        self._batch_size = batch_size
+        self._clock = clock
+        self._close = close
+        self._sync_lock = Lock()
+        self._events: Dict[str, Event] = {}
+        self._epoch: Optional[str] = None
+        self._last_seq = 0
+        # Unknown ids -> when a forced sync may be tried for them again.
+        self._missing: Dict[str, float] = {}
+        self._missing_lock = Lock()
+        self._synced_at: Optional[float] = None
+        self._syncs = 0
+        self._applied = 0
+        self._feed_errors = 0
+        self._resyncs = 0
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, event_id: str) -> Optional[Event]:
+        return self.get_many([event_id])[0]
+
+    def get_many(self, event_ids: Sequence[str]) -> List[Optional[Event]]:
+        """Events for ``event_ids`` in the same order; ``None`` for unknown or deleted ones."""
+        synced = self._refresh(force=False)
+        if not synced and self._worth_pulling(event_ids):
+            self._refresh(force=True)
+        events = [self._events.get(event_id) for event_id in event_ids]
+        unknown = [event_id for event_id, event in zip(event_ids, events) if event is None]
+        if unknown:
+            self._remember_missing(unknown)
+        found = sum(event is not None for event in events)
+        self._hits += found
+        self._misses += len(events) - found
+        return events
+
+    def sync(self) -> int:
+        """Apply every change published since the last sync; returns how many."""
+        with self._sync_lock:
+            return self._sync()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._hits + self._misses
+        synced_at = self._synced_at
+        return {
+            "events": len(self._events),
+            "last_seq": self._last_seq,
+            "syncs": self._syncs,
+            "changes_applied": self._applied,
+            "feed_errors": self._feed_errors,
+            "resyncs": self._resyncs,
+            "seconds_since_sync": (
+                round(self._clock() - synced_at, 3) if synced_at is not None else None
+            ),
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_ratio": round(self._hits / lookups, 3) if lookups else 0.0,
+        }
+
+    def close(self) -> None:
+        if self._close is not None:
+            self._close()
+
+    def _worth_pulling(self, event_ids: Sequence[str]) -> bool:
+        """Whether an id is unknown and was not already pulled for within ``miss_ttl``."""
+        now = self._clock()
+        with self._missing_lock:
+            return any(
+                event_id not in self._events and self._missing.get(event_id, now) <= now
+                for event_id in event_ids
+            )
+
+    def _remember_missing(self, event_ids: Sequence[str]) -> None:
+        expires = self._clock() + self.miss_ttl
+        with self._missing_lock:
+            if len(self._missing) > _MAX_MISSING:
+                self._missing.clear()
+            for event_id in event_ids:
+                self._missing.setdefault(event_id, expires)
+
+    def _refresh(self, *, force: bool) -> bool:
+        """Sync if due (or ``force``); returns whether a sync ran."""
+        started = self._clock()
+        synced_at = self._synced_at
+        if not force and synced_at is not None and started - synced_at < self.poll_interval:
+            return False
+        with self._sync_lock:
+            # Another thread may have synced while this one waited for the lock.
+            if self._synced_at is not None and self._synced_at > started:
+                return True
+            try:
+                self._sync()
+            except ServiceUnavailableError:
+                self._feed_errors += 1
+                if self._synced_at is None:
+                    raise
+                logger.warning(
+                    "Event change feed unavailable; serving the replica as of seq %s",
+                    self._last_seq,
+                )
+                # Do not retry on every request while the feed is down.
+                self._synced_at = started
+            return True
+
+    def _sync(self) -> int:
+        events, epoch, since = self._events, self._epoch, self._last_seq
+        applied = resets = 0
+        while True:
+            page = self._feed(since, self._batch_size)
+            if page.get("epoch") != epoch or int(page.get("head", since)) < since:
+                epoch = page.get("epoch")
+                if since or events:
+                    # The log was reset or restored, so our sequence numbers
+                    # mean nothing there: rebuild from its start.
+                    resets += 1
+                    if resets > _MAX_RESETS:
+                        raise ServiceUnavailableError("Event change feed keeps being reset")
+                    logger.warning("Event change feed was reset; resyncing the replica")
+                    events, since, applied = {}, 0, 0
+                    self._resyncs += 1
+                    continue
+            for change in page["changes"]:
+                self._apply(events, change)
+                applied += 1
+            since = int(page["last_seq"])
+            if events is self._events:
+                # Applied in place; keep the progress if a later page fails.
+                self._epoch, self._last_seq = epoch, since
+            if not page["has_more"]:
+                break
+        self._events, self._epoch, self._last_seq = events, epoch, since
+        with self._missing_lock:
+            self._missing.clear()
+        self._synced_at = self._clock()
+        self._syncs += 1
+        self._applied += applied
+        return applied
+
+    @staticmethod
+    def _apply(events: Dict[str, Event], change: Mapping[str, Any]) -> None:
+        record = change["record"]
+        if change["op"] == OP_COUNTERS:
+            # Counters of an event the replica does not hold (deleted) are ignored.
+            event = events.get(change["key"])
+            if event is not None:
+                events[change["key"]] = event.copy(update=record)
+        elif change["op"] == OP_DELETE or record.get("deleted_at") is not None:
+            events.pop(change["key"], None)
+        else:
+            events[change["key"]] = Event.parse_obj(record)
+
+
+def create_event_source(settings: Settings, db_manager: DatabaseManager) -> EventSource:
+    """
+    ``EVENT_SOURCE=storage`` reads the events table of the shared storage;
+    ``replica`` replicates it from ``EVENTS_SERVICE_URL`` instead, so the
+    service needs no access to the events data.
+    """
+    source = settings.event_source.lower()
+    if source == EVENT_SOURCE_REPLICA:
+        url = settings.events_service_url.rstrip("/") + "/internal/events/changes"
+        feed = HttpChangeFeed(url, token=service_token(settings))
+        return EventReplica(
+            feed, poll_interval=settings.event_replica_poll_interval, close=feed.close
+        )
+    if source == EVENT_SOURCE_STORAGE:
+        return EventReader(
+            db_manager,
+            max_entries=settings.event_cache_size,
+            max_age=settings.event_cache_ttl,
+        )
+    raise ValueError(f"Unknown EVENT_SOURCE: {settings.event_source!r}")
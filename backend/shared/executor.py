@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock
+from time import perf_counter
+from typing import Any, Callable, Dict, TypeVar
+
+from .errors import ServiceUnavailableError
+
+T = TypeVar("T")
+
+
+class StorageExecutor:
+    """
+    Bounded thread pool for blocking storage work called from async routes.
+
+    Route handlers ``await executor.run(service.method, ...)`` so TinyDB file
+    I/O and table scans never run on the event loop. At most ``max_workers``
+    calls run at once; when ``max_queue`` calls are already waiting, new ones
+    are rejected with a 503 instead of piling up (``0`` disables the limit).
+    """
+
+    def __init__(self, max_workers: int = 4, max_queue: int = 256) -> None:
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="storage"
+        )
+        self._lock = Lock()
+        self._queued = 0
+        self._active = 0
+        self._completed = 0
+        self._rejected = 0
+        self._total_wait_ms = 0.0
+        self._max_wait_ms = 0.0
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        with self._lock:
+            if self.max_queue and self._queued >= self.max_queue:
+                self._rejected += 1
+                raise ServiceUnavailableError("Storage is overloaded, retry later")
+            self._queued += 1
+        submitted = perf_counter()
+        # Whether this call still holds its queue slot; cleared exactly once,
+        # by call() when it starts or by release() if it never does.
+        queued = True
+
+        def dequeue() -> None:
+            # Caller holds self._lock.
+            nonlocal queued
+            if queued:
+                queued = False
+                self._queued -= 1
+
+        def call() -> T:
+            wait_ms = (perf_counter() - submitted) * 1000
+            with self._lock:
+                dequeue()
+                self._active += 1
+                self._total_wait_ms += wait_ms
+                self._max_wait_ms = max(self._max_wait_ms, wait_ms)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._active -= 1
+                    self._completed += 1
+
+        def release(_: "Future[T]") -> None:
+            # A call cancelled while queued (the awaiting request went away)
+            # never runs, so give its slot back here.
+            with self._lock:
+                dequeue()
+
+        try:
+            future = self._pool.submit(call)
+        except RuntimeError:
+            with self._lock:
+                dequeue()
+            raise
+        future.add_done_callback(release)
+        return await asyncio.wrap_future(future)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            started = self._completed + self._active
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "queue_depth": self._queued,
+                "active": self._active,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "avg_wait_ms": round(self._total_wait_ms / started, 3) if started else 0.0,
+                "max_wait_ms": round(self._max_wait_ms, 3),
+            }
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=True)
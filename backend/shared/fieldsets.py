@@ -0,0 +1,54 @@
+"""
+Sparse fieldsets: ``?fields=id,name,status`` on list and detail endpoints.
+
+Repositories copy only the requested keys out of the stored records and the
+route returns them as JSON directly, skipping model validation. Stored
+records are already JSON-compatible (see ``model_to_record``), so nothing
+needs converting on the way out.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Iterable, Mapping, Optional, Tuple, Type
+
+from fastapi import Response
+from pydantic import BaseModel
+
+from .errors import ValidationError
+from .serialization import dumps
+
+Fields = Tuple[str, ...]
+
+
+def model_field_names(model: Type[BaseModel]) -> Iterable[str]:
+    fields = getattr(model, "model_fields", None)
+    if fields is None:  # Pydantic v1
+        fields = getattr(model, "__fields__")
+    return fields.keys()
+
+
+def parse_fields(raw: Optional[str], model: Type[BaseModel]) -> Optional[Fields]:
+    """
+    Field names from a comma-separated ``fields`` parameter, ``None`` when it
+    is absent. ``id`` is always included; unknown names raise ``ValidationError``.
+    """
+    if raw is None:
+        return None
+    requested = [name.strip() for name in raw.split(",") if name.strip()]
+    known = set(model_field_names(model))
+    unknown = sorted(set(requested) - known)
+    if unknown:
+        raise ValidationError(f"Unknown fields: {', '.join(unknown)}")
+    return tuple(dict.fromkeys(["id", *requested]))
+
+
+def select_fields(record: Mapping[str, Any], fields: Optional[Fields]) -> dict:
+    """Copy of ``record``, reduced to ``fields`` when given."""
+    if fields is None:
+        return dict(record)
+    return {field: record[field] for field in fields if field in record}
+
+
+def json_response(content: Any, headers: Optional[Mapping[str, str]] = None) -> Response:
+    """Serialize already JSON-compatible ``content`` without a response model."""
+    return Response(content=dumps(content), media_type="application/json", headers=headers)
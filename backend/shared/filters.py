@@ -0,0 +1,167 @@
+"""
+Filter and sort parameters of list endpoints.
+
+Routes turn query parameters such as ``status=published,active&tag=ai&
+start_after=2024-05-01&sort=start_date`` into a :class:`ListQuery`: plain
+data, so it also crosses the single-writer socket. Tables execute it in
+``find_page``/``count_where``; :func:`plan` decides which conditions are
+resolved through a hash index and which are checked while streaming over the
+candidates.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from .errors import ValidationError
+
+OP_EQ = "eq"
+OP_IN = "in"
+OP_CONTAINS = "contains"
+OP_AFTER = "after"
+OP_BEFORE = "before"
+
+
+@dataclass(frozen=True)
+class Condition:
+    """
+    ``field`` compared with ``value``:
+
+    - ``eq``: equal to ``value``;
+    - ``in``: equal to one of the values in the tuple ``value``;
+    - ``contains``: a list field containing ``value``;
+    - ``after``/``before``: an ISO timestamp later/earlier than ``value``.
+    """
+
+    field: str
+    op: str
+    value: Any
+
+
+@dataclass(frozen=True)
+class ListQuery:
+    """Conditions and sort order of a list request; an empty ``order_by`` keeps the default."""
+
+    conditions: Tuple[Condition, ...] = ()
+    order_by: Tuple[str, ...] = ()
+
+    def where(self, *conditions: Condition) -> "ListQuery":
+        return ListQuery(self.conditions + conditions, self.order_by)
+
+
+@dataclass
+class Plan:
+    """
+    How a table runs a list of conditions.
+
+    ``where`` holds the equality terms handed to the index lookup; ``expand``
+    is an ``in`` condition whose values are looked up one by one through an
+    index (its results are unioned); ``residual`` is checked on each candidate.
+    """
+
+    where: Dict[str, Any] = field(default_factory=dict)
+    expand: Optional[Condition] = None
+    residual: List[Condition] = field(default_factory=list)
+
+
+def plan(
+    conditions: Iterable[Condition],
+    where: Mapping[str, Any],
+    indexes: Sequence[Tuple[str, ...]],
+) -> Plan:
+    result = Plan(where=dict(where))
+    pending: List[Condition] = []
+    for condition in conditions:
+        if condition.op == OP_EQ and condition.field not in result.where:
+            result.where[condition.field] = condition.value
+        elif (
+            condition.op == OP_IN
+            and len(condition.value) == 1
+            and condition.field not in result.where
+        ):
+            result.where[condition.field] = condition.value[0]
+        else:
+            pending.append(condition)
+
+    def covered(fields: Iterable[str]) -> bool:
+        return any(set(index) <= set(fields) for index in indexes)
+
+    if not covered(result.where):
+        for condition in pending:
+            if condition.op == OP_IN and covered([*result.where, condition.field]):
+                result.expand = condition
+                pending.remove(condition)
+                break
+    result.residual = pending
+    return result
+
+
+def parse_timestamp(value: Any) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        parsed = value
+    elif isinstance(value, str):
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    else:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def condition_matches(document: Mapping[str, Any], condition: Condition) -> bool:
+    value = document.get(condition.field)
+    if condition.op == OP_EQ:
+        return condition.field in document and value == condition.value
+    if condition.op == OP_IN:
+        return condition.field in document and value in condition.value
+    if condition.op == OP_CONTAINS:
+        return isinstance(value, list) and condition.value in value
+    if condition.op in (OP_AFTER, OP_BEFORE):
+        stored = parse_timestamp(value)
+        bound = parse_timestamp(condition.value)
+        if stored is None or bound is None:
+            return False
+        return stored > bound if condition.op == OP_AFTER else stored < bound
+    raise ValueError(f"Unknown filter operator: {condition.op}")
+
+
+def all_match(document: Mapping[str, Any], conditions: Iterable[Condition]) -> bool:
+    return all(condition_matches(document, condition) for condition in conditions)
+
+
+def sort_order(sort: Optional[str], allowed: Sequence[str]) -> Tuple[str, ...]:
+    """``order_by`` for the ``sort`` parameter: the field, then ``id`` to break ties."""
+    name = sort or allowed[0]
+    if name not in allowed:
+        raise ValidationError(f"Cannot sort by {name!r}; use one of: {', '.join(allowed)}")
+    return (name, "id") if name != "id" else ("id",)
+
+
+def split_values(raw: Optional[Sequence[str]]) -> Tuple[str, ...]:
+    """Values of a parameter given as ``a,b`` and/or repeated (``x=a&x=b``)."""
+    if not raw:
+        return ()
+    values = (part.strip() for item in raw for part in item.split(","))
+    return tuple(dict.fromkeys(value for value in values if value))
+
+
+def in_condition(
+    field_name: str, raw: Optional[Sequence[str]], choices: Optional[Iterable[str]] = None
+) -> Optional[Condition]:
+    """
+    ``field_name`` equal to one of the values of a multi-valued parameter, or
+    ``None`` when it is absent. Values outside ``choices`` raise ``ValidationError``.
+    """
+    values = split_values(raw)
+    if not values:
+        return None
+    if choices is not None:
+        unknown = sorted(set(values) - set(choices))
+        if unknown:
+            raise ValidationError(f"Unknown {field_name} values: {', '.join(unknown)}")
+    return Condition(field_name, OP_IN, values)
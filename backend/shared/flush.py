@@ -0,0 +1,336 @@
+from __future__ import annotations
+
+import logging
+import os
+from contextlib import contextmanager
+from dataclasses import dataclass
+from threading import Condition, Lock, RLock, Thread
+from time import monotonic, perf_counter
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Type
+
+from tinydb.middlewares import CachingMiddleware
+from tinydb.storages import Storage
+
+from .serialization import DecodeError
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+Signature = Tuple[int, int]
+
+
+@dataclass
+class FlushStats:
+    flushes: int = 0
+    failures: int = 0
+    flushed_writes: int = 0
+    last_flush_ms: float = 0.0
+    max_flush_ms: float = 0.0
+    total_flush_ms: float = 0.0
+
+
+class WriteBehindMiddleware(CachingMiddleware):
+    """
+    Caching middleware flushed by a background thread.
+
+    Writes only touch the in-memory cache. The data is written to the
+    wrapped storage once the oldest unflushed write is ``max_delay`` seconds
+    old or ``max_dirty`` writes have piled up, whichever comes first.
+    :meth:`commit` is the group-commit entry point: it returns once every
+    write made before the call is on disk, and concurrent callers share a
+    single flush.
+
+    ``lock`` must be the lock that guards table operations, so flushes
+    always see a consistent snapshot of the cache.
+
+    A flush only writes the tables with unflushed writes. They are merged
+    into a fresh read of the file, taken under an exclusive ``flock`` on
+    ``<path>.flush.lock``, so tables other processes flushed in the
+    meantime are kept rather than overwritten with this process's copy.
+
+    Other processes may write the same file. :meth:`refresh` notices that
+    through the file's mtime and size and swaps in the tables whose content
+    changed, leaving tables with unflushed local writes alone.
+    """
+
+    def __init__(
+        self,
+        storage_cls: Type[Storage],
+        *,
+        lock: RLock,
+        max_delay: float = 1.0,
+        max_dirty: int = 1000,
+    ) -> None:
+        super().__init__(storage_cls)
+        self._lock = lock
+        self._max_delay = max_delay
+        self._max_dirty = max(1, max_dirty)
+        self._state = Condition()
+        self._flush_lock = Lock()
+        self._write_seq = 0
+        self._flushed_seq = 0
+        self._first_dirty_at: Optional[float] = None
+        self._closed = False
+        self._thread: Optional[Thread] = None
+        self._path: Optional[str] = None
+        # File signature and table objects as of the last load or flush; a
+        # cached table that is not its clean object has unflushed writes.
+        self._signature_seen: Optional[Signature] = None
+        self._clean: Dict[str, Dict[str, Any]] = {}
+        self.stats = FlushStats()
+
+    def __call__(self, *args: Any, **kwargs: Any) -> "WriteBehindMiddleware":
+        super().__call__(*args, **kwargs)
+        if args:
+            self._path = os.fspath(args[0])
+        self._thread = Thread(target=self._run, name="db-write-behind", daemon=True)
+        self._thread.start()
+        return self
+
+    # Storage API
+    def read(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        if self.cache is None:
+            with self._file_lock(shared=True):
+                self._signature_seen = self._signature()
+                self.cache = self.storage.read() or {}
+            self._clean = dict(self.cache)
+        return self.cache
+
+    def write(self, data: Dict[str, Dict[str, Any]]) -> None:
+        self.cache = data
+        with self._state:
+            self._write_seq += 1
+            self._cache_modified_count += 1
+            if self._first_dirty_at is None:
+                # Wake the flusher so it arms the max-delay timer.
+                self._first_dirty_at = monotonic()
+                self._state.notify_all()
+            elif self._cache_modified_count >= self._max_dirty:
+                self._state.notify_all()
+
+    def flush(self) -> None:
+        """Write the tables with unflushed writes to storage."""
+        with self._lock:
+            with self._state:
+                dirty = self._cache_modified_count
+                if not dirty:
+                    return
+                seq = self._write_seq
+                first_dirty_at = self._first_dirty_at
+                self._cache_modified_count = 0
+                self._first_dirty_at = None
+            cache = self.cache or {}
+            tables = {
+                name: table for name, table in cache.items() if table is not self._clean.get(name)
+            }
+            dropped = [name for name in self._clean if name not in cache]
+            # TinyDB mutates documents in place, so copy them while the
+            # table lock keeps writers out; serialization happens unlocked.
+            snapshot = {
+                name: {doc_id: dict(doc) for doc_id, doc in table.items()}
+                for name, table in tables.items()
+            }
+
+        with self._flush_lock:
+            if self._flushed_seq >= seq:
+                return
+            started = perf_counter()
+            try:
+                with self._file_lock():
+                    # Unchanged since our last load or flush: nobody else
+                    # wrote, so our clean tables are what is on disk.
+                    current = self._signature() == self._signature_seen
+                    data = dict(self.storage.read() or {})
+                    for name in dropped:
+                        data.pop(name, None)
+                    data.update(snapshot)
+                    self.storage.write(data)
+                    written = self._signature()
+            except Exception:
+                with self._state:
+                    self.stats.failures += 1
+                    self._cache_modified_count += dirty
+                    if self._first_dirty_at is None:
+                        self._first_dirty_at = first_dirty_at
+                raise
+            elapsed_ms = (perf_counter() - started) * 1000
+            for name in dropped:
+                self._clean.pop(name, None)
+            self._clean.update(tables)
+            if current:
+                self._signature_seen = written
+            # Otherwise the file holds tables other processes wrote that
+            # are not in the cache yet; keeping the old signature makes the
+            # next refresh() load them.
+            with self._state:
+                self._flushed_seq = seq
+                self.stats.flushes += 1
+                self.stats.flushed_writes += dirty
+                self.stats.last_flush_ms = elapsed_ms
+                self.stats.max_flush_ms = max(self.stats.max_flush_ms, elapsed_ms)
+                self.stats.total_flush_ms += elapsed_ms
+                self._state.notify_all()
+
+    def commit(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until all writes made before the call are flushed.
+
+        Returns ``False`` if ``timeout`` seconds pass first.
+        """
+        deadline = None if timeout is None else monotonic() + timeout
+        with self._state:
+            target = self._write_seq
+        while True:
+            with self._state:
+                if self._flushed_seq >= target:
+                    return True
+                pending = self._cache_modified_count
+            if pending:
+                self.flush()
+                continue
+            # Another thread is writing a snapshot that covers our writes.
+            with self._state:
+                remaining = None if deadline is None else deadline - monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._state.wait_for(
+                    lambda: self._flushed_seq >= target or bool(self._cache_modified_count),
+                    timeout=remaining,
+                )
+
+    def refresh(self) -> List[str]:
+        """
+        Reload tables another process changed since the last load or flush.
+
+        Returns the names of the tables that were replaced in the cache.
+        """
+        signature = self._signature()
+        if signature is None or signature == self._signature_seen:
+            return []
+        with self._lock, self._flush_lock:
+            signature = self._signature()
+            if signature == self._signature_seen:
+                return []
+            try:
+                with self._file_lock(shared=True):
+                    signature = self._signature()
+                    data = self.storage.read() or {}
+            except DecodeError:
+                # Caught a writer that does not take the flush lock mid-write;
+                # try again next time.
+                logger.debug("Skipping reload of a partially written %s", self._path)
+                return []
+            self._signature_seen = signature
+
+            cache = self.cache if self.cache is not None else {}
+            changed: List[str] = []
+            for name in cache.keys() | data.keys():
+                current = cache.get(name)
+                if name in cache and current is not self._clean.get(name):
+                    logger.warning(
+                        "Table %r changed on disk but has unflushed writes; keeping local copy",
+                        name,
+                    )
+                    continue
+                table = data.get(name)
+                if current == table:
+                    continue
+                if table is None:
+                    cache.pop(name, None)
+                    self._clean.pop(name, None)
+                else:
+                    cache[name] = table
+                    self._clean[name] = table
+                changed.append(name)
+            self.cache = cache
+            return changed
+
+    def close(self) -> None:
+        with self._state:
+            self._closed = True
+            self._state.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+        self.storage.close()
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._state:
+            age = (
+                (monotonic() - self._first_dirty_at) * 1000
+                if self._first_dirty_at is not None
+                else 0.0
+            )
+            flushes = self.stats.flushes
+            return {
+                "dirty_writes": self._cache_modified_count,
+                "oldest_dirty_ms": round(age, 3),
+                "flushes": flushes,
+                "failed_flushes": self.stats.failures,
+                "flushed_writes": self.stats.flushed_writes,
+                "last_flush_ms": round(self.stats.last_flush_ms, 3),
+                "max_flush_ms": round(self.stats.max_flush_ms, 3),
+                "avg_flush_ms": round(self.stats.total_flush_ms / flushes, 3) if flushes else 0.0,
+                "max_delay_s": self._max_delay,
+                "max_dirty": self._max_dirty,
+            }
+
+    @contextmanager
+    def _file_lock(self, shared: bool = False) -> Iterator[None]:
+        """
+        Hold the lock that orders read-merge-write flushes of all processes;
+        ``shared`` for reads, which only need to keep flushes out.
+        """
+        if self._path is None or fcntl is None:
+            yield
+            return
+        with open(f"{self._path}.flush.lock", "a+", encoding="utf-8") as handle:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+    def _signature(self) -> Optional[Signature]:
+        if self._path is None:
+            return None
+        try:
+            stat = os.stat(self._path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    # Background flusher
+    def _run(self) -> None:
+        while True:
+            with self._state:
+                if self._closed:
+                    return
+                if not self._flush_due():
+                    self._state.wait(timeout=self._wait_time())
+                    continue
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Background database flush failed")
+                with self._state:
+                    # Back off instead of spinning on a broken storage.
+                    self._state.wait(timeout=max(self._max_delay, 1.0))
+
+    def _flush_due(self) -> bool:
+        if not self._cache_modified_count:
+            return False
+        if self._cache_modified_count >= self._max_dirty:
+            return True
+        if self._max_delay > 0 and self._first_dirty_at is not None:
+            return monotonic() - self._first_dirty_at >= self._max_delay
+        return False
+
+    def _wait_time(self) -> Optional[float]:
+        if self._max_delay <= 0 or self._first_dirty_at is None:
+            return None
+        return max(0.0, self._first_dirty_at + self._max_delay - monotonic())
@@ -0,0 +1,581 @@
+from __future__ import annotations
+
+import heapq
+from itertools import chain
+from threading import RLock
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    MutableMapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from tinydb.queries import QueryLike
+from tinydb.table import Document, Table
+
+from .filters import OP_IN, Condition, all_match, plan
+from .instrumentation import count_scanned
+from .observers import (
+    OP_INSERT,
+    OP_REMOVE,
+    OP_TRUNCATE,
+    OP_UPDATE,
+    Change,
+    written_fields,
+)
+
+IndexKey = Tuple[str, ...]
+
+_MISSING = object()
+
+
+def normalize_index(fields: Union[str, Sequence[str]]) -> IndexKey:
+    if isinstance(fields, str):
+        return (fields,)
+    return tuple(fields)
+
+
+def matches(document: Mapping[str, Any], where: Mapping[str, Any]) -> bool:
+    """Return True when every ``field == value`` pair holds for the document."""
+    return all(document.get(field, _MISSING) == value for field, value in where.items())
+
+
+def order_key(values: Iterable[Any]) -> Tuple[Tuple[bool, Any], ...]:
+    """Sort key for a tuple of field values; ``None`` sorts before anything else."""
+    return tuple((value is not None, value) for value in values)
+
+
+def document_order_key(
+    document: Mapping[str, Any], fields: Sequence[str]
+) -> Tuple[Tuple[bool, Any], ...]:
+    return order_key(document.get(field) for field in fields)
+
+
+def sort_page(
+    documents: Iterable[Document],
+    order_by: Sequence[str],
+    *,
+    after: Optional[Sequence[Any]] = None,
+    limit: Optional[int] = None,
+) -> List[Document]:
+    """Sort ``documents`` by ``order_by`` and cut the page after the key ``after``."""
+    if after is not None:
+        bound = order_key(after)
+        documents = [
+            document for document in documents if document_order_key(document, order_by) > bound
+        ]
+
+    def key(document: Document) -> Tuple[Tuple[bool, Any], ...]:
+        return document_order_key(document, order_by)
+
+    if limit is None:
+        return sorted(documents, key=key)
+    return heapq.nsmallest(limit, documents, key=key)
+
+
+class HashIndex:
+    """Maps the values of one or more fields to the matching document ids."""
+
+    def __init__(self, fields: IndexKey) -> None:
+        self.fields = fields
+        self._entries: Dict[Tuple[Any, ...], Dict[int, None]] = {}
+        self._keys: Dict[int, Tuple[Any, ...]] = {}
+
+    def key_for(self, document: Mapping[str, Any]) -> Optional[Tuple[Any, ...]]:
+        values = tuple(document.get(field, _MISSING) for field in self.fields)
+        if any(value is _MISSING for value in values):
+            return None
+        try:
+            hash(values)
+        except TypeError:
+            return None
+        return values
+
+    def add(self, doc_id: int, document: Mapping[str, Any]) -> None:
+        key = self.key_for(document)
+        if self._keys.get(doc_id, _MISSING) == key:
+            return
+        self.discard(doc_id)
+        if key is None:
+            return
+        self._entries.setdefault(key, {})[doc_id] = None
+        self._keys[doc_id] = key
+
+    def discard(self, doc_id: int) -> None:
+        key = self._keys.pop(doc_id, None)
+        if key is None:
+            return
+        bucket = self._entries.get(key)
+        if bucket is not None:
+            bucket.pop(doc_id, None)
+            if not bucket:
+                del self._entries[key]
+
+    def lookup(self, key: Tuple[Any, ...]) -> List[int]:
+        bucket = self._entries.get(key)
+        if not bucket:
+            return []
+        # Keep TinyDB's document order (ascending ids) for callers.
+        return sorted(bucket)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._keys.clear()
+
+
+class UndoLog:
+    """
+    What an open transaction needs to undo its writes to one table: the
+    previous value of every document it wrote (``None`` for documents it
+    inserted), keyed by raw document id. A write that cannot name its
+    documents (a query-based update or remove, a truncate) copies the whole
+    table once instead; documents saved before that still hold the older
+    value and are applied on top of the copy.
+    """
+
+    __slots__ = ("documents", "table")
+
+    def __init__(self) -> None:
+        self.documents: Dict[str, Optional[Dict[str, Any]]] = {}
+        self.table: Optional[Dict[str, Dict[str, Any]]] = None
+
+    def __len__(self) -> int:
+        """Documents copied into the log."""
+        saved = sum(1 for document in self.documents.values() if document is not None)
+        return saved + (len(self.table) if self.table is not None else 0)
+
+
+class IndexedTable:
+    """
+    TinyDB table wrapper that keeps secondary hash indexes in sync.
+
+    Writes go through the wrapped table and then update every declared index
+    for the affected documents, so ``find``/``find_one`` resolve equality
+    lookups without scanning the table. The plain TinyDB ``Query`` API is
+    still available and behaves exactly as before.
+
+    ``before_write`` is called before every write and may return the
+    :class:`UndoLog` of an open transaction; the table then saves the
+    documents the write is about to change into it, so :meth:`rollback`
+    only restores those. ``after_write`` receives a :class:`Change` for
+    every write that touched documents, before the table lock is released.
+    """
+
+    def __init__(
+        self,
+        table: Table,
+        lock: RLock,
+        *,
+        refresh: Optional[Callable[[], Any]] = None,
+        before_write: Optional[Callable[["IndexedTable"], Optional[UndoLog]]] = None,
+        after_write: Optional[Callable[[Change], Any]] = None,
+    ) -> None:
+        self._table = table
+        self._lock = lock
+        self._refresh = refresh
+        self._before_write = before_write
+        self._after_write = after_write
+        self._indexes: Dict[IndexKey, HashIndex] = {}
+        self._built = False
+
+    @property
+    def name(self) -> str:
+        return self._table.name
+
+    @property
+    def indexes(self) -> Tuple[IndexKey, ...]:
+        return tuple(self._indexes)
+
+    def ensure_index(self, fields: Union[str, Sequence[str]]) -> None:
+        key = normalize_index(fields)
+        with self._lock:
+            if key in self._indexes:
+                return
+            index = HashIndex(key)
+            if self._built:
+                for document in self._table:
+                    index.add(document.doc_id, document)
+            self._indexes[key] = index
+
+    def reset_indexes(self) -> None:
+        """Drop index contents so they are rebuilt from storage on next use."""
+        with self._lock:
+            for index in self._indexes.values():
+                index.clear()
+            self._built = False
+
+    def reload(self) -> None:
+        """Forget everything derived from the table after storage replaced it."""
+        with self._lock:
+            self.reset_indexes()
+            self._table.clear_cache()
+            # TinyDB caches the next document id; another process may have
+            # used it already.
+            self._table._next_id = None
+
+    def rollback(self, undo: UndoLog) -> None:
+        """Put back what :class:`UndoLog` ``undo`` saved, in one write."""
+        id_class = self._table.document_id_class
+
+        def replace(table: Dict[int, Any]) -> None:
+            if undo.table is not None:
+                table.clear()
+                table.update((id_class(doc_id), dict(doc)) for doc_id, doc in undo.table.items())
+            for doc_id, document in undo.documents.items():
+                if document is None:
+                    table.pop(id_class(doc_id), None)
+                else:
+                    table[id_class(doc_id)] = dict(document)
+
+        with self._lock:
+            if undo.table is None and not undo.documents:
+                return
+            self._table._update_table(replace)
+            # Inserts may have been rolled back: let TinyDB recompute the next id.
+            self._table._next_id = None
+            if undo.table is not None:
+                self.reset_indexes()
+            else:
+                self._index_documents(id_class(doc_id) for doc_id in undo.documents)
+
+    # Index-backed lookups
+    def find(self, **where: Any) -> List[Document]:
+        self._maybe_refresh()
+        with self._lock:
+            return list(self._iter_where(where))
+
+    def find_one(self, **where: Any) -> Optional[Document]:
+        self._maybe_refresh()
+        with self._lock:
+            doc_ids = self._candidate_ids(where)
+            if doc_ids is None:
+                scanned = 0
+                for document in self._table:
+                    scanned += 1
+                    if matches(document, where):
+                        break
+                else:
+                    document = None
+                count_scanned(scanned)
+                return document
+            for doc_id in doc_ids:
+                count_scanned(1)
+                document = self._table.get(doc_id=doc_id)
+                if document is not None and matches(document, where):
+                    return document
+            return None
+
+    def find_many(self, field: str, values: Iterable[Any], **where: Any) -> List[Document]:
+        """
+        Documents whose ``field`` is one of ``values`` (and that match
+        ``where``), in no particular order. With an index on ``field`` this
+        is one probe per distinct value.
+        """
+        wanted = tuple(dict.fromkeys(values))
+        if not wanted:
+            return []
+        self._maybe_refresh()
+        with self._lock:
+            return list(self._select((Condition(field, OP_IN, wanted),), where))
+
+    def find_page(
+        self,
+        order_by: Sequence[str],
+        *,
+        after: Optional[Sequence[Any]] = None,
+        limit: Optional[int] = None,
+        conditions: Sequence[Condition] = (),
+        **where: Any,
+    ) -> List[Document]:
+        """
+        Documents matching ``where`` and ``conditions``, sorted by the
+        ``order_by`` fields.
+
+        ``after`` is the ``order_by`` values of the last document of the
+        previous page; only documents sorting strictly after it are returned,
+        at most ``limit`` of them. Candidates are streamed into the page, so
+        non-matching documents are never collected.
+        """
+        self._maybe_refresh()
+        with self._lock:
+            documents = self._select(conditions, where)
+            return sort_page(documents, order_by, after=after, limit=limit)
+
+    def count_where(self, *, conditions: Sequence[Condition] = (), **where: Any) -> int:
+        self._maybe_refresh()
+        with self._lock:
+            return sum(1 for _ in self._select(conditions, where))
+
+    def update_where(
+        self,
+        fields: Union[Mapping, Callable[[MutableMapping], None]],
+        **where: Any,
+    ) -> List[int]:
+        with self._lock:
+            doc_ids = [document.doc_id for document in self.find(**where)]
+            if not doc_ids:
+                return []
+            return self.update(fields, doc_ids=doc_ids)
+
+    def remove_where(self, **where: Any) -> List[int]:
+        with self._lock:
+            doc_ids = [document.doc_id for document in self.find(**where)]
+            if not doc_ids:
+                return []
+            return self.remove(doc_ids=doc_ids)
+
+    # TinyDB Table API
+    def all(self) -> List[Document]:
+        self._maybe_refresh()
+        with self._lock:
+            documents = self._table.all()
+            count_scanned(len(documents))
+            return documents
+
+    def __iter__(self) -> Iterator[Document]:
+        return iter(self.all())
+
+    def __len__(self) -> int:
+        self._maybe_refresh()
+        with self._lock:
+            return len(self._table)
+
+    def search(self, cond: QueryLike) -> List[Document]:
+        self._maybe_refresh()
+        with self._lock:
+            count_scanned(len(self._table))
+            return self._table.search(cond)
+
+    def get(
+        self,
+        cond: Optional[QueryLike] = None,
+        doc_id: Optional[int] = None,
+        doc_ids: Optional[List[int]] = None,
+    ) -> Union[Optional[Document], List[Document]]:
+        self._maybe_refresh()
+        with self._lock:
+            if doc_id is None and doc_ids is not None:
+                # TinyDB walks the whole table for doc_ids; probe them one by one.
+                count_scanned(len(doc_ids))
+                documents = (self._table.get(doc_id=i) for i in doc_ids)
+                return [document for document in documents if document is not None]
+            if doc_id is not None:
+                count_scanned(1)
+                return self._table.get(doc_id=doc_id)
+            if cond is None:
+                raise RuntimeError("You have to pass either cond or doc_id or doc_ids")
+            count_scanned(len(self._table))
+            return self._table.get(cond)
+
+    def contains(
+        self, cond: Optional[QueryLike] = None, doc_id: Optional[int] = None
+    ) -> bool:
+        self._maybe_refresh()
+        with self._lock:
+            count_scanned(1 if doc_id is not None else len(self._table))
+            return self._table.contains(cond=cond, doc_id=doc_id)
+
+    def count(self, cond: QueryLike) -> int:
+        self._maybe_refresh()
+        with self._lock:
+            count_scanned(len(self._table))
+            return self._table.count(cond)
+
+    def insert(self, document: Mapping) -> int:
+        self._maybe_refresh()
+        with self._lock:
+            undo = self._notify_write(())
+            doc_id = self._table.insert(document)
+            self._save_inserted(undo, [doc_id])
+            self._index_documents([doc_id])
+            self._notify_change(OP_INSERT, [doc_id], written_fields([document]))
+            return doc_id
+
+    def insert_multiple(self, documents: Iterable[Mapping]) -> List[int]:
+        self._maybe_refresh()
+        with self._lock:
+            undo = self._notify_write(())
+            documents = list(documents)
+            doc_ids = self._table.insert_multiple(documents)
+            self._save_inserted(undo, doc_ids)
+            self._index_documents(doc_ids)
+            self._notify_change(OP_INSERT, doc_ids, written_fields(documents))
+            return doc_ids
+
+    def update(
+        self,
+        fields: Union[Mapping, Callable[[MutableMapping], None]],
+        cond: Optional[QueryLike] = None,
+        doc_ids: Optional[Iterable[int]] = None,
+    ) -> List[int]:
+        self._maybe_refresh()
+        with self._lock:
+            if doc_ids is not None:
+                doc_ids = list(doc_ids)
+            self._notify_write(doc_ids)
+            count_scanned(len(doc_ids) if doc_ids is not None else len(self._table))
+            updated = self._table.update(fields, cond=cond, doc_ids=doc_ids)
+            self._index_documents(updated)
+            self._notify_change(OP_UPDATE, updated, written_fields([fields]))
+            return updated
+
+    def upsert(self, document: Mapping, cond: Optional[QueryLike] = None) -> List[int]:
+        self._maybe_refresh()
+        with self._lock:
+            known = getattr(document, "doc_id", None) if cond is None else None
+            undo = self._notify_write(None if known is None else [known])
+            count_scanned(1 if cond is None else len(self._table))
+            size = len(self._table)
+            doc_ids = self._table.upsert(document, cond=cond)
+            if len(self._table) > size:
+                self._save_inserted(undo, doc_ids)
+            self._index_documents(doc_ids)
+            op = OP_INSERT if len(self._table) > size else OP_UPDATE
+            self._notify_change(op, doc_ids, written_fields([document]))
+            return doc_ids
+
+    def remove(
+        self,
+        cond: Optional[QueryLike] = None,
+        doc_ids: Optional[Iterable[int]] = None,
+    ) -> List[int]:
+        self._maybe_refresh()
+        with self._lock:
+            if doc_ids is not None:
+                doc_ids = list(doc_ids)
+            self._notify_write(doc_ids)
+            count_scanned(len(doc_ids) if doc_ids is not None else len(self._table))
+            removed = self._table.remove(cond=cond, doc_ids=doc_ids)
+            if self._built:
+                for doc_id in removed:
+                    for index in self._indexes.values():
+                        index.discard(doc_id)
+            self._notify_change(OP_REMOVE, removed, None)
+            return removed
+
+    def truncate(self) -> None:
+        with self._lock:
+            self._notify_write(None)
+            self._table.truncate()
+            for index in self._indexes.values():
+                index.clear()
+            if self._after_write is not None:
+                self._after_write(Change(self.name, OP_TRUNCATE, ()))
+
+    def clear_cache(self) -> None:
+        with self._lock:
+            self._table.clear_cache()
+
+    # Helpers
+    def _maybe_refresh(self) -> None:
+        if self._refresh is not None:
+            self._refresh()
+
+    def _notify_write(self, doc_ids: Optional[Sequence[int]]) -> Optional[UndoLog]:
+        """
+        Announce a write to ``doc_ids`` (``None``: documents not known in
+        advance) and save their current value into the transaction's undo log.
+        """
+        if self._before_write is None:
+            return None
+        undo = self._before_write(self)
+        if undo is None or undo.table is not None:
+            return undo
+        raw = self._table._read_table()
+        if doc_ids is None:
+            undo.table = {doc_id: dict(document) for doc_id, document in raw.items()}
+            return undo
+        for doc_id in map(str, doc_ids):
+            if doc_id not in undo.documents:
+                document = raw.get(doc_id)
+                undo.documents[doc_id] = None if document is None else dict(document)
+        return undo
+
+    @staticmethod
+    def _save_inserted(undo: Optional[UndoLog], doc_ids: Iterable[int]) -> None:
+        # Inserted documents did not exist before; rolling back removes them.
+        if undo is not None and undo.table is None:
+            for doc_id in map(str, doc_ids):
+                undo.documents.setdefault(doc_id, None)
+
+    def _notify_change(
+        self, op: str, doc_ids: Sequence[int], fields: Optional[FrozenSet[str]]
+    ) -> None:
+        if self._after_write is not None and doc_ids:
+            self._after_write(Change(self.name, op, tuple(doc_ids), fields))
+
+    def _build(self) -> None:
+        if self._built:
+            return
+        for document in self._table:
+            for index in self._indexes.values():
+                index.add(document.doc_id, document)
+        self._built = True
+
+    def _index_documents(self, doc_ids: Iterable[int]) -> None:
+        if not self._built or not self._indexes:
+            return
+        for doc_id in doc_ids:
+            document = self._table.get(doc_id=doc_id)
+            for index in self._indexes.values():
+                if document is None:
+                    index.discard(doc_id)
+                else:
+                    index.add(doc_id, document)
+
+    def _iter_where(self, where: Mapping[str, Any]) -> Iterator[Document]:
+        doc_ids = self._candidate_ids(where)
+        document: Optional[Document]
+        if doc_ids is None:
+            count_scanned(len(self._table))
+            for document in self._table:
+                if matches(document, where):
+                    yield document
+            return
+        count_scanned(len(doc_ids))
+        for doc_id in doc_ids:
+            document = self._table.get(doc_id=doc_id)
+            if document is not None and matches(document, where):
+                yield document
+
+    def _select(
+        self, conditions: Sequence[Condition], where: Mapping[str, Any]
+    ) -> Iterator[Document]:
+        """Stream the documents matching ``where`` and ``conditions``, following :func:`plan`."""
+        query_plan = plan(conditions, where, tuple(self._indexes))
+        if query_plan.expand is None:
+            candidates: Iterable[Document] = self._iter_where(query_plan.where)
+        else:
+            field = query_plan.expand.field
+            candidates = chain.from_iterable(
+                self._iter_where({**query_plan.where, field: value})
+                for value in dict.fromkeys(query_plan.expand.value)
+            )
+        for document in candidates:
+            if all_match(document, query_plan.residual):
+                yield document
+
+    def _candidate_ids(self, where: Mapping[str, Any]) -> Optional[List[int]]:
+        """Resolve ``where`` through the most specific usable index, if any."""
+        best: Optional[HashIndex] = None
+        for fields, index in self._indexes.items():
+            if set(fields) <= where.keys() and (best is None or len(fields) > len(best.fields)):
+                best = index
+        if best is None:
+            return None
+        key = tuple(where[field] for field in best.fields)
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        self._build()
+        return best.lookup(key)
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from threading import Lock, local
+from time import perf_counter, time
+from typing import TYPE_CHECKING, Any, Callable, Deque, Dict, cast
+
+from fastapi import APIRouter, Request
+
+if TYPE_CHECKING:
+    from .database import DatabaseManager
+
+logger = logging.getLogger("shared.storage.slow")
+
+# Table methods timed by InstrumentedTable; everything else passes through.
+INSTRUMENTED_OPERATIONS = frozenset(
+    {
+        "all",
+        "contains",
+        "count",
+        "count_where",
+        "find",
+        "find_many",
+        "find_one",
+        "find_page",
+        "get",
+        "insert",
+        "insert_multiple",
+        "remove",
+        "remove_where",
+        "search",
+        "truncate",
+        "update",
+        "update_where",
+        "upsert",
+    }
+)
+
+_current = local()
+
+
+class _Operation:
+    __slots__ = ("scanned",)
+
+    def __init__(self) -> None:
+        self.scanned = 0
+
+
+def count_scanned(documents: int) -> None:
+    """Record ``documents`` examined by the operation running on this thread."""
+    operation = getattr(_current, "operation", None)
+    if operation is not None:
+        operation.scanned += documents
+
+
+@dataclass
+class OperationStats:
+    calls: int = 0
+    docs_scanned: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "docs_scanned": self.docs_scanned,
+            "total_ms": round(self.total_ms, 3),
+            "max_ms": round(self.max_ms, 3),
+        }
+
+
+@dataclass
+class TableStats:
+    operations: Dict[str, OperationStats] = field(default_factory=dict)
+
+
+class StorageMetrics:
+    """Per-table operation counters and a log of operations over ``slow_ms``."""
+
+    def __init__(self, slow_ms: float = 50.0, slow_log_size: int = 100) -> None:
+        self.slow_ms = slow_ms
+        self._lock = Lock()
+        self._tables: Dict[str, TableStats] = {}
+        self._slow: Deque[Dict[str, Any]] = deque(maxlen=slow_log_size)
+
+    def record(self, table: str, operation: str, elapsed_ms: float, scanned: int) -> None:
+        with self._lock:
+            stats = self._tables.setdefault(table, TableStats())
+            op = stats.operations.setdefault(operation, OperationStats())
+            op.calls += 1
+            op.docs_scanned += scanned
+            op.total_ms += elapsed_ms
+            op.max_ms = max(op.max_ms, elapsed_ms)
+            if elapsed_ms < self.slow_ms:
+                return
+            self._slow.append(
+                {
+                    "at": time(),
+                    "table": table,
+                    "operation": operation,
+                    "ms": round(elapsed_ms, 3),
+                    "docs_scanned": scanned,
+                }
+            )
+        logger.warning(
+            "Slow storage operation %s.%s: %.1f ms, %d documents scanned",
+            table,
+            operation,
+            elapsed_ms,
+            scanned,
+        )
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            tables = {
+                name: {
+                    "calls": sum(op.calls for op in stats.operations.values()),
+                    "docs_scanned": sum(op.docs_scanned for op in stats.operations.values()),
+                    "total_ms": round(sum(op.total_ms for op in stats.operations.values()), 3),
+                    "operations": {
+                        operation: op.as_dict()
+                        for operation, op in sorted(stats.operations.items())
+                    },
+                }
+                for name, stats in sorted(self._tables.items())
+            }
+            return {
+                "slow_ms": self.slow_ms,
+                "tables": tables,
+                "slow_operations": list(self._slow),
+            }
+
+
+class InstrumentedTable:
+    """Proxy that times the wrapped table's operations into :class:`StorageMetrics`."""
+
+    def __init__(self, table: Any, metrics: StorageMetrics) -> None:
+        self._table = table
+        self._metrics = metrics
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self._table, name)
+        if name not in INSTRUMENTED_OPERATIONS:
+            return attribute
+        return self._timed(name, attribute)
+
+    def __iter__(self) -> Any:
+        return iter(self.all())
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    def _timed(self, operation: str, method: Callable[..., Any]) -> Callable[..., Any]:
+        table_name = cast(str, self._table.name)
+
+        def timed(*args: Any, **kwargs: Any) -> Any:
+            previous = getattr(_current, "operation", None)
+            current = _current.operation = _Operation()
+            started = perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed_ms = (perf_counter() - started) * 1000
+                _current.operation = previous
+                self._metrics.record(table_name, operation, elapsed_ms, current.scanned)
+
+        return timed
+
+
+def storage_metrics_router() -> APIRouter:
+    """
+    ``GET /internal/metrics/storage`` for the app's ``state.db_manager``
+    and its write observers, plus queue depth and wait times of
+    ``state.storage_executor``, the cache statistics of
+    ``state.event_reader``, the lock statistics of
+    ``state.seat_reservations`` and the send statistics of
+    ``state.counter_publisher`` if set.
+    """
+    router = APIRouter(prefix="/internal/metrics", tags=["internal"])
+
+    @router.get("/storage")
+    async def storage_metrics(request: Request) -> Dict[str, Any]:
+        db_manager = cast("DatabaseManager", request.app.state.db_manager)
+        metrics = db_manager.storage_metrics()
+        metrics["observers"] = db_manager.observer_stats()
+        executor = getattr(request.app.state, "storage_executor", None)
+        metrics["executor"] = executor.metrics() if executor is not None else None
+        event_reader = getattr(request.app.state, "event_reader", None)
+        if event_reader is not None:
+            metrics["event_reader"] = event_reader.stats()
+        seat_reservations = getattr(request.app.state, "seat_reservations", None)
+        if seat_reservations is not None:
+            metrics["seat_reservations"] = seat_reservations.stats()
+        counter_publisher = getattr(request.app.state, "counter_publisher", None)
+        if counter_publisher is not None:
+            metrics["event_counters"] = counter_publisher.stats()
+        return metrics
+
+    return router
+
@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import logging
+import os
+from pathlib import Path
+from threading import Lock, Thread
+from typing import Any, Dict, IO, List, Optional, Union
+
+from tinydb.storages import Storage
+
+from .serialization import DecodeError, dumps, loads
+
+logger = logging.getLogger(__name__)
+
+Tables = Dict[str, Dict[str, Dict[str, Any]]]
+
+JOURNAL_SUFFIX = ".journal"
+COMPACTING_SUFFIX = ".journal.compacting"
+
+
+class JournalStorage(Storage):
+    """
+    Log-structured TinyDB storage.
+
+    The database lives in memory; every ``write`` appends one JSON line per
+    inserted, updated or deleted document to ``<path>.journal`` instead of
+    rewriting ``<path>``. On startup the snapshot at ``<path>`` is loaded and
+    the journal replayed on top of it. Once the journal grows past
+    ``compact_threshold`` bytes it is rotated and a background thread writes
+    a fresh snapshot, after which the rotated journal is discarded.
+
+    TinyDB hands the full database to ``write``; changes are found by
+    comparing the touched tables against the last written state, so the
+    bytes written depend on the change only. Untouched tables are skipped by
+    identity, since TinyDB only replaces the table it modified.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        *,
+        compact_threshold: int = 4 * 1024 * 1024,
+        fsync: bool = False,
+    ) -> None:
+        super().__init__()
+        self._path = Path(path)
+        self._journal_path = self._path.with_name(self._path.name + JOURNAL_SUFFIX)
+        self._compacting_path = self._path.with_name(self._path.name + COMPACTING_SUFFIX)
+        self._compact_threshold = compact_threshold
+        self._fsync = fsync
+        self._lock = Lock()
+        self._compactor: Optional[Thread] = None
+
+        self._data: Tables = self._load()
+        self._tables: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._written: Tables = {}
+        self._remember(self._data)
+
+        self._journal: IO[str] = open(self._journal_path, "a", encoding="utf-8")
+        self._journal_size = self._journal_path.stat().st_size
+
+    # Storage API
+    def read(self) -> Optional[Tables]:
+        return self._data
+
+    def write(self, data: Tables) -> None:
+        with self._lock:
+            self._data = data
+            records = self._sync(data)
+            if records:
+                self._append(records)
+            if self._journal_size >= self._compact_threshold and self._compactor is None:
+                self._start_compaction()
+
+    def close(self) -> None:
+        with self._lock:
+            compactor = self._compactor
+        if compactor is not None:
+            compactor.join()
+        with self._lock:
+            self._journal.close()
+
+    # Public helpers
+    @property
+    def journal_size(self) -> int:
+        return self._journal_size
+
+    def compact(self) -> None:
+        """Rotate the journal and write a snapshot synchronously."""
+        while True:
+            with self._lock:
+                running = self._compactor
+                if running is None:
+                    compactor = self._start_compaction()
+                    break
+            running.join()
+        compactor.join()
+
+    # Loading
+    def _load(self) -> Tables:
+        data: Tables = {}
+        if self._path.exists() and self._path.stat().st_size:
+            with open(self._path, "r", encoding="utf-8") as handle:
+                data = loads(handle.read())
+        # A leftover rotated journal means the last compaction did not finish;
+        # replaying it is safe because records are idempotent.
+        for journal in (self._compacting_path, self._journal_path):
+            if journal.exists():
+                self._replay(journal, data)
+        return data
+
+    @staticmethod
+    def _replay(journal: Path, data: Tables) -> None:
+        with open(journal, "r", encoding="utf-8") as handle:
+            for line_number, line in enumerate(handle, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = loads(line)
+                except DecodeError:
+                    # A torn trailing line is what a crash mid-append leaves.
+                    logger.warning("Ignoring unreadable record %s in %s", line_number, journal)
+                    continue
+                _apply(record, data)
+
+    # Writing
+    def _sync(self, data: Tables) -> List[Dict[str, Any]]:
+        """Diff ``data`` against the last written state and record the changes."""
+        records: List[Dict[str, Any]] = []
+        for name in self._written.keys() - data.keys():
+            records.append({"op": "drop", "table": name})
+            del self._written[name]
+            self._tables.pop(name, None)
+
+        for name, table in data.items():
+            if self._tables.get(name) is table:
+                continue
+            written = self._written.setdefault(name, {})
+            for doc_id, document in table.items():
+                previous = written.get(doc_id)
+                if previous is None:
+                    records.append(
+                        {"op": "insert", "table": name, "id": doc_id, "doc": document}
+                    )
+                elif previous != document:
+                    record: Dict[str, Any] = {
+                        "op": "update",
+                        "table": name,
+                        "id": doc_id,
+                        "fields": {
+                            key: value
+                            for key, value in document.items()
+                            if key not in previous or previous[key] != value
+                        },
+                    }
+                    removed = [key for key in previous if key not in document]
+                    if removed:
+                        record["removed"] = removed
+                    records.append(record)
+                else:
+                    continue
+                # Copies, because TinyDB mutates documents in place on update.
+                written[doc_id] = dict(document)
+            for doc_id in written.keys() - table.keys():
+                records.append({"op": "delete", "table": name, "id": doc_id})
+                del written[doc_id]
+            self._tables[name] = table
+        return records
+
+    def _remember(self, data: Tables) -> None:
+        for name, table in data.items():
+            self._written[name] = {doc_id: dict(doc) for doc_id, doc in table.items()}
+            self._tables[name] = table
+
+    def _append(self, records: List[Dict[str, Any]]) -> None:
+        payload = "".join(dumps(record) + "\n" for record in records)
+        self._journal.write(payload)
+        self._journal.flush()
+        if self._fsync:
+            os.fsync(self._journal.fileno())
+        self._journal_size += len(payload.encode("utf-8"))
+
+    # Compaction
+    def _start_compaction(self) -> Thread:
+        snapshot = {name: dict(table) for name, table in self._written.items()}
+        self._journal.close()
+        if self._compacting_path.exists():
+            # A previous compaction failed: keep its records ahead of ours.
+            with open(self._compacting_path, "a", encoding="utf-8") as target:
+                target.write(self._journal_path.read_text(encoding="utf-8"))
+            self._journal_path.unlink()
+        else:
+            os.replace(self._journal_path, self._compacting_path)
+        self._journal = open(self._journal_path, "a", encoding="utf-8")
+        self._journal_size = 0
+
+        compactor = Thread(
+            target=self._write_snapshot,
+            args=(snapshot,),
+            name=f"journal-compactor-{self._path.name}",
+            daemon=True,
+        )
+        self._compactor = compactor
+        compactor.start()
+        return compactor
+
+    def _write_snapshot(self, snapshot: Tables) -> None:
+        try:
+            temporary = self._path.with_name(self._path.name + ".tmp")
+            with open(temporary, "w", encoding="utf-8") as handle:
+                handle.write(dumps(snapshot))
+                handle.flush()
+                os.fsync(handle.fileno())
+            os.replace(temporary, self._path)
+            self._compacting_path.unlink()
+        except OSError:
+            logger.exception("Journal compaction failed for %s", self._path)
+        finally:
+            with self._lock:
+                self._compactor = None
+
+
+def _apply(record: Dict[str, Any], data: Tables) -> None:
+    op = record.get("op")
+    name = record.get("table")
+    if not isinstance(name, str):
+        return
+    if op == "drop":
+        data.pop(name, None)
+        return
+
+    table = data.setdefault(name, {})
+    doc_id = str(record.get("id"))
+    if op == "insert":
+        table[doc_id] = dict(record["doc"])
+    elif op == "update":
+        document = table.setdefault(doc_id, {})
+        document.update(record.get("fields", {}))
+        for key in record.get("removed", []):
+            document.pop(key, None)
+    elif op == "delete":
+        table.pop(doc_id, None)
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import hashlib
+import hmac
 from typing import Awaitable, Callable, Iterable, Sequence
 
 from fastapi import Depends, Header
@@ -10,6 +12,26 @@ from .jwt_validator import decode_jwt
 from .models import User, UserRole
 
 
+# Header carrying the credential of service-to-service calls to /internal/*.
+SERVICE_TOKEN_HEADER = "X-Service-Token"
+
+
+def service_token(settings: Settings) -> str:
+    """Credential the services present to each other, derived from ``JWT_SECRET``."""
+    return hmac.new(settings.jwt_secret.encode(), b"internal-service", hashlib.sha256).hexdigest()
+
+
+async def require_service(
+    x_service_token: str | None = Header(default=None),
+    settings: Settings = Depends(get_settings),
+) -> None:
+    """FastAPI dependency for service-to-service endpoints; users' tokens do not pass."""
+    if x_service_token is None or not hmac.compare_digest(
+        x_service_token, service_token(settings)
+    ):
+        raise UnauthorizedError("Missing or invalid service credential")
+
+
 def _extract_bearer_token(authorization: str | None) -> str:
     if not authorization:
         raise UnauthorizedError("Missing Authorization header")
@@ -69,6 +69,8 @@ class Project(BaseModel):
     created_by: str
     submitted_at: Optional[datetime] = None
     created_at: datetime
+    # Incremented on every update; the project's ETag is derived from it.
+    version: int = 0
 
 
 class ParticipantStatus(str, Enum):
@@ -88,6 +90,8 @@ class Participant(BaseModel):
     status: ParticipantStatus
     registered_at: datetime
     profile_complete: bool = False
+    # Incremented on every update.
+    version: int = 0
 
 
 class Message(BaseModel):
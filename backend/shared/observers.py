@@ -0,0 +1,148 @@
+"""
+Write observers: callbacks told about committed changes to a table.
+
+:meth:`DatabaseManager.observe` registers a callback for one table. Every
+insert, update, upsert, remove and truncate made through this process's
+tables produces a :class:`Change`; inside ``db_manager.transaction()`` the
+changes are held back until the outermost transaction commits and dropped
+if it rolls back. Writes other processes make are not observed: they show
+up as :meth:`DatabaseManager.external_version` changes instead.
+
+Synchronous observers run on the writing thread, possibly while the table
+lock is still held, so they must be quick and must not write to storage.
+``asynchronous=True`` observers are called in order from one background
+thread instead. Exceptions raised by observers are logged and counted; the
+write itself has already happened.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from queue import Queue
+from threading import Lock, Thread
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+OP_INSERT = "insert"
+OP_UPDATE = "update"
+OP_REMOVE = "remove"
+OP_TRUNCATE = "truncate"
+
+
+@dataclass(frozen=True)
+class Change:
+    table: str
+    op: str
+    doc_ids: Tuple[int, ...]
+    # Top-level fields written; ``None`` when unknown or the whole document
+    # (callable updates, removes and truncates).
+    fields: Optional[FrozenSet[str]] = None
+
+    def touches(self, *fields: str) -> bool:
+        """Whether the change may have modified any of ``fields``."""
+        return self.fields is None or not self.fields.isdisjoint(fields)
+
+
+def written_fields(documents: Iterable[Any]) -> Optional[FrozenSet[str]]:
+    """Keys of mappings written to a table; ``None`` when one of them is a callable."""
+    fields: set = set()
+    for document in documents:
+        if callable(document):
+            return None
+        fields.update(document)
+    return frozenset(fields)
+
+
+Observer = Callable[[Change], None]
+
+# Sentinel queued by close() to stop the delivery thread.
+_STOP = None
+
+
+class ObserverRegistry:
+    """Observers per table and their delivery; owned by :class:`DatabaseManager`."""
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        # table -> [(observer, asynchronous)]
+        self._observers: Dict[str, List[Tuple[Observer, bool]]] = {}
+        self._queue: "Queue[Optional[Tuple[Observer, Change]]]" = Queue()
+        self._thread: Optional[Thread] = None
+        self._delivered = 0
+        self._errors = 0
+
+    def register(
+        self, table: str, observer: Observer, *, asynchronous: bool = False
+    ) -> Callable[[], None]:
+        """Add ``observer`` for ``table``; returns a function that removes it again."""
+        entry = (observer, asynchronous)
+        with self._lock:
+            self._observers.setdefault(table, []).append(entry)
+            if asynchronous and self._thread is None:
+                self._thread = Thread(target=self._run, name="db-observers", daemon=True)
+                self._thread.start()
+
+        def unregister() -> None:
+            with self._lock:
+                entries = self._observers.get(table, [])
+                if entry in entries:
+                    entries.remove(entry)
+
+        return unregister
+
+    def observed(self, table: str) -> bool:
+        return bool(self._observers.get(table))
+
+    def publish(self, changes: Iterable[Change]) -> None:
+        for change in changes:
+            with self._lock:
+                entries = list(self._observers.get(change.table, ()))
+            for observer, asynchronous in entries:
+                if asynchronous:
+                    self._queue.put((observer, change))
+                else:
+                    self._deliver(observer, change)
+
+    def drain(self) -> None:
+        """Wait until every queued asynchronous notification was delivered."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "observers": sum(len(entries) for entries in self._observers.values()),
+                "queued": self._queue.qsize(),
+                "delivered": self._delivered,
+                "errors": self._errors,
+            }
+
+    def close(self) -> None:
+        thread = self._thread
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join(timeout=5)
+            self._thread = None
+
+    def _deliver(self, observer: Observer, change: Change) -> None:
+        try:
+            observer(change)
+        except Exception:
+            logger.exception("Observer of table %s failed", change.table)
+            with self._lock:
+                self._errors += 1
+        else:
+            with self._lock:
+                self._delivered += 1
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is _STOP:
+                    return
+                self._deliver(*item)
+            finally:
+                self._queue.task_done()
@@ -0,0 +1,71 @@
+"""
+Keyset pagination for list endpoints.
+
+A cursor is the sort key of the last record on the previous page, encoded as
+URL-safe base64 JSON. Repositories pass the decoded key to
+``table.find_page(order_by, after=..., limit=...)``, which only returns the
+requested page.
+"""
+
+from __future__ import annotations
+
+import base64
+from dataclasses import dataclass
+from typing import Any, Dict, Generic, List, Mapping, Optional, Sequence, Tuple, TypeVar
+
+from .errors import ValidationError
+from .fieldsets import Fields, select_fields
+from .serialization import DecodeError, dumps, loads
+
+T = TypeVar("T")
+
+# Upper bound for the ``limit`` query parameter.
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(key: Sequence[Any]) -> str:
+    raw = dumps(list(key)).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], order_by: Sequence[str]) -> Optional[Tuple[Any, ...]]:
+    """Sort key encoded in ``cursor``; raises ``ValidationError`` if it is not one for ``order_by``."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key = loads(raw)
+    except DecodeError:
+        raise ValidationError("Invalid cursor") from None
+    if not isinstance(key, list) or len(key) != len(order_by):
+        raise ValidationError("Invalid cursor")
+    return tuple(key)
+
+
+@dataclass
+class Page(Generic[T]):
+    """One page of results plus the cursor of the next page (``None`` on the last one)."""
+
+    items: List[T]
+    next_cursor: Optional[str]
+
+
+def page_of(
+    records: Sequence[Mapping[str, Any]],
+    order_by: Sequence[str],
+    limit: Optional[int],
+    *,
+    fields: Optional[Fields] = None,
+) -> Page[Dict[str, Any]]:
+    """
+    Cut ``records`` (sorted by ``order_by``, fetched with ``limit + 1``) to
+    ``limit`` and derive the next cursor from the last record kept. Items are
+    copies, reduced to ``fields`` when given.
+    """
+    next_cursor = None
+    if limit is not None and len(records) > limit:
+        records = records[:limit]
+        last = records[-1]
+        next_cursor = encode_cursor([last.get(field) for field in order_by])
+    return Page([select_fields(record, fields) for record in records], next_cursor)
+
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Optional, Tuple
+
+from tinydb.queries import QueryLike
+
+FieldPath = Tuple[str, ...]
+
+_SCALAR_TYPES = (str, int, float)
+
+
+def equality_terms(cond: Optional[QueryLike]) -> Dict[FieldPath, Any]:
+    """
+    Extract the ``field == value`` terms of a TinyDB query.
+
+    Only terms joined by ``&`` are returned, so every document matching the
+    query also matches all returned terms. The result may be incomplete
+    (``|``, ``~`` and comparison operators are ignored), which means callers
+    can use it to narrow candidates but must still evaluate ``cond`` itself.
+    """
+    terms: Dict[FieldPath, Any] = {}
+    if cond is None:
+        return terms
+    _collect(getattr(cond, "_hash", None), terms)
+    return terms
+
+
+def _collect(hashval: Any, terms: Dict[FieldPath, Any]) -> None:
+    if not isinstance(hashval, tuple) or not hashval:
+        return
+
+    operator = hashval[0]
+    if operator == "and":
+        for part in hashval[1]:
+            _collect(part, terms)
+    elif operator == "==" and len(hashval) == 3:
+        path, value = hashval[1], hashval[2]
+        if (
+            isinstance(path, tuple)
+            and path
+            and all(isinstance(key, str) for key in path)
+            and isinstance(value, _SCALAR_TYPES)
+        ):
+            terms[path] = value
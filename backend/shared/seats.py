@@ -0,0 +1,212 @@
+"""
+Per-event seat reservations.
+
+Registrations, approvals and rejections hold an event's reservation while
+they check and change its places. Each event has its own lock, so requests
+for other events never wait on it, and the reservation carries the
+event's count of taken places (pending and approved participants).
+
+Without a directory the lock covers the threads of this process and the
+count is loaded from storage. Given a ``directory`` shared by the
+workers, each event also gets a file there: the lock becomes an ``flock``
+on ``<digest>.seats``, which holds the count, and ``<digest>.users/``
+holds one marker per registered user. Capacity and duplicate checks are
+then exact across processes, whatever each one has seen of the others'
+storage writes.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from threading import Lock
+from time import monotonic, sleep
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+
+from .errors import ServiceUnavailableError
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None  # type: ignore[assignment]
+
+# Poll interval while waiting for a seat file another process holds.
+_FILE_LOCK_POLL = 0.002
+
+
+def _digest(value: str) -> str:
+    return hashlib.blake2b(value.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class Seats:
+    """
+    An event's places while its reservation is held. Changes are written
+    through at once and undone if the block holding the reservation raises.
+    """
+
+    def __init__(
+        self,
+        taken: int,
+        *,
+        save: Optional[Callable[[int], None]] = None,
+        users: Optional[Path] = None,
+    ) -> None:
+        self._taken = self._original = taken
+        self._save = save
+        self._users = users
+        self._claimed: List[Path] = []
+
+    @property
+    def taken(self) -> int:
+        return self._taken
+
+    def change(self, delta: int) -> None:
+        if not delta:
+            return
+        self._taken = max(0, self._taken + delta)
+        if self._save is not None:
+            self._save(self._taken)
+
+    def claim(self, user_id: str) -> bool:
+        """Mark ``user_id`` as registered; ``False`` if a worker already did."""
+        if self._users is None:
+            return True
+        marker = self._users / _digest(user_id)
+        try:
+            os.close(os.open(marker, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644))
+        except FileExistsError:
+            return False
+        self._claimed.append(marker)
+        return True
+
+    def _undo(self) -> None:
+        for marker in self._claimed:
+            marker.unlink(missing_ok=True)
+        if self._taken != self._original and self._save is not None:
+            self._save(self._original)
+
+
+class _Entry:
+    __slots__ = ("lock", "users")
+
+    def __init__(self) -> None:
+        self.lock = Lock()
+        self.users = 0
+
+
+class SeatReservations:
+    """Per-event locks and place counts, optionally shared with other processes."""
+
+    def __init__(
+        self, directory: Optional[Union[str, Path]] = None, *, timeout: float = 0.5
+    ) -> None:
+        if directory is not None and fcntl is None:
+            raise ValueError("Seat files require fcntl (Linux or macOS)")
+        self._directory = Path(directory) if directory is not None else None
+        if self._directory is not None:
+            self._directory.mkdir(parents=True, exist_ok=True)
+        self.timeout = timeout
+        self._guard = Lock()
+        # Only events being held or waited for have an entry.
+        self._entries: Dict[str, _Entry] = {}
+        self._waits = 0
+        self._timeouts = 0
+
+    @contextmanager
+    def hold(self, event_id: str, load: Callable[[], int]) -> Iterator[Seats]:
+        """
+        Hold the event's reservation for the block. ``load`` returns the
+        taken places from storage; with a directory it is only called for
+        an event without a seat file yet. Raises ``ServiceUnavailableError``
+        when the reservation cannot be taken within ``timeout`` seconds, so
+        a burst on one event never ties up a storage thread for long.
+        """
+        deadline = monotonic() + self.timeout
+        with self._guard:
+            entry = self._entries.get(event_id)
+            if entry is None:
+                entry = self._entries[event_id] = _Entry()
+            entry.users += 1
+            if entry.users > 1:
+                self._waits += 1
+        try:
+            if not entry.lock.acquire(timeout=max(0.0, deadline - monotonic())):
+                self._timed_out()
+            try:
+                if self._directory is None:
+                    seats = Seats(load())
+                    with self._undo_on_error(seats):
+                        yield seats
+                else:
+                    with self._seat_file(event_id, load, deadline) as seats:
+                        with self._undo_on_error(seats):
+                            yield seats
+            finally:
+                entry.lock.release()
+        finally:
+            with self._guard:
+                entry.users -= 1
+                if not entry.users:
+                    del self._entries[event_id]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._guard:
+            return {
+                "held": len(self._entries),
+                "waits": self._waits,
+                "timeouts": self._timeouts,
+                "directory": str(self._directory) if self._directory is not None else None,
+            }
+
+    @staticmethod
+    @contextmanager
+    def _undo_on_error(seats: Seats) -> Iterator[None]:
+        try:
+            yield
+        except BaseException:
+            seats._undo()
+            raise
+
+    @contextmanager
+    def _seat_file(
+        self, event_id: str, load: Callable[[], int], deadline: float
+    ) -> Iterator[Seats]:
+        assert self._directory is not None and fcntl is not None
+        name = _digest(event_id)
+        descriptor = os.open(self._directory / f"{name}.seats", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            while True:
+                try:
+                    fcntl.flock(descriptor, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    if monotonic() >= deadline:
+                        self._timed_out()
+                    sleep(_FILE_LOCK_POLL)
+            try:
+                content = os.pread(descriptor, 32, 0).strip()
+
+                def save(taken: int) -> None:
+                    data = str(taken).encode("ascii")
+                    os.pwrite(descriptor, data, 0)
+                    os.ftruncate(descriptor, len(data))
+
+                if content:
+                    taken = int(content)
+                else:
+                    taken = load()
+                    save(taken)
+                users = self._directory / f"{name}.users"
+                users.mkdir(exist_ok=True)
+                yield Seats(taken, save=save, users=users)
+            finally:
+                fcntl.flock(descriptor, fcntl.LOCK_UN)
+        finally:
+            os.close(descriptor)
+
+    def _timed_out(self) -> None:
+        with self._guard:
+            self._timeouts += 1
+        raise ServiceUnavailableError("Too many concurrent requests, please retry")
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import json
+import os
+from io import UnsupportedOperation
+from typing import Any, Dict, Optional, Tuple, Type, Union
+
+from pydantic import BaseModel
+from tinydb.storages import JSONStorage
+
+# Prefer a compiled JSON codec; the stdlib module is the fallback.
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None  # type: ignore[assignment]
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - optional dependency
+    msgspec = None  # type: ignore[assignment]
+
+if orjson is not None:
+    CODEC = "orjson"
+    DecodeError: Tuple[Type[Exception], ...] = (ValueError,)
+elif msgspec is not None:
+    CODEC = "msgspec"
+    DecodeError = (ValueError, msgspec.DecodeError)
+else:
+    CODEC = "json"
+    DecodeError = (ValueError,)
+
+
+def dumps(value: Any) -> str:
+    """Serialize ``value`` to compact JSON text."""
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    if msgspec is not None:
+        return msgspec.json.encode(value).decode("utf-8")
+    return json.dumps(value, separators=(",", ":"))
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    if msgspec is not None:
+        return msgspec.json.decode(data)
+    return json.loads(data)
+
+
+def model_to_record(model: BaseModel) -> Dict[str, Any]:
+    """
+    Convert a model to a JSON-compatible dict ready for storage.
+
+    Same result as ``json.loads(model.json())`` without the round trip
+    through a string.
+    """
+    if hasattr(model, "model_dump"):
+        return model.model_dump(mode="json")
+    return loads(model.json())  # Pydantic v1
+
+
+class FastJSONStorage(JSONStorage):
+    """TinyDB ``JSONStorage`` that reads and writes through :func:`dumps`/:func:`loads`."""
+
+    def __init__(self, path: str, encoding: Optional[str] = "utf-8", **kwargs: Any) -> None:
+        super().__init__(path, encoding=encoding, **kwargs)
+
+    def read(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        self._handle.seek(0, os.SEEK_END)
+        if not self._handle.tell():
+            return None
+        self._handle.seek(0)
+        return loads(self._handle.read())
+
+    def write(self, data: Dict[str, Dict[str, Any]]) -> None:
+        self._handle.seek(0)
+        serialized = dumps(data)
+        try:
+            self._handle.write(serialized)
+        except UnsupportedOperation:
+            raise IOError(
+                f'Cannot write to the database. Access mode is "{self._mode}"'
+            )
+        self._handle.flush()
+        os.fsync(self._handle.fileno())
+        self._handle.truncate()
@@ -0,0 +1,555 @@
+from __future__ import annotations
+
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+from threading import RLock
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    MutableMapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
+
+from tinydb.queries import QueryLike
+from tinydb.table import Document
+
+from .filters import (
+    OP_AFTER,
+    OP_BEFORE,
+    OP_CONTAINS,
+    OP_EQ,
+    OP_IN,
+    Condition,
+    all_match,
+    parse_timestamp,
+)
+from .indexing import IndexKey, matches, normalize_index, sort_page
+from .instrumentation import count_scanned
+from .observers import OP_INSERT, OP_REMOVE, OP_TRUNCATE, OP_UPDATE, Change, written_fields
+from .queries import FieldPath, equality_terms
+from .serialization import dumps, loads
+
+# Keys every table is indexed on; tables without these fields simply index NULLs.
+DEFAULT_INDEXES: Tuple[IndexKey, ...] = (
+    ("id",),
+    ("event_id",),
+    ("event_id", "user_id"),
+)
+
+
+def _quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _json_path(path: FieldPath) -> str:
+    return "$" + "".join('."' + key.replace('"', '""') + '"' for key in path)
+
+
+def _extract(path: FieldPath) -> str:
+    # Index definitions and queries must produce the exact same expression
+    # text, otherwise SQLite will not use the expression index.
+    return "json_extract(data, '{0}')".format(_json_path(path).replace("'", "''"))
+
+
+def _where_sql(where: Mapping[str, Any]) -> Optional[Tuple[List[str], List[Any]]]:
+    """
+    SQL clauses equivalent to :func:`matches` for ``where``, or ``None`` if a
+    value cannot be compared in SQL.
+    """
+    clauses: List[str] = []
+    params: List[Any] = []
+    for field, value in where.items():
+        if value is None:
+            # json_extract() is also NULL for a missing field; matches() is not.
+            path = _json_path((field,)).replace("'", "''")
+            clauses.append(f"json_type(data, '{path}') = 'null'")
+        elif isinstance(value, (str, int, float)):
+            clauses.append(f"{_extract((field,))} = ?")
+            params.append(value)
+        else:
+            return None
+    return clauses, params
+
+
+_SQL_VALUE = (str, int, float)
+
+# Values bound per statement by find_many(); well below SQLite's variable limit.
+_BATCH_SIZE = 500
+
+
+def _condition_sql(condition: Condition) -> Optional[Tuple[str, List[Any]]]:
+    """SQL clause equivalent to :func:`condition_matches`, or ``None`` if it has none."""
+    field, value = condition.field, condition.value
+    column = _extract((field,))
+    if condition.op == OP_EQ and isinstance(value, _SQL_VALUE):
+        return f"{column} = ?", [value]
+    if condition.op == OP_IN and value and all(isinstance(item, _SQL_VALUE) for item in value):
+        return f"{column} IN ({', '.join('?' for _ in value)})", list(value)
+    if condition.op == OP_CONTAINS and isinstance(value, _SQL_VALUE):
+        # json_each() also walks a scalar, which condition_matches() does not accept.
+        path = _json_path((field,)).replace("'", "''")
+        return (
+            f"json_type(data, '{path}') = 'array' AND EXISTS "
+            f"(SELECT 1 FROM json_each(data, '{path}') WHERE json_each.value = ?)",
+            [value],
+        )
+    if condition.op in (OP_AFTER, OP_BEFORE):
+        bound = parse_timestamp(value)
+        if bound is None:
+            return None
+        comparison = ">" if condition.op == OP_AFTER else "<"
+        return f"julianday({column}) {comparison} julianday(?)", [bound.isoformat()]
+    return None
+
+
+def _filter_sql(
+    where: Mapping[str, Any], conditions: Sequence[Condition]
+) -> Optional[Tuple[List[str], List[Any]]]:
+    pushed = _where_sql(where)
+    if pushed is None:
+        return None
+    clauses, params = pushed
+    for condition in conditions:
+        compiled = _condition_sql(condition)
+        if compiled is None:
+            return None
+        clauses.append(compiled[0])
+        params.extend(compiled[1])
+    return clauses, params
+
+
+class SQLiteDatabase:
+    """
+    SQLite database exposing TinyDB-compatible tables.
+
+    Each TinyDB table name maps to one SQLite table storing the document as
+    JSON, with expression indexes on the lookup keys used by repositories.
+    The connection runs in WAL mode so readers in other processes are not
+    blocked by writers.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        *,
+        indexes: Sequence[IndexKey] = DEFAULT_INDEXES,
+    ) -> None:
+        self._path = str(path)
+        self._indexes = tuple(indexes)
+        self._lock = RLock()
+        self._tables: Dict[str, SQLiteTable] = {}
+        self._created_indexes: Set[Tuple[str, IndexKey]] = set()
+        self._connection = sqlite3.connect(
+            self._path, check_same_thread=False, isolation_level=None
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._depth = 0
+        self._writes: Dict[str, int] = {}
+        # Receives the Changes of each transaction after it commits.
+        self.after_write: Optional[Callable[[Change], Any]] = None
+        self._changes: List[Change] = []
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def table(self, name: str) -> "SQLiteTable":
+        with self._lock:
+            table = self._tables.get(name)
+            if table is None:
+                table = SQLiteTable(self, name)
+                self._create_table(name)
+                self._tables[name] = table
+            return table
+
+    def _create_table(self, name: str) -> None:
+        table = _quote(name)
+        with self.transaction():
+            self.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} "
+                "(doc_id INTEGER PRIMARY KEY, data TEXT NOT NULL)"
+            )
+            for key in self._indexes:
+                self.create_index(name, key)
+
+    def create_index(self, name: str, key: IndexKey) -> None:
+        if (name, key) in self._created_indexes:
+            return
+        index_name = _quote(f"ix_{name}_{'_'.join(key)}")
+        columns = ", ".join(_extract((field,)) for field in key)
+        self.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {_quote(name)} ({columns})")
+        self._created_indexes.add((name, key))
+
+    def note_write(self, name: str) -> None:
+        with self._lock:
+            self._writes[name] = self._writes.get(name, 0) + 1
+
+    def notify(self, change: Change) -> None:
+        """Queue ``change`` for :attr:`after_write`; call it inside :meth:`transaction`."""
+        if self.after_write is not None and (change.doc_ids or change.op == OP_TRUNCATE):
+            self._changes.append(change)
+
+    def version(self, name: str) -> str:
+        """
+        Changes whenever table ``name`` is written through this connection or
+        any other connection commits to the database file.
+        """
+        with self._lock:
+            return f"{self._writes.get(name, 0)}.{self.data_version()}"
+
+    def data_version(self) -> int:
+        """Changes when another connection commits to the database file."""
+        with self._lock:
+            return int(self._connection.execute("PRAGMA data_version").fetchone()[0])
+
+    def execute(self, sql: str, params: Sequence[Any] = ()) -> sqlite3.Cursor:
+        with self._lock:
+            return self._connection.execute(sql, params)
+
+    def fetch(self, sql: str, params: Sequence[Any] = ()) -> List[Tuple[Any, ...]]:
+        with self._lock:
+            return self._connection.execute(sql, params).fetchall()
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """Group statements into a single SQLite transaction (re-entrant)."""
+        with self._lock:
+            outermost = self._depth == 0
+            if outermost:
+                self._connection.execute("BEGIN IMMEDIATE")
+            self._depth += 1
+            try:
+                yield
+            except BaseException:
+                self._depth -= 1
+                if outermost:
+                    self._changes.clear()
+                    self._connection.execute("ROLLBACK")
+                raise
+            else:
+                self._depth -= 1
+                if outermost:
+                    self._connection.execute("COMMIT")
+                    changes, self._changes = self._changes, []
+                    for change in changes:
+                        if self.after_write is not None:
+                            self.after_write(change)
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+class SQLiteTable:
+    """Subset of :class:`tinydb.table.Table` backed by a SQLite table."""
+
+    def __init__(self, database: SQLiteDatabase, name: str) -> None:
+        self._database = database
+        self._name = name
+        self._sql_name = _quote(name)
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    def ensure_index(self, fields: Union[str, Sequence[str]]) -> None:
+        self._database.create_index(self._name, normalize_index(fields))
+
+    # Index-backed lookups
+    def find(self, **where: Any) -> List[Document]:
+        return list(self._select_where(where))
+
+    def find_one(self, **where: Any) -> Optional[Document]:
+        return next(self._select_where(where), None)
+
+    def find_many(self, field: str, values: Iterable[Any], **where: Any) -> List[Document]:
+        """Same as :meth:`IndexedTable.find_many`, one ``IN`` query per batch of values."""
+        wanted = list(dict.fromkeys(values))
+        documents: List[Document] = []
+        for start in range(0, len(wanted), _BATCH_SIZE):
+            batch = (Condition(field, OP_IN, tuple(wanted[start : start + _BATCH_SIZE])),)
+            documents.extend(self.find_page((field,), conditions=batch, **where))
+        return documents
+
+    def find_page(
+        self,
+        order_by: Sequence[str],
+        *,
+        after: Optional[Sequence[Any]] = None,
+        limit: Optional[int] = None,
+        conditions: Sequence[Condition] = (),
+        **where: Any,
+    ) -> List[Document]:
+        """Same as :meth:`IndexedTable.find_page`, with the filter, keyset and limit in SQL."""
+        pushed = _filter_sql(where, conditions)
+        if pushed is None or (after is not None and any(value is None for value in after)):
+            documents = (d for d in self.find(**where) if all_match(d, conditions))
+            return sort_page(documents, order_by, after=after, limit=limit)
+        clauses, params = pushed
+        order = ", ".join(_extract((field,)) for field in order_by)
+        if after is not None:
+            # Row values compare lexicographically, like the Python sort key.
+            clauses.append(f"({order}) > ({', '.join('?' for _ in order_by)})")
+            params.extend(after)
+        sql = f"SELECT doc_id, data FROM {self._sql_name}"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" ORDER BY {order}, doc_id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        rows = self._database.fetch(sql, params)
+        count_scanned(len(rows))
+        documents = (Document(loads(data), doc_id) for doc_id, data in rows)
+        return [
+            document
+            for document in documents
+            if matches(document, where) and all_match(document, conditions)
+        ]
+
+    def count_where(self, *, conditions: Sequence[Condition] = (), **where: Any) -> int:
+        pushed = _filter_sql(where, conditions)
+        if pushed is None:
+            return sum(1 for d in self.find(**where) if all_match(d, conditions))
+        clauses, params = pushed
+        sql = f"SELECT COUNT(*) FROM {self._sql_name}"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        return int(self._database.fetch(sql, params)[0][0])
+
+    def update_where(
+        self,
+        fields: Union[Mapping, Callable[[MutableMapping], None]],
+        **where: Any,
+    ) -> List[int]:
+        with self._database.transaction():
+            doc_ids = [document.doc_id for document in self.find(**where)]
+            if not doc_ids:
+                return []
+            return self.update(fields, doc_ids=doc_ids)
+
+    def remove_where(self, **where: Any) -> List[int]:
+        with self._database.transaction():
+            doc_ids = [document.doc_id for document in self.find(**where)]
+            self._delete(doc_ids)
+            return doc_ids
+
+    # Reads
+    def all(self) -> List[Document]:
+        return list(iter(self))
+
+    def __iter__(self) -> Iterator[Document]:
+        rows = self._database.fetch(
+            f"SELECT doc_id, data FROM {self._sql_name} ORDER BY doc_id"
+        )
+        count_scanned(len(rows))
+        for doc_id, data in rows:
+            yield Document(loads(data), doc_id)
+
+    def __len__(self) -> int:
+        rows = self._database.fetch(f"SELECT COUNT(*) FROM {self._sql_name}")
+        return int(rows[0][0])
+
+    def search(self, cond: QueryLike) -> List[Document]:
+        return list(self._select(equality_terms(cond), cond))
+
+    def get(
+        self,
+        cond: Optional[QueryLike] = None,
+        doc_id: Optional[int] = None,
+        doc_ids: Optional[Iterable[int]] = None,
+    ) -> Union[Optional[Document], List[Document]]:
+        if doc_id is not None:
+            docs = self._by_doc_ids([doc_id])
+            return docs[0] if docs else None
+        if doc_ids is not None:
+            return self._by_doc_ids(doc_ids)
+        if cond is not None:
+            return next(self._select(equality_terms(cond), cond), None)
+        raise RuntimeError("You have to pass either cond or doc_id or doc_ids")
+
+    def contains(
+        self, cond: Optional[QueryLike] = None, doc_id: Optional[int] = None
+    ) -> bool:
+        if doc_id is not None:
+            return bool(self._by_doc_ids([doc_id]))
+        if cond is not None:
+            return self.get(cond) is not None
+        raise RuntimeError("You have to pass either cond or doc_id")
+
+    def count(self, cond: QueryLike) -> int:
+        return len(self.search(cond))
+
+    # Writes
+    def insert(self, document: Mapping) -> int:
+        with self._database.transaction():
+            doc_id = self._insert(document)
+            self._database.notify(
+                Change(self._name, OP_INSERT, (doc_id,), written_fields([document]))
+            )
+            return doc_id
+
+    def insert_multiple(self, documents: Iterable[Mapping]) -> List[int]:
+        documents = list(documents)
+        with self._database.transaction():
+            doc_ids = [self._insert(document) for document in documents]
+            self._database.notify(
+                Change(self._name, OP_INSERT, tuple(doc_ids), written_fields(documents))
+            )
+            return doc_ids
+
+    def update(
+        self,
+        fields: Union[Mapping, Callable[[MutableMapping], None]],
+        cond: Optional[QueryLike] = None,
+        doc_ids: Optional[Iterable[int]] = None,
+    ) -> List[int]:
+        if callable(fields):
+            perform_update = fields
+        else:
+            def perform_update(document: MutableMapping) -> None:
+                document.update(fields)
+
+        with self._database.transaction():
+            self._database.note_write(self._name)
+            documents = self._targets(cond, doc_ids)
+            for document in documents:
+                data = dict(document)
+                perform_update(data)
+                self._database.execute(
+                    f"UPDATE {self._sql_name} SET data = ? WHERE doc_id = ?",
+                    (dumps(data), document.doc_id),
+                )
+            doc_ids = tuple(document.doc_id for document in documents)
+            self._database.notify(
+                Change(self._name, OP_UPDATE, doc_ids, written_fields([fields]))
+            )
+            return list(doc_ids)
+
+    def upsert(self, document: Mapping, cond: Optional[QueryLike] = None) -> List[int]:
+        with self._database.transaction():
+            if isinstance(document, Document) and cond is None:
+                updated = self.update(document, doc_ids=[document.doc_id])
+            elif cond is not None:
+                updated = self.update(document, cond)
+            else:
+                raise ValueError("If you don't specify a search query, you must specify a doc_id")
+            if updated:
+                return updated
+            return [self.insert(document)]
+
+    def remove(
+        self,
+        cond: Optional[QueryLike] = None,
+        doc_ids: Optional[Iterable[int]] = None,
+    ) -> List[int]:
+        if cond is None and doc_ids is None:
+            raise RuntimeError("Use truncate() to remove all documents")
+        with self._database.transaction():
+            removed = [document.doc_id for document in self._targets(cond, doc_ids)]
+            self._delete(removed)
+            return removed
+
+    def truncate(self) -> None:
+        with self._database.transaction():
+            self._database.note_write(self._name)
+            self._database.execute(f"DELETE FROM {self._sql_name}")
+            self._database.notify(Change(self._name, OP_TRUNCATE, ()))
+
+    def clear_cache(self) -> None:
+        """Kept for TinyDB API compatibility; SQLite tables keep no query cache."""
+
+    # Helpers
+    def _insert(self, document: Mapping) -> int:
+        if not isinstance(document, Mapping):
+            raise ValueError("Document is not a Mapping")
+        data = dumps(dict(document))
+        self._database.note_write(self._name)
+        if isinstance(document, Document):
+            if self._by_doc_ids([document.doc_id]):
+                raise ValueError(f"Document with ID {document.doc_id} already exists")
+            self._database.execute(
+                f"INSERT INTO {self._sql_name} (doc_id, data) VALUES (?, ?)",
+                (document.doc_id, data),
+            )
+            return document.doc_id
+        cursor = self._database.execute(
+            f"INSERT INTO {self._sql_name} (data) VALUES (?)", (data,)
+        )
+        return int(cursor.lastrowid or 0)
+
+    def _targets(
+        self, cond: Optional[QueryLike], doc_ids: Optional[Iterable[int]]
+    ) -> List[Document]:
+        if doc_ids is not None:
+            return self._by_doc_ids(doc_ids)
+        if cond is not None:
+            return self.search(cond)
+        return self.all()
+
+    def _by_doc_ids(self, doc_ids: Iterable[int]) -> List[Document]:
+        ids = list(doc_ids)
+        if not ids:
+            return []
+        placeholders = ", ".join("?" for _ in ids)
+        rows = self._database.fetch(
+            f"SELECT doc_id, data FROM {self._sql_name} WHERE doc_id IN ({placeholders})",
+            ids,
+        )
+        count_scanned(len(rows))
+        found = {doc_id: data for doc_id, data in rows}
+        return [Document(loads(found[i]), i) for i in ids if i in found]
+
+    def _select_where(self, where: Mapping[str, Any]) -> Iterator[Document]:
+        terms: Dict[FieldPath, Any] = {
+            (field,): value
+            for field, value in where.items()
+            if isinstance(value, (str, int, float))
+        }
+        return self._select(terms, lambda document: matches(document, where))
+
+    def _select(
+        self,
+        terms: Mapping[FieldPath, Any],
+        predicate: Callable[[Dict[str, Any]], bool],
+    ) -> Iterator[Document]:
+        # Equality terms are pushed down to SQL (and its indexes); the full
+        # predicate is still evaluated on every candidate to keep TinyDB
+        # semantics.
+        sql = f"SELECT doc_id, data FROM {self._sql_name}"
+        params: List[Any] = []
+        if terms:
+            clauses = []
+            for path, value in terms.items():
+                clauses.append(f"{_extract(path)} = ?")
+                params.append(value)
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY doc_id"
+
+        rows = self._database.fetch(sql, params)
+        count_scanned(len(rows))
+        for doc_id, data in rows:
+            document = loads(data)
+            if predicate(document):
+                yield Document(document, doc_id)
+
+    def _delete(self, doc_ids: List[int]) -> None:
+        if not doc_ids:
+            return
+        self._database.note_write(self._name)
+        placeholders = ", ".join("?" for _ in doc_ids)
+        self._database.execute(
+            f"DELETE FROM {self._sql_name} WHERE doc_id IN ({placeholders})", doc_ids
+        )
+        self._database.notify(Change(self._name, OP_REMOVE, tuple(doc_ids)))
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any, Dict
+
+import pytest
+from tinydb.storages import MemoryStorage
+
+from shared.change_feed import OP_COUNTERS, OP_DELETE, OP_INSERT, OP_UPDATE, ChangeLog
+from shared.config import Settings
+from shared.database import DatabaseManager
+from shared.errors import ServiceUnavailableError
+from shared.event_replica import EventReplica
+
+NOW = datetime(2024, 5, 1, tzinfo=timezone.utc).isoformat()
+
+
+def _event(event_id: str, **changes: object) -> Dict[str, Any]:
+    record = {
+        "id": event_id,
+        "name": f"Event {event_id}",
+        "description": "Description",
+        "start_date": NOW,
+        "end_date": NOW,
+        "location": "Hub",
+        "status": "published",
+        "organizer_id": "organizer-1",
+        "categories": ["ai"],
+        "max_participants": 10,
+        "max_teams": 2,
+        "created_at": NOW,
+        "updated_at": NOW,
+    }
+    record.update(changes)
+    return record
+
+
+class FlakyFeed:
+    def __init__(self, log: ChangeLog) -> None:
+        self.log = log
+        self.down = False
+        self.calls = 0
+
+    def __call__(self, since: int, limit: int) -> Dict[str, Any]:
+        self.calls += 1
+        if self.down:
+            raise ServiceUnavailableError("Change feed unavailable")
+        return self.log.read(since, limit)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture()
+def log() -> ChangeLog:
+    manager = DatabaseManager(Settings(), storage=MemoryStorage)
+    return ChangeLog(manager, "event_changes")
+
+
+def test_read_pages_through_the_log_by_sequence(log):
+    for index in range(5):
+        assert log.append(OP_INSERT, _event(f"e-{index}")) == index + 1
+
+    first = log.read(0, 2)
+    assert [change["key"] for change in first["changes"]] == ["e-0", "e-1"]
+    assert (first["last_seq"], first["has_more"]) == (2, True)
+    last = log.read(4, 2)
+    assert [change["seq"] for change in last["changes"]] == [5]
+    assert (last["last_seq"], last["has_more"]) == (5, False)
+    assert log.read(5) == {
+        "epoch": log.epoch,
+        "head": 5,
+        "changes": [],
+        "last_seq": 5,
+        "has_more": False,
+    }
+
+
+def test_replica_follows_inserts_updates_and_deletes(log):
+    clock = FakeClock()
+    replica = EventReplica(FlakyFeed(log), poll_interval=1.0, batch_size=2, clock=clock)
+    log.append(OP_INSERT, _event("e-1"))
+    log.append(OP_INSERT, _event("e-2"))
+    log.append(OP_INSERT, _event("e-3"))
+    assert [e and e.id for e in replica.get_many(["e-3", "e-1", "nope"])] == ["e-3", "e-1", None]
+
+    log.append(OP_UPDATE, _event("e-1", name="Renamed"))
+    log.append(OP_DELETE, _event("e-2", deleted_at=NOW))
+    log.append(OP_COUNTERS, {"id": "e-1", "formed_teams": 2})
+    log.append(OP_COUNTERS, {"id": "e-2", "formed_teams": 1})
+    # Known ids are served from memory until the poll interval passes.
+    assert replica.get("e-1").name == "Event e-1"
+    clock.now = 1.0
+    assert (replica.get("e-1").name, replica.get("e-1").formed_teams) == ("Renamed", 2)
+    assert replica.get("e-2") is None
+    assert replica.stats()["last_seq"] == 7
+
+    # An unknown id pulls the feed at once, but not again within miss_ttl.
+    log.append(OP_INSERT, _event("e-4"))
+    assert replica.get("e-4") is not None
+    feed = replica._feed
+    calls = feed.calls
+    assert replica.get("nope") is None
+    assert replica.get("nope") is None
+    assert feed.calls == calls + 1
+    clock.now = 2.0
+    assert replica.get("nope") is None
+    assert feed.calls == calls + 2
+
+
+def test_replica_resyncs_when_the_log_is_reset(log):
+    feed = FlakyFeed(log)
+    clock = FakeClock()
+    replica = EventReplica(feed, poll_interval=1.0, clock=clock)
+    for index in range(3):
+        log.append(OP_INSERT, _event(f"old-{index}"))
+    assert replica.get("old-0") is not None
+    old_epoch = log.epoch
+
+    # A fresh database reuses the sequence numbers under a new epoch.
+    feed.log = ChangeLog(DatabaseManager(Settings(), storage=MemoryStorage), "event_changes")
+    for index in range(4):
+        feed.log.append(OP_INSERT, _event(f"new-{index}"))
+    assert feed.log.epoch != old_epoch
+    clock.now = 1.0
+    assert replica.get("old-0") is None
+    assert replica.get("new-3") is not None
+    stats = replica.stats()
+    assert (stats["events"], stats["last_seq"], stats["resyncs"]) == (4, 4, 1)
+
+
+def test_replica_serves_stale_events_while_the_feed_is_down(log):
+    feed = FlakyFeed(log)
+    clock = FakeClock()
+    replica = EventReplica(feed, poll_interval=1.0, clock=clock)
+    log.append(OP_INSERT, _event("e-1"))
+    assert replica.get("e-1") is not None
+
+    feed.down = True
+    clock.now = 5.0
+    assert replica.get("e-1") is not None
+    calls = feed.calls
+    assert replica.get("e-1") is not None
+    assert feed.calls == calls
+    assert replica.stats()["feed_errors"] == 1
+
+
+def test_replica_that_never_synced_is_unavailable(log):
+    feed = FlakyFeed(log)
+    feed.down = True
+    with pytest.raises(ServiceUnavailableError):
+        EventReplica(feed).get("e-1")
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import gzip
+import json
+from pathlib import Path
+
+import pytest
+
+from shared import compact
+from shared.compact import CompactStorage, convert, from_columns, storage_path, to_columns
+from shared.config import Settings
+from shared.database import DatabaseManager
+
+DATA = {
+    "events": {
+        "1": {"id": "e-1", "name": "Hack", "deleted_at": None, "tags": ["a", "b"]},
+        "3": {"id": "e-2", "max_participants": 10},
+    },
+    "messages": {},
+}
+
+
+def test_columnar_layout_round_trips_missing_and_null_fields():
+    encoded = to_columns(DATA)
+    assert encoded["tables"]["events"]["columns"]["id"] == ["e-1", "e-2"]
+    assert from_columns(encoded) == DATA
+
+
+@pytest.mark.parametrize("format", ["json", "columnar"])
+@pytest.mark.parametrize("compression", ["none", "gzip"])
+def test_storage_round_trip(tmp_path, format, compression):
+    storage = CompactStorage(tmp_path / "db.bin", format=format, compression=compression)
+    assert storage.read() is None
+    storage.write(DATA)
+    assert storage.read() == DATA
+
+
+def test_msgpack_round_trip(tmp_path):
+    pytest.importorskip("msgpack")
+    storage = CompactStorage(tmp_path / "db.msgpack", format="msgpack", compression="gzip")
+    storage.write(DATA)
+    assert storage.read() == DATA
+
+
+def test_unknown_or_unavailable_options_are_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        CompactStorage(tmp_path / "db", format="xml")
+    if compact.zstandard is None:
+        with pytest.raises(ValueError):
+            CompactStorage(tmp_path / "db", format="json", compression="zstd")
+
+
+def test_convert_is_lossless(tmp_path):
+    source = tmp_path / "db.json"
+    source.write_text(json.dumps(DATA))
+    target = storage_path(source, "columnar", "gzip")
+    assert target.name == "db.columnar.json.gz"
+    convert(source, target, format="columnar", compression="gzip")
+    assert CompactStorage(target, format="columnar", compression="gzip").read() == DATA
+    assert json.loads(gzip.decompress(target.read_bytes()))["layout"] == "columnar"
+
+
+def test_manager_converts_existing_json_file(tmp_path: Path):
+    (tmp_path / "db.json").write_text(json.dumps(DATA))
+    settings = Settings(
+        db_path=str(tmp_path / "db.json"), db_format="columnar", db_compression="gzip"
+    )
+    manager = DatabaseManager(settings)
+    try:
+        events = manager.table("events", indexes=["id"])
+        assert events.find_one(id="e-2")["max_participants"] == 10
+        events.insert({"id": "e-3"})
+        assert manager.commit()
+    finally:
+        manager.close()
+
+    stored = CompactStorage(
+        tmp_path / "db.columnar.json.gz", format="columnar", compression="gzip"
+    ).read()
+    assert stored is not None
+    assert [doc["id"] for doc in stored["events"].values()] == ["e-1", "e-2", "e-3"]
+    # The original file is left untouched.
+    assert json.loads((tmp_path / "db.json").read_text()) == DATA
+
+
+def test_manager_rejects_compact_format_with_journal(tmp_path):
+    settings = Settings(db_path=str(tmp_path / "db.json"), db_journal=True, db_compression="gzip")
+    with pytest.raises(ValueError):
+        DatabaseManager(settings)
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import pytest
+from tinydb.storages import MemoryStorage
+
+from shared.conditional import etag_matches, make_etag
+from shared.config import Settings
+from shared.database import DatabaseManager
+
+
+def test_if_none_match_uses_weak_comparison():
+    etag = make_etag("projects", 3)
+    assert etag.startswith('W/"')
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", {etag.removeprefix("W/")}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(make_etag("projects", 4), etag)
+    assert not etag_matches(None, etag)
+
+
+@pytest.fixture(params=["tinydb", "sqlite"])
+def manager(request, tmp_path):
+    if request.param == "sqlite":
+        settings = Settings(db_path=str(tmp_path / "db.json"), db_backend="sqlite")
+        manager = DatabaseManager(settings)
+    else:
+        manager = DatabaseManager(Settings(), storage=MemoryStorage)
+    yield manager
+    manager.close()
+
+
+def test_table_version_changes_with_writes_to_that_table(manager):
+    projects = manager.table("projects", indexes=["id"])
+    participants = manager.table("participants", indexes=["id"])
+    projects.insert({"id": "p-1", "version": 0})
+    before = manager.table_version("projects")
+    assert manager.table_version("projects") == before
+    assert projects.find_page(("id",)) and manager.table_version("projects") == before
+
+    participants.insert({"id": "u-1"})
+    assert manager.table_version("projects") == before
+    projects.update_where({"version": 1}, id="p-1")
+    assert manager.table_version("projects") != before
+
+
+def test_rolled_back_transaction_still_changes_the_version():
+    manager = DatabaseManager(Settings(), storage=MemoryStorage)
+    projects = manager.table("projects", indexes=["id"])
+    with pytest.raises(RuntimeError):
+        with manager.transaction():
+            projects.insert({"id": "p-1"})
+            inside = manager.table_version("projects")
+            raise RuntimeError("boom")
+    # A token handed out inside the transaction must not match the restored table.
+    assert manager.table_version("projects") != inside
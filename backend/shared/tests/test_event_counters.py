@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+from collections import Counter
+from threading import Event
+from typing import List, Tuple
+
+import pytest
+from tinydb.storages import MemoryStorage
+
+from shared.change_feed import EVENT_CHANGES_TABLE
+from shared.config import Settings
+from shared.database import DatabaseManager
+from shared.event_counters import (
+    BATCH_HISTORY,
+    COUNTER_BATCHES_TABLE,
+    FORMED_TEAMS,
+    REGISTERED_PARTICIPANTS,
+    SUBMITTED_PROJECTS,
+    CounterDeltas,
+    CounterPublisher,
+    EventCounters,
+    registered_delta,
+)
+
+
+@pytest.fixture()
+def manager() -> DatabaseManager:
+    manager = DatabaseManager(Settings(), storage=MemoryStorage)
+    manager.table("events").insert_multiple(
+        [{"id": "e-1", REGISTERED_PARTICIPANTS: 0}, {"id": "e-2", REGISTERED_PARTICIPANTS: 7}]
+    )
+    return manager
+
+
+def test_registered_delta():
+    assert registered_delta(None, "pending") == 1
+    assert registered_delta(None, "waitlist") == 0
+    assert registered_delta("pending", "approved") == 0
+    assert registered_delta("waitlist", "approved") == 1
+    assert registered_delta("pending", "rejected") == -1
+
+
+def test_adjust_updates_the_event_and_its_change_log(manager):
+    counters = EventCounters(manager)
+    record = counters.adjust("e-1", **{SUBMITTED_PROJECTS: 2, FORMED_TEAMS: 1})
+    assert (record[SUBMITTED_PROJECTS], record[FORMED_TEAMS]) == (2, 1)
+    assert counters.adjust("e-1", **{REGISTERED_PARTICIPANTS: -1})[REGISTERED_PARTICIPANTS] == 0
+    assert counters.adjust("missing", **{SUBMITTED_PROJECTS: 1}) is None
+    assert counters.adjust("e-1", **{SUBMITTED_PROJECTS: 0}) is None
+    with pytest.raises(ValueError):
+        counters.adjust("e-1", max_teams=1)
+
+    stored = manager.table("events").find_one(id="e-1")
+    assert (stored[SUBMITTED_PROJECTS], stored[REGISTERED_PARTICIPANTS]) == (2, 0)
+    changes = manager.table(EVENT_CHANGES_TABLE).all()
+    assert [(change["op"], change["record"]) for change in changes] == [
+        ("counters", {"id": "e-1", SUBMITTED_PROJECTS: 2, FORMED_TEAMS: 1}),
+        ("counters", {"id": "e-1", REGISTERED_PARTICIPANTS: 0}),
+    ]
+
+
+def test_reconcile_recomputes_all_counters_in_one_pass(manager):
+    manager.table("participants").insert_multiple(
+        [
+            {"id": "p-1", "event_id": "e-1", "status": "approved"},
+            {"id": "p-2", "event_id": "e-1", "status": "waitlist"},
+            {"id": "p-3", "event_id": "e-1", "status": "pending"},
+        ]
+    )
+    manager.table("projects").insert_multiple(
+        [
+            {"id": "j-1", "event_id": "e-1", "team_name": "Alpha"},
+            {"id": "j-2", "event_id": "e-1", "team_name": "Alpha"},
+            {"id": "j-3", "event_id": "e-1", "team_name": "Beta"},
+        ]
+    )
+    counters = EventCounters(manager)
+    assert counters.reconcile() == {"events": 2, "corrected": 2}
+    events = {record["id"]: record for record in manager.table("events").all()}
+    fields = (REGISTERED_PARTICIPANTS, SUBMITTED_PROJECTS, FORMED_TEAMS)
+    assert [events["e-1"][field] for field in fields] == [2, 3, 2]
+    assert events["e-2"][REGISTERED_PARTICIPANTS] == 0
+    assert counters.reconcile() == {"events": 2, "corrected": 0}
+
+
+def test_apply_skips_unknown_events(manager):
+    counters = EventCounters(manager)
+    deltas = {
+        "e-1": {SUBMITTED_PROJECTS: 2},
+        "e-2": {REGISTERED_PARTICIPANTS: -1},
+        "gone": {FORMED_TEAMS: 1},
+    }
+    assert counters.apply(deltas) == 2
+    events = {record["id"]: record for record in manager.table("events").all()}
+    assert events["e-1"][SUBMITTED_PROJECTS] == 2
+    assert events["e-2"][REGISTERED_PARTICIPANTS] == 6
+    with pytest.raises(ValueError):
+        counters.apply({"e-1": {"max_teams": 1}})
+
+
+def test_apply_counts_a_retried_batch_once(manager):
+    counters = EventCounters(manager)
+    deltas = {"e-1": {SUBMITTED_PROJECTS: 2}, "gone": {FORMED_TEAMS: 1}}
+    assert counters.apply(deltas, "batch-1") == 1
+    assert counters.apply(deltas, "batch-1") == 1
+    assert manager.table("events").get(doc_id=1)[SUBMITTED_PROJECTS] == 2
+
+    for number in range(2, BATCH_HISTORY + 2):
+        counters.apply({}, f"batch-{number}")
+    batches = manager.table(COUNTER_BATCHES_TABLE)
+    assert len(batches) == BATCH_HISTORY
+    assert batches.find_one(batch="batch-1") is None
+
+
+def test_publisher_merges_changes_and_retries_failed_batches():
+    sent: List[Tuple[str, CounterDeltas]] = []
+    attempts: List[Tuple[str, CounterDeltas]] = []
+    release = Event()
+    failures = [RuntimeError("events service down")]
+
+    def send(deltas: CounterDeltas, batch_id: str) -> None:
+        release.wait(5)
+        attempts.append((batch_id, {event_id: dict(values) for event_id, values in deltas.items()}))
+        if failures:
+            raise failures.pop()
+        sent.append((batch_id, deltas))
+
+    publisher = CounterPublisher(send, retry_delay=0.01)
+    publisher.add("e-1", **{REGISTERED_PARTICIPANTS: 1})
+    publisher.add("e-1", **{REGISTERED_PARTICIPANTS: 1, SUBMITTED_PROJECTS: 1})
+    publisher.add("e-2", **{REGISTERED_PARTICIPANTS: 1})
+    publisher.add("e-2", **{REGISTERED_PARTICIPANTS: -1})
+    release.set()
+    assert publisher.flush(5)
+    publisher.close()
+
+    totals: Counter = Counter()
+    for _, batch in sent:
+        for event_id, values in batch.items():
+            for field, delta in values.items():
+                totals[event_id, field] += delta
+    assert +totals == {("e-1", REGISTERED_PARTICIPANTS): 2, ("e-1", SUBMITTED_PROJECTS): 1}
+    assert publisher.stats()["failures"] == 1
+    # The failed batch is resent as it was, under its id.
+    assert attempts[1] == attempts[0]
+    assert sent[0][0] == attempts[0][0]
+
+
+def test_publisher_drops_changes_beyond_its_pending_limit():
+    started, release = Event(), Event()
+    sent: List[CounterDeltas] = []
+
+    def send(deltas: CounterDeltas, batch_id: str) -> None:
+        started.set()
+        release.wait(5)
+        sent.append(deltas)
+
+    publisher = CounterPublisher(send, max_pending_events=1)
+    publisher.add("e-1", **{FORMED_TEAMS: 1})
+    assert started.wait(5)
+    publisher.add("e-2", **{FORMED_TEAMS: 1})
+    publisher.add("e-3", **{FORMED_TEAMS: 1})
+    publisher.add("e-2", **{FORMED_TEAMS: 1})
+    release.set()
+    assert publisher.flush(5)
+    publisher.close()
+
+    assert sent == [{"e-1": {FORMED_TEAMS: 1}}, {"e-2": {FORMED_TEAMS: 2}}]
+    assert publisher.stats()["dropped"] == 1
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from tinydb.storages import MemoryStorage
+
+from shared.config import Settings
+from shared.database import DatabaseManager
+from shared.event_reader import EventReader
+
+NOW = datetime(2024, 5, 1, tzinfo=timezone.utc).isoformat()
+
+
+def _event(event_id: str, **changes: object) -> dict:
+    record = {
+        "id": event_id,
+        "name": f"Event {event_id}",
+        "description": "Description",
+        "start_date": NOW,
+        "end_date": NOW,
+        "location": "Hub",
+        "status": "published",
+        "organizer_id": "organizer-1",
+        "categories": ["ai"],
+        "max_participants": 10,
+        "max_teams": 2,
+        "created_at": NOW,
+        "updated_at": NOW,
+    }
+    record.update(changes)
+    return record
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_cached_events_skip_the_table_until_it_changes():
+    manager = DatabaseManager(Settings(db_instrumentation=True), storage=MemoryStorage)
+    events = manager.table("events", indexes=["id"])
+    events.insert_multiple([_event("e-1"), _event("e-2", deleted_at=NOW)])
+    reader = EventReader(manager)
+
+    assert reader.get("e-1").name == "Event e-1"
+    assert reader.get("e-1") is reader.get("e-1")
+    assert [e and e.id for e in reader.get_many(["e-2", "e-1", "nope"])] == [None, "e-1", None]
+    operations = manager.storage_metrics()["tables"]["events"]["operations"]
+    # The first lookup, then e-2 and the unknown id (misses are not cached).
+    assert operations["find_many"]["calls"] == 2
+
+    events.insert(_event("e-3"))
+    assert reader.get("e-3") is not None
+    events.update_where({"name": "Renamed"}, id="e-1")
+    assert reader.get("e-1").name == "Renamed"
+    # Only the written event was dropped.
+    assert reader.get("e-3") is reader.get("e-3")
+    stats = reader.stats()
+    assert (stats["hits"], stats["misses"]) == (5, 5)
+    assert (stats["write_evictions"], stats["invalidations"]) == (1, 0)
+
+    events.truncate()
+    assert reader.get("e-1") is None
+
+
+def test_entries_expire_after_max_age():
+    manager = DatabaseManager(Settings(), storage=MemoryStorage)
+    manager.table("events").insert(_event("e-1"))
+    clock = FakeClock()
+    reader = EventReader(manager, max_age=5.0, clock=clock)
+    first = reader.get("e-1")
+    clock.now = 4.9
+    assert reader.get("e-1") is first
+    clock.now = 5.0
+    assert reader.get("e-1") is not first
+    assert reader.stats()["expirations"] == 1
+
+
+def test_zero_max_age_disables_caching():
+    manager = DatabaseManager(Settings(), storage=MemoryStorage)
+    manager.table("events").insert(_event("e-1"))
+    reader = EventReader(manager, max_age=0)
+    assert reader.get("e-1") is not reader.get("e-1")
+    assert reader.stats()["entries"] == 0
+
+
+def test_changes_from_another_process_are_seen_after_reload(tmp_path):
+    def manager() -> DatabaseManager:
+        settings = Settings(db_path=str(tmp_path / "db.json"), db_reload_interval=0)
+        return DatabaseManager(settings)
+
+    writer, other = manager(), manager()
+    try:
+        writer.table("events").insert(_event("e-1"))
+        writer.commit()
+        reader = EventReader(other, max_age=60)
+        assert reader.get("e-1").status == "published"
+
+        writer.table("events").update_where({"status": "active"}, id="e-1")
+        writer.commit()
+        assert reader.get("e-1").status == "active"
+    finally:
+        writer.close()
+        other.close()
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import asyncio
+from threading import Event, current_thread
+
+import pytest
+
+from shared.errors import ServiceUnavailableError
+from shared.executor import StorageExecutor
+
+
+def test_run_executes_off_the_event_loop_thread():
+    executor = StorageExecutor(max_workers=2)
+
+    async def main() -> str:
+        return await executor.run(lambda: current_thread().name)
+
+    try:
+        assert asyncio.run(main()).startswith("storage")
+        metrics = executor.metrics()
+        assert metrics["completed"] == 1
+        assert metrics["queue_depth"] == 0
+        assert metrics["active"] == 0
+    finally:
+        executor.shutdown()
+
+
+def test_exceptions_propagate_to_the_caller():
+    executor = StorageExecutor(max_workers=1)
+
+    def fail() -> None:
+        raise KeyError("missing")
+
+    try:
+        with pytest.raises(KeyError):
+            asyncio.run(executor.run(fail))
+    finally:
+        executor.shutdown()
+
+
+def test_full_queue_is_rejected():
+    executor = StorageExecutor(max_workers=1, max_queue=1)
+    release = Event()
+    started = Event()
+
+    def block() -> None:
+        started.set()
+        release.wait(5)
+
+    async def main() -> None:
+        running = asyncio.ensure_future(executor.run(block))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+        queued = asyncio.ensure_future(executor.run(lambda: None))
+        await asyncio.sleep(0)
+        assert executor.metrics()["queue_depth"] == 1
+        with pytest.raises(ServiceUnavailableError):
+            await executor.run(lambda: None)
+        release.set()
+        await asyncio.gather(running, queued)
+
+    try:
+        asyncio.run(main())
+        metrics = executor.metrics()
+        assert metrics["rejected"] == 1
+        assert metrics["completed"] == 2
+        assert metrics["max_wait_ms"] > 0
+    finally:
+        release.set()
+        executor.shutdown()
+
+
+def test_cancelled_queued_call_gives_its_slot_back():
+    executor = StorageExecutor(max_workers=1, max_queue=1)
+    release = Event()
+    started = Event()
+    ran = []
+
+    def block() -> None:
+        started.set()
+        release.wait(5)
+
+    async def main() -> None:
+        running = asyncio.ensure_future(executor.run(block))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+        queued = asyncio.ensure_future(executor.run(lambda: ran.append(1)))
+        await asyncio.sleep(0)
+        queued.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+        assert executor.metrics()["queue_depth"] == 0
+        release.set()
+        await running
+        await executor.run(lambda: None)
+
+    try:
+        asyncio.run(main())
+        assert ran == []
+        assert executor.metrics()["queue_depth"] == 0
+    finally:
+        executor.shutdown()
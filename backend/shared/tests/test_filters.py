@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import pytest
+from tinydb.storages import MemoryStorage
+
+from shared.config import Settings
+from shared.database import DatabaseManager
+from shared.errors import ValidationError
+from shared.filters import (
+    OP_AFTER,
+    OP_BEFORE,
+    OP_CONTAINS,
+    OP_EQ,
+    OP_IN,
+    Condition,
+    in_condition,
+    plan,
+    sort_order,
+)
+
+STATUS_INDEX = ("status", "deleted_at")
+
+
+def _event(id, status, tags, start_date, deleted_at=None):
+    return {
+        "id": id,
+        "status": status,
+        "tags": tags,
+        "start_date": start_date,
+        "deleted_at": deleted_at,
+    }
+
+
+DOCUMENTS = [
+    _event("a", "published", ["ai", "web"], "2024-05-02T09:00:00+00:00"),
+    _event("b", "active", ["ai"], "2024-04-30T23:00:00+00:00"),
+    _event("c", "draft", ["ai"], "2024-06-01T00:00:00+00:00"),
+    _event("d", "published", "ai", "2024-06-01T00:00:00+00:00", deleted_at="2024-02-01"),
+    _event("e", "active", [], "2024-05-20T12:30:00.250000+00:00"),
+]
+
+
+@pytest.fixture(params=["tinydb", "sqlite"])
+def table(request, tmp_path):
+    if request.param == "sqlite":
+        settings = Settings(db_path=str(tmp_path / "db.json"), db_backend="sqlite")
+        manager = DatabaseManager(settings)
+    else:
+        manager = DatabaseManager(Settings(), storage=MemoryStorage)
+    table = manager.table("events", indexes=["id", STATUS_INDEX])
+    table.insert_multiple(DOCUMENTS)
+    yield table
+    manager.close()
+
+
+def _ids(documents):
+    return [document["id"] for document in documents]
+
+
+AVAILABLE = Condition("status", OP_IN, ("published", "active"))
+
+
+@pytest.mark.parametrize(
+    ("conditions", "expected"),
+    [
+        ((AVAILABLE,), ["a", "b", "e"]),
+        ((AVAILABLE, Condition("tags", OP_CONTAINS, "ai")), ["a", "b"]),
+        ((Condition("start_date", OP_AFTER, "2024-05-01"),), ["a", "c", "e"]),
+        ((Condition("start_date", OP_BEFORE, "2024-05-20T12:30:00.500Z"),), ["a", "b", "e"]),
+        ((Condition("id", OP_EQ, "c"), AVAILABLE), []),
+    ],
+)
+def test_backends_agree_on_conditions(table, conditions, expected):
+    found = table.find_page(("id",), conditions=conditions, deleted_at=None)
+    assert _ids(found) == expected
+    assert table.count_where(conditions=conditions, deleted_at=None) == len(expected)
+
+
+def test_pages_follow_the_requested_order(table):
+    order = ("start_date", "id")
+    first = table.find_page(order, limit=2, conditions=(AVAILABLE,), deleted_at=None)
+    assert _ids(first) == ["b", "a"]
+    after = tuple(first[-1][field] for field in order)
+    rest = table.find_page(order, after=after, conditions=(AVAILABLE,), deleted_at=None)
+    assert _ids(rest) == ["e"]
+
+
+def test_status_list_is_looked_up_through_the_index():
+    manager = DatabaseManager(Settings(db_instrumentation=True), storage=MemoryStorage)
+    table = manager.table("events", indexes=["id", STATUS_INDEX])
+    table.insert_multiple(DOCUMENTS)
+    conditions = (AVAILABLE, Condition("tags", OP_CONTAINS, "ai"))
+    assert _ids(table.find_page(("id",), conditions=conditions, deleted_at=None)) == ["a", "b"]
+    # Only the three live published/active events are visited.
+    operations = manager.storage_metrics()["tables"]["events"]["operations"]
+    assert operations["find_page"]["docs_scanned"] == 3
+
+
+def test_plan_expands_in_conditions_only_when_an_index_covers_them():
+    where = {"deleted_at": None}
+    tagged = Condition("tags", OP_CONTAINS, "ai")
+    expanded = plan([tagged, AVAILABLE], where, [STATUS_INDEX])
+    assert expanded.expand == AVAILABLE
+    assert expanded.residual == [tagged]
+
+    single = plan([Condition("status", OP_IN, ("draft",))], where, [STATUS_INDEX])
+    assert single.where == {"deleted_at": None, "status": "draft"}
+    assert single.expand is None
+
+    unindexed = plan([AVAILABLE], where, [("id",)])
+    assert unindexed.expand is None
+    assert unindexed.residual == [AVAILABLE]
+
+
+def test_parameter_values_are_validated():
+    assert in_condition("status", ["published,active", "active"], ["published", "active"]) == (
+        Condition("status", OP_IN, ("published", "active"))
+    )
+    assert in_condition("status", None) is None
+    with pytest.raises(ValidationError):
+        in_condition("status", ["archived"], ["published"])
+    assert sort_order(None, ("created_at", "name")) == ("created_at", "id")
+    with pytest.raises(ValidationError):
+        sort_order("description", ("created_at", "name"))
+
+
+def test_find_many_probes_each_id(table):
+    found = table.find_many("id", ["e", "missing", "a", "e"], deleted_at=None)
+    assert sorted(_ids(found)) == ["a", "e"]
+    assert table.find_many("id", []) == []
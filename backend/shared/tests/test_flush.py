@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import json
+import time
+from pathlib import Path
+
+from shared.config import Settings
+from shared.database import DatabaseManager
+
+
+def _manager(tmp_path: Path, **overrides) -> DatabaseManager:
+    settings = Settings(db_path=str(tmp_path / "db.json"), **overrides)
+    return DatabaseManager(settings)
+
+
+def _on_disk(tmp_path: Path) -> dict:
+    text = (tmp_path / "db.json").read_text()
+    return json.loads(text) if text else {}
+
+
+def _wait_until(predicate, timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_writes_are_flushed_after_max_delay(tmp_path):
+    manager = _manager(tmp_path, db_flush_max_delay=0.05, db_flush_max_dirty=1000)
+    try:
+        manager.table("events").insert({"id": "e-1"})
+        assert _wait_until(lambda: "events" in _on_disk(tmp_path))
+        # The file is written before the flush is accounted for.
+        assert _wait_until(lambda: manager.flush_metrics()["flushes"] == 1)
+        metrics = manager.flush_metrics()
+        assert metrics is not None
+        assert metrics["dirty_writes"] == 0
+        assert metrics["flushes"] == 1
+    finally:
+        manager.close()
+
+
+def test_writes_are_flushed_after_max_dirty(tmp_path):
+    manager = _manager(tmp_path, db_flush_max_delay=0, db_flush_max_dirty=3)
+    try:
+        table = manager.table("events")
+        table.insert({"id": "e-1"})
+        table.insert({"id": "e-2"})
+        time.sleep(0.05)
+        assert _on_disk(tmp_path) == {}
+        assert manager.flush_metrics()["dirty_writes"] == 2
+
+        table.insert({"id": "e-3"})
+        assert _wait_until(lambda: len(_on_disk(tmp_path).get("events", {})) == 3)
+    finally:
+        manager.close()
+
+
+def test_commit_waits_for_durability(tmp_path):
+    manager = _manager(tmp_path, db_flush_max_delay=60, db_flush_max_dirty=1000)
+    try:
+        table = manager.table("participants")
+        table.insert({"id": "p-1"})
+        table.insert({"id": "p-2"})
+        assert manager.commit(timeout=5)
+        assert len(_on_disk(tmp_path)["participants"]) == 2
+
+        metrics = manager.flush_metrics()
+        assert metrics["flushes"] == 1
+        assert metrics["flushed_writes"] == 2
+        assert manager.commit(timeout=5)
+        assert manager.flush_metrics()["flushes"] == 1
+    finally:
+        manager.close()
+
+
+def test_flush_keeps_tables_other_processes_wrote(tmp_path):
+    first = _manager(tmp_path, db_flush_max_delay=60)
+    second = _manager(tmp_path, db_flush_max_delay=60)
+    try:
+        second.table("participants").all()
+        first.table("events").insert({"id": "e-1"})
+        assert first.commit(timeout=5)
+
+        second.table("participants").insert({"id": "p-1"})
+        assert second.commit(timeout=5)
+        on_disk = _on_disk(tmp_path)
+        assert [doc["id"] for doc in on_disk["events"].values()] == ["e-1"]
+        assert [doc["id"] for doc in on_disk["participants"].values()] == ["p-1"]
+    finally:
+        first.close()
+        second.close()
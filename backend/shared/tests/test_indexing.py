@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from tinydb import Query
+from tinydb.storages import MemoryStorage
+from tinydb.table import Table
+
+from shared.config import Settings
+from shared.database import DatabaseManager
+
+
+def _participants(manager: DatabaseManager):
+    return manager.table(
+        "participants", indexes=["id", "event_id", ("event_id", "user_id")]
+    )
+
+
+def test_indexes_follow_inserts_updates_and_removes():
+    manager = DatabaseManager(Settings(), storage=MemoryStorage)
+    table = _participants(manager)
+    table.insert({"id": "p-1", "event_id": "e-1", "user_id": "u-1"})
+    table.insert({"id": "p-2", "event_id": "e-1", "user_id": "u-2"})
+
+    assert [doc["id"] for doc in table.find(event_id="e-1")] == ["p-1", "p-2"]
+    assert table.find_one(event_id="e-1", user_id="u-2")["id"] == "p-2"
+
+    table.update_where({"event_id": "e-2"}, id="p-1")
+    table.update({"user_id": "u-3"}, Query().id == "p-2")
+    assert [doc["id"] for doc in table.find(event_id="e-1")] == ["p-2"]
+    assert table.find_one(event_id="e-2", user_id="u-1")["id"] == "p-1"
+    assert table.find_one(event_id="e-1", user_id="u-2") is None
+    assert table.find_one(event_id="e-1", user_id="u-3")["id"] == "p-2"
+
+    assert table.remove_where(id="p-2")
+    assert table.find(event_id="e-1") == []
+    assert table.find_one(id="p-2") is None
+
+
+def test_indexed_lookups_do_not_scan(monkeypatch):
+    manager = DatabaseManager(Settings(), storage=MemoryStorage)
+    table = _participants(manager)
+    table.insert_multiple(
+        {"id": f"p-{i}", "event_id": f"e-{i % 3}", "user_id": f"u-{i}"} for i in range(30)
+    )
+    assert table.find_one(id="p-0") is not None  # builds the indexes
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("indexed lookup scanned the table")
+
+    monkeypatch.setattr(Table, "__iter__", _fail)
+    monkeypatch.setattr(Table, "search", _fail)
+    assert table.find_one(id="p-7")["user_id"] == "u-7"
+    assert len(table.find(event_id="e-1")) == 10
+    assert table.find_one(event_id="e-2", user_id="u-5")["id"] == "p-5"
+
+
+def test_sqlite_tables_expose_the_same_lookup_api(tmp_path):
+    settings = Settings(db_path=str(tmp_path / "db.json"), db_backend="sqlite")
+    manager = DatabaseManager(settings)
+    try:
+        table = _participants(manager)
+        table.insert({"id": "p-1", "event_id": "e-1", "user_id": "u-1"})
+        table.insert({"id": "p-2", "event_id": "e-1", "user_id": "u-2"})
+
+        assert table.find_one(event_id="e-1", user_id="u-2")["id"] == "p-2"
+        table.update_where({"user_id": "u-9"}, id="p-2")
+        assert table.find_one(event_id="e-1", user_id="u-9")["id"] == "p-2"
+        assert table.remove_where(id="p-1") == [1]
+        assert [doc["id"] for doc in table.find(event_id="e-1")] == ["p-2"]
+    finally:
+        manager.close()
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from tinydb import Query
+from tinydb.storages import MemoryStorage
+
+from shared.config import Settings
+from shared.database import DatabaseManager
+
+
+def _manager(**overrides) -> DatabaseManager:
+    settings = Settings(db_instrumentation=True, **overrides)
+    return DatabaseManager(settings, storage=MemoryStorage)
+
+
+def test_operations_are_counted_per_table():
+    manager = _manager()
+    events = manager.table("events", indexes=["id"])
+    for index in range(5):
+        events.insert({"id": f"e-{index}", "status": "draft"})
+    assert events.find_one(id="e-3") is not None
+    assert len(events.search(Query().status == "draft")) == 5
+    manager.table("messages").all()
+
+    metrics = manager.storage_metrics()
+    assert metrics["enabled"] is True
+    operations = metrics["tables"]["events"]["operations"]
+    assert operations["insert"]["calls"] == 5
+    # The index resolves the lookup to a single document.
+    assert operations["find_one"]["calls"] == 1
+    assert operations["find_one"]["docs_scanned"] == 1
+    assert operations["search"]["docs_scanned"] == 5
+    assert metrics["tables"]["messages"]["operations"]["all"]["calls"] == 1
+    assert metrics["slow_operations"] == []
+
+
+def test_unindexed_lookups_report_full_scans():
+    manager = _manager()
+    events = manager.table("events")
+    events.insert_multiple({"id": f"e-{index}"} for index in range(4))
+    assert events.find(id="e-0")
+    operations = manager.storage_metrics()["tables"]["events"]["operations"]
+    assert operations["find"]["docs_scanned"] == 4
+
+
+def test_slow_operations_are_logged(caplog):
+    manager = _manager(db_slow_op_ms=0)
+    with caplog.at_level("WARNING", logger="shared.storage.slow"):
+        manager.table("events").insert({"id": "e-1"})
+    slow = manager.storage_metrics()["slow_operations"]
+    assert [(entry["table"], entry["operation"]) for entry in slow] == [("events", "insert")]
+    assert "Slow storage operation events.insert" in caplog.text
+
+
+def test_instrumentation_is_off_by_default():
+    manager = DatabaseManager(Settings(), storage=MemoryStorage)
+    manager.table("events").insert({"id": "e-1"})
+    assert manager.storage_metrics() == {
+        "enabled": False,
+        "flush": None,
+        "record_cache": manager.record_cache.stats(),
+        "transactions": {
+            "committed": 0,
+            "rolled_back": 0,
+            "undo_documents": 0,
+            "table_copies": 0,
+        },
+    }
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from shared.config import Settings
+from shared.database import DatabaseManager
+from shared.journal import JournalStorage
+
+
+def _manager(tmp_path: Path, **overrides) -> DatabaseManager:
+    settings = Settings(db_path=str(tmp_path / "db.json"), db_journal=True, **overrides)
+    return DatabaseManager(settings)
+
+
+def _journal_records(tmp_path: Path) -> list:
+    lines = (tmp_path / "db.json.journal").read_text().splitlines()
+    return [json.loads(line) for line in lines]
+
+
+def test_writes_append_records_and_survive_a_crash(tmp_path):
+    manager = _manager(tmp_path)
+    table = manager.table("participants", indexes=["id"])
+    table.insert({"id": "p-1", "status": "pending", "skills": ["python"]})
+    table.insert({"id": "p-2", "status": "pending", "skills": []})
+    table.update_where({"status": "approved"}, id="p-1")
+    table.remove_where(id="p-2")
+
+    assert not (tmp_path / "db.json").exists()
+    records = _journal_records(tmp_path)
+    assert [record["op"] for record in records] == ["insert", "insert", "update", "delete"]
+    assert records[2]["fields"] == {"status": "approved"}
+
+    # No close(): a new manager must rebuild the state from the journal alone.
+    recovered = _manager(tmp_path)
+    try:
+        documents = recovered.table("participants").all()
+        assert [dict(doc) for doc in documents] == [
+            {"id": "p-1", "status": "approved", "skills": ["python"]}
+        ]
+    finally:
+        recovered.close()
+        manager.close()
+
+
+def test_journal_is_compacted_into_a_snapshot(tmp_path):
+    manager = _manager(tmp_path, db_journal_compact_bytes=200)
+    table = manager.table("events")
+    for index in range(10):
+        table.insert({"id": f"e-{index}", "name": f"Event {index}"})
+    storage = manager.db.storage
+    assert isinstance(storage, JournalStorage)
+    storage.compact()
+
+    snapshot = json.loads((tmp_path / "db.json").read_text())
+    assert len(snapshot["events"]) == 10
+    assert not (tmp_path / "db.json.journal.compacting").exists()
+    assert storage.journal_size == 0
+
+    table.insert({"id": "e-10", "name": "Event 10"})
+    manager.close()
+
+    reopened = _manager(tmp_path)
+    try:
+        assert len(reopened.table("events")) == 11
+    finally:
+        reopened.close()
+
+
+def test_unfinished_compaction_is_replayed(tmp_path):
+    (tmp_path / "db.json").write_text(json.dumps({"events": {"1": {"id": "e-1", "v": 1}}}))
+    (tmp_path / "db.json.journal.compacting").write_text(
+        json.dumps({"op": "update", "table": "events", "id": "1", "fields": {"v": 2}}) + "\n"
+    )
+    (tmp_path / "db.json.journal").write_text(
+        json.dumps({"op": "insert", "table": "events", "id": "2", "doc": {"id": "e-2", "v": 1}})
+        + "\n"
+        + '{"op": "ins'
+    )
+
+    manager = _manager(tmp_path)
+    try:
+        events = manager.table("events", indexes=["id"])
+        assert events.find_one(id="e-1")["v"] == 2
+        assert events.find_one(id="e-2")["v"] == 1
+    finally:
+        manager.close()
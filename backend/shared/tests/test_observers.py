@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from typing import List
+
+import pytest
+from tinydb.storages import MemoryStorage
+
+from shared.config import Settings
+from shared.database import DatabaseManager
+from shared.observers import Change
+
+
+@pytest.fixture(params=["tinydb", "sqlite"])
+def manager(request, tmp_path):
+    if request.param == "sqlite":
+        settings = Settings(db_path=str(tmp_path / "db.json"), db_backend="sqlite")
+        manager = DatabaseManager(settings)
+    else:
+        manager = DatabaseManager(Settings(), storage=MemoryStorage)
+    yield manager
+    manager.close()
+
+
+def _summary(changes: List[Change]) -> list:
+    return [
+        (change.op, change.doc_ids, change.fields and sorted(change.fields))
+        for change in changes
+    ]
+
+
+def test_writes_are_reported_with_ids_and_fields(manager):
+    table = manager.table("events", indexes=["id"])
+    changes: List[Change] = []
+    unobserve = manager.observe("events", changes.append)
+    manager.observe("projects", lambda change: pytest.fail("wrong table"))
+
+    first = table.insert({"id": "e-1", "status": "draft"})
+    second, third = table.insert_multiple([{"id": "e-2"}, {"id": "e-3"}])
+    table.update_where({"status": "published"}, id="e-1")
+    table.update(lambda document: document.update(name="x"), doc_ids=[second])
+    table.remove_where(id="e-3")
+    assert _summary(changes) == [
+        ("insert", (first,), ["id", "status"]),
+        ("insert", (second, third), ["id"]),
+        ("update", (first,), ["status"]),
+        ("update", (second,), None),
+        ("remove", (third,), None),
+    ]
+    assert changes[-3].touches("status") and not changes[-3].touches("name")
+
+    unobserve()
+    table.truncate()
+    assert changes[-1].op == "remove"
+
+
+def test_transactions_publish_on_commit_only(manager):
+    table = manager.table("events")
+    changes: List[Change] = []
+    manager.observe("events", changes.append)
+
+    with manager.transaction():
+        table.insert({"id": "e-1"})
+        table.insert({"id": "e-2"})
+        assert changes == []
+    assert [change.op for change in changes] == ["insert", "insert"]
+
+    with pytest.raises(RuntimeError):
+        with manager.transaction():
+            table.update_where({"status": "published"}, id="e-1")
+            raise RuntimeError("boom")
+    assert len(changes) == 2
+
+
+def test_asynchronous_observers_and_failures():
+    manager = DatabaseManager(Settings(), storage=MemoryStorage)
+    table = manager.table("events")
+    seen: List[Change] = []
+
+    def broken(change: Change) -> None:
+        raise ValueError("observer bug")
+
+    manager.observe("events", seen.append, asynchronous=True)
+    manager.observe("events", broken)
+    table.insert({"id": "e-1"})
+    table.truncate()
+    manager.drain_observers()
+
+    assert [change.op for change in seen] == ["insert", "truncate"]
+    assert len(table) == 0
+    stats = manager.observer_stats()
+    assert (stats["observers"], stats["delivered"], stats["errors"]) == (2, 2, 2)
+    manager.close()
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from tinydb.storages import MemoryStorage
+
+from shared.cache import RecordCache
+from shared.config import Settings
+from shared.database import DatabaseManager
+
+
+def test_lookups_hit_until_invalidated():
+    cache = RecordCache(max_entries=2)
+    loads = []
+
+    def load(key):
+        loads.append(key)
+        return {"id": key}
+
+    assert cache.get("events", "e-1", lambda: load("e-1")) == {"id": "e-1"}
+    cached = cache.get("events", "e-1", lambda: load("e-1"))
+    cached["id"] = "mutated"
+    assert cache.get("events", "e-1", lambda: load("e-1")) == {"id": "e-1"}
+    assert loads == ["e-1"]
+
+    cache.invalidate("events", "e-1")
+    cache.get("events", "e-1", lambda: load("e-1"))
+    assert loads == ["e-1", "e-1"]
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["invalidations"]) == (2, 2, 1)
+
+
+def test_least_recently_used_entry_is_evicted_and_misses_are_not_cached():
+    cache = RecordCache(max_entries=2)
+    for key in ("a", "b"):
+        cache.get("t", key, lambda key=key: {"id": key})
+    cache.get("t", "a", lambda: pytest.fail("a should be cached"))
+    cache.get("t", "c", lambda: {"id": "c"})
+    assert cache.get("t", "b", lambda: None) is None
+    assert cache.get("t", "a", lambda: pytest.fail("a should be cached")) == {"id": "a"}
+    assert cache.stats()["evictions"] == 1
+
+
+def test_load_racing_with_a_write_is_not_stored():
+    cache = RecordCache()
+
+    def load():
+        cache.invalidate("events", "e-1")
+        return {"id": "e-1", "status": "stale"}
+
+    cache.get("events", "e-1", load)
+    assert cache.stats()["entries"] == 0
+
+
+def test_rollback_drops_records_cached_inside_the_transaction():
+    manager = DatabaseManager(Settings(), storage=MemoryStorage)
+    events = manager.table("events", indexes=["id"])
+    cache = manager.record_cache
+
+    def get():
+        return cache.get("events", "e-1", lambda: events.find_one(id="e-1"))
+
+    with pytest.raises(RuntimeError):
+        with manager.transaction():
+            events.insert({"id": "e-1"})
+            assert get() is not None
+            raise RuntimeError("boom")
+    assert get() is None
+
+
+def test_reload_from_another_process_invalidates_the_table(tmp_path: Path) -> None:
+    def manager() -> DatabaseManager:
+        settings = Settings(db_path=str(tmp_path / "db.json"), db_reload_interval=0)
+        return DatabaseManager(settings)
+
+    writer, reader = manager(), manager()
+    try:
+        writer.table("events").insert({"id": "e-1", "status": "draft"})
+        writer.commit()
+        events = reader.table("events", indexes=["id"])
+
+        def get():
+            return reader.record_cache.get("events", "e-1", lambda: events.find_one(id="e-1"))
+
+        assert get()["status"] == "draft"
+        writer.table("events").update_where({"status": "published"}, id="e-1")
+        writer.commit()
+        assert get()["status"] == "published"
+        assert reader.storage_metrics()["record_cache"]["misses"] == 2
+    finally:
+        writer.close()
+        reader.close()
+
+
+def test_cache_is_disabled_for_sqlite(tmp_path):
+    manager = DatabaseManager(Settings(db_path=str(tmp_path / "db.json"), db_backend="sqlite"))
+    try:
+        assert manager.record_cache.max_entries == 0
+    finally:
+        manager.close()
+
+
+def test_get_many_loads_all_misses_in_one_call():
+    cache = RecordCache()
+    cache.get("events", "a", lambda: {"id": "a", "cached": True})
+    batches = []
+
+    def load_many(keys):
+        batches.append(keys)
+        return {key: {"id": key} for key in keys if key != "missing"}
+
+    records = cache.get_many("events", ["b", "a", "missing", "b"], load_many)
+    assert records == [{"id": "b"}, {"id": "a", "cached": True}, None, {"id": "b"}]
+    assert batches == [["b", "missing"]]
+    assert cache.get_many("events", ["b"], lambda keys: pytest.fail("b should be cached")) == [
+        {"id": "b"}
+    ]
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from shared.config import Settings
+from shared.database import DatabaseManager
+
+
+def _manager(tmp_path: Path, **overrides) -> DatabaseManager:
+    overrides.setdefault("db_reload_interval", 0)
+    settings = Settings(db_path=str(tmp_path / "db.json"), **overrides)
+    return DatabaseManager(settings)
+
+
+def test_reader_sees_rows_written_by_another_manager(tmp_path):
+    writer = _manager(tmp_path)
+    reader = _manager(tmp_path)
+    try:
+        writer.table("projects").insert({"id": "p-1"})
+        writer.commit()
+        events = reader.table("events", indexes=["id"])
+        projects = reader.table("projects")
+        assert events.find_one(id="e-1") is None
+        assert len(projects) == 1
+
+        writer.table("events").insert({"id": "e-1", "status": "published"})
+        writer.commit()
+
+        found = events.find_one(id="e-1")
+        assert found is not None and found["status"] == "published"
+        assert reader.generation("events") == 1
+        assert reader.generation("projects") == 1
+
+        # A table whose content did not change is not reloaded again.
+        writer.table("events").update({"status": "closed"}, doc_ids=[found.doc_id])
+        writer.commit()
+        assert events.find_one(id="e-1")["status"] == "closed"
+        assert len(projects) == 1
+        assert reader.generation("events") == 2
+        assert reader.generation("projects") == 1
+    finally:
+        writer.close()
+        reader.close()
+
+
+def test_reload_is_throttled_by_interval(tmp_path):
+    writer = _manager(tmp_path)
+    reader = _manager(tmp_path, db_reload_interval=3600)
+    try:
+        events = reader.table("events")
+        assert events.all() == []
+        writer.table("events").insert({"id": "e-1"})
+        writer.commit()
+
+        assert events.all() == []
+        assert reader.refresh() == ["events"]
+        assert [doc["id"] for doc in events.all()] == ["e-1"]
+    finally:
+        writer.close()
+        reader.close()
+
+
+def test_unflushed_local_writes_are_kept(tmp_path):
+    writer = _manager(tmp_path)
+    reader = _manager(tmp_path, db_flush_max_delay=0)
+    try:
+        reader.table("events").insert({"id": "local"})
+        writer.table("events").insert({"id": "remote"})
+        writer.commit()
+
+        assert reader.refresh() == []
+        assert [doc["id"] for doc in reader.table("events").all()] == ["local"]
+    finally:
+        writer.close()
+        reader.close()
+
+
+def test_inserts_after_reload_do_not_reuse_ids(tmp_path):
+    first = _manager(tmp_path)
+    second = _manager(tmp_path)
+    try:
+        first.table("events").insert({"id": "a"})
+        first.commit()
+        second.table("events").all()
+        first.table("events").insert({"id": "b"})
+        first.commit()
+
+        doc_id = second.table("events").insert({"id": "c"})
+        assert doc_id == 3
+    finally:
+        first.close()
+        second.close()
+
+
+def test_flush_does_not_hide_tables_written_elsewhere(tmp_path):
+    first = _manager(tmp_path)
+    second = _manager(tmp_path, db_reload_interval=3600)
+    try:
+        events = second.table("events")
+        assert events.all() == []
+        first.table("events").insert({"id": "e-1"})
+        first.commit()
+
+        second.table("participants").insert({"id": "p-1"})
+        second.commit()
+        assert second.refresh() == ["events"]
+        assert [doc["id"] for doc in events.all()] == ["e-1"]
+
+        fresh = _manager(tmp_path)
+        try:
+            assert [doc["id"] for doc in fresh.table("events").all()] == ["e-1"]
+            assert [doc["id"] for doc in fresh.table("participants").all()] == ["p-1"]
+        finally:
+            fresh.close()
+    finally:
+        first.close()
+        second.close()
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from time import sleep
+
+import pytest
+
+from shared.errors import ServiceUnavailableError
+from shared.seats import SeatReservations
+
+
+def test_same_event_is_serialized_and_other_events_are_not():
+    reservations = SeatReservations()
+    inside = {"a": 0, "b": 0}
+    peak = {"a": 0, "b": 0}
+    guard = threading.Lock()
+
+    def work(event_id: str) -> None:
+        with reservations.hold(event_id, lambda: 0):
+            with guard:
+                inside[event_id] += 1
+                peak[event_id] = max(peak[event_id], inside[event_id])
+            sleep(0.002)
+            with guard:
+                inside[event_id] -= 1
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(work, ["a", "b"] * 10))
+    assert peak == {"a": 1, "b": 1}
+    assert reservations.stats()["held"] == 0
+
+    with reservations.hold("a", lambda: 0):
+        released = threading.Event()
+
+        def other() -> None:
+            with reservations.hold("b", lambda: 0):
+                released.set()
+
+        thread = threading.Thread(target=other)
+        thread.start()
+        assert released.wait(timeout=1)
+        thread.join()
+
+
+def test_waiting_past_the_timeout_is_refused():
+    reservations = SeatReservations(timeout=0.05)
+    with reservations.hold("e-1", lambda: 0):
+        outcome: list = []
+
+        def waiter() -> None:
+            try:
+                with reservations.hold("e-1", lambda: 0):
+                    outcome.append("held")
+            except ServiceUnavailableError:
+                outcome.append("refused")
+
+        thread = threading.Thread(target=waiter)
+        thread.start()
+        thread.join()
+    assert outcome == ["refused"]
+    assert reservations.stats()["timeouts"] == 1
+
+
+def test_seat_files_share_counts_and_users_between_instances(tmp_path):
+    first = SeatReservations(tmp_path)
+    second = SeatReservations(tmp_path, timeout=0.05)
+    with first.hold("e-1", lambda: 3) as seats:
+        assert seats.taken == 3
+        assert seats.claim("user-1")
+        seats.change(1)
+        with pytest.raises(ServiceUnavailableError):
+            with second.hold("e-1", lambda: 0):
+                pass
+
+    with pytest.raises(RuntimeError):
+        with second.hold("e-1", lambda: 0) as seats:
+            # Loaded from the file, not from this instance's storage.
+            assert seats.taken == 4
+            assert not seats.claim("user-1")
+            assert seats.claim("user-2")
+            seats.change(1)
+            raise RuntimeError("insert failed")
+
+    with first.hold("e-1", lambda: 0) as seats:
+        assert seats.taken == 4
+        assert seats.claim("user-2")
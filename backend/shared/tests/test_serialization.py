@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime, timezone
+
+from shared.models import Participant, ParticipantStatus
+from shared.serialization import FastJSONStorage, dumps, loads, model_to_record
+
+
+def test_model_to_record_matches_json_round_trip():
+    participant = Participant(
+        id="p-1",
+        event_id="e-1",
+        user_id="u-1",
+        name="Ana",
+        email="ana@example.com",
+        skills=["python"],
+        status=ParticipantStatus.PENDING,
+        registered_at=datetime(2025, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+    )
+    assert model_to_record(participant) == json.loads(participant.json())
+
+
+def test_codec_round_trip():
+    value = {"events": {"1": {"name": "Café", "tags": ["a"], "count": 2, "deleted_at": None}}}
+    assert loads(dumps(value)) == value
+    assert json.loads(dumps(value)) == value
+
+
+def test_fast_storage_reads_files_written_by_json_storage(tmp_path):
+    path = tmp_path / "db.json"
+    path.write_text(json.dumps({"events": {"1": {"name": "Café"}}}))
+    storage = FastJSONStorage(str(path))
+    try:
+        assert storage.read() == {"events": {"1": {"name": "Café"}}}
+        storage.write({"events": {}})
+        assert storage.read() == {"events": {}}
+        assert json.loads(path.read_text(encoding="utf-8")) == {"events": {}}
+    finally:
+        storage.close()
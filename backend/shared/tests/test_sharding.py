@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from shared.config import Settings
+from shared.database import DatabaseManager
+
+
+def _manager(tmp_path: Path, **overrides) -> DatabaseManager:
+    overrides.setdefault("db_shard_tables", True)
+    settings = Settings(db_path=str(tmp_path / "db.json"), **overrides)
+    return DatabaseManager(settings)
+
+
+def _read(path: Path) -> dict:
+    return json.loads(path.read_text())
+
+
+def test_each_table_is_written_to_its_own_file(tmp_path):
+    manager = _manager(tmp_path)
+    try:
+        manager.table("events").insert({"id": "e-1"})
+        manager.table("messages").insert({"event_id": "e-1", "body": "hi"})
+        assert manager.commit()
+        assert _read(tmp_path / "db.events.json") == {"events": {"1": {"id": "e-1"}}}
+        assert list(_read(tmp_path / "db.messages.json")) == ["messages"]
+        assert not (tmp_path / "db.json").exists()
+        metrics = manager.flush_metrics()
+        assert metrics is not None
+        assert set(metrics["shards"]) == {"events", "messages"}
+        assert metrics["dirty_writes"] == 0
+    finally:
+        manager.close()
+
+
+def test_shards_are_opened_lazily(tmp_path):
+    manager = _manager(tmp_path)
+    try:
+        manager.table("events").all()
+        assert (tmp_path / "db.events.json").exists()
+        assert not (tmp_path / "db.participants.json").exists()
+    finally:
+        manager.close()
+
+
+def test_missing_shard_is_seeded_from_single_file(tmp_path):
+    (tmp_path / "db.json").write_text(
+        json.dumps({"events": {"1": {"id": "e-1"}}, "projects": {"1": {"id": "p-1"}}})
+    )
+    manager = _manager(tmp_path)
+    try:
+        events = manager.table("events", indexes=["id"])
+        assert events.find_one(id="e-1") is not None
+        events.insert({"id": "e-2"})
+        assert manager.commit()
+        assert set(_read(tmp_path / "db.events.json")["events"]) == {"1", "2"}
+        assert not (tmp_path / "db.projects.json").exists()
+    finally:
+        manager.close()
+
+
+def test_other_processes_see_shard_writes(tmp_path):
+    writer = _manager(tmp_path)
+    reader = _manager(tmp_path, db_reload_interval=0)
+    try:
+        events = reader.table("events", indexes=["id"])
+        assert events.find_one(id="e-1") is None
+        writer.table("events").insert({"id": "e-1"})
+        writer.commit()
+        assert events.find_one(id="e-1") is not None
+        assert reader.generation("events") == 1
+    finally:
+        writer.close()
+        reader.close()
+
+
+def test_invalid_table_name_is_rejected(tmp_path):
+    manager = _manager(tmp_path)
+    try:
+        with pytest.raises(ValueError):
+            manager.table("../events")
+        with pytest.raises(RuntimeError):
+            manager.db
+    finally:
+        manager.close()
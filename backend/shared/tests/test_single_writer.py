@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import multiprocessing
+from pathlib import Path
+
+import pytest
+from tinydb import Query
+
+from shared.config import Settings
+from shared.database import DatabaseManager
+from shared.writer import RemoteTable, socket_address
+
+SECRET = "single-writer-test-secret"
+
+pytestmark = pytest.mark.skipif(
+    "fork" not in multiprocessing.get_all_start_methods(), reason="needs fork and Unix sockets"
+)
+
+
+def _manager(tmp_path: Path) -> DatabaseManager:
+    settings = Settings(
+        db_path=str(tmp_path / "db.json"), db_single_writer=True, jwt_secret=SECRET
+    )
+    return DatabaseManager(settings)
+
+
+def test_second_manager_forwards_to_the_owner(tmp_path):
+    owner = _manager(tmp_path)
+    client = _manager(tmp_path)
+    try:
+        participants = client.table("participants", indexes=["event_id"])
+        assert isinstance(participants, RemoteTable)
+        participants.insert({"id": "p-1", "event_id": "e-1"})
+        found = participants.find_one(event_id="e-1")
+        assert found == {"id": "p-1", "event_id": "e-1"} and found.doc_id == 1
+        assert len(participants) == 1
+
+        # The write went straight into the owner's cache.
+        assert owner.table("participants").find_one(id="p-1") is not None
+        assert client.commit()
+        assert client.storage_metrics()["single_writer"] == "client"
+    finally:
+        client.close()
+        owner.close()
+
+
+def test_transactions_run_in_the_owner(tmp_path):
+    owner = _manager(tmp_path)
+    client = _manager(tmp_path)
+    try:
+        events = client.table("events", indexes=["id"])
+        with pytest.raises(RuntimeError):
+            with client.transaction():
+                events.insert({"id": "e-1"})
+                raise RuntimeError("boom")
+        assert owner.table("events").all() == []
+    finally:
+        client.close()
+        owner.close()
+
+
+def test_query_objects_are_rejected(tmp_path):
+    owner = _manager(tmp_path)
+    client = _manager(tmp_path)
+    try:
+        with pytest.raises(TypeError):
+            client.table("events").search(Query().id == "e-1")
+        # The connection is still usable afterwards.
+        assert client.table("events").all() == []
+    finally:
+        client.close()
+        owner.close()
+
+
+def test_socket_is_private_and_only_serves_the_table_api(tmp_path):
+    owner = _manager(tmp_path)
+    client = _manager(tmp_path)
+    try:
+        address = Path(socket_address(tmp_path / "db.json"))
+        assert address.stat().st_mode & 0o777 == 0o600
+        assert address.parent.stat().st_mode & 0o777 == 0o700
+
+        client.table("events").insert({"id": "e-1"})
+        with pytest.raises(AttributeError):
+            client.table("events").rollback({})
+        with pytest.raises(ValueError, match="Unsupported table call"):
+            client._call_owner_table("events", (), "rollback", ({},), {})
+        assert [doc["id"] for doc in owner.table("events").all()] == ["e-1"]
+    finally:
+        client.close()
+        owner.close()
+
+
+def test_default_secret_is_refused(tmp_path):
+    with pytest.raises(ValueError, match="JWT_SECRET"):
+        DatabaseManager(Settings(db_path=str(tmp_path / "db.json"), db_single_writer=True))
+
+
+def test_client_takes_over_when_owner_exits(tmp_path):
+    owner = _manager(tmp_path)
+    client = _manager(tmp_path)
+    try:
+        client.table("events").insert({"id": "e-1"})
+        owner.close()
+        events = client.table("events")
+        assert [doc["id"] for doc in events.all()] == ["e-1"]
+        assert client.storage_metrics()["single_writer"] == "owner"
+    finally:
+        client.close()
+
+
+def _insert_many(path: str, worker: int) -> None:
+    manager = DatabaseManager(Settings(db_path=path, db_single_writer=True, jwt_secret=SECRET))
+    try:
+        table = manager.table("participants", indexes=["event_id"])
+        for index in range(25):
+            table.insert({"id": f"{worker}-{index}", "event_id": "e-1"})
+    finally:
+        manager.close()
+
+
+def test_workers_in_other_processes_do_not_lose_writes(tmp_path):
+    owner = _manager(tmp_path)
+    try:
+        context = multiprocessing.get_context("fork")
+        workers = [
+            context.Process(target=_insert_many, args=(str(tmp_path / "db.json"), worker))
+            for worker in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(30)
+            assert worker.exitcode == 0
+        assert len(owner.table("participants", indexes=["event_id"]).find(event_id="e-1")) == 100
+    finally:
+        owner.close()
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from tinydb import Query
+
+from shared.config import Settings
+from shared.database import DatabaseManager
+from shared.sqlite_backend import SQLiteDatabase, SQLiteTable
+
+
+def _manager(tmp_path: Path) -> DatabaseManager:
+    settings = Settings(db_path=str(tmp_path / "db.json"), db_backend="sqlite")
+    return DatabaseManager(settings)
+
+
+def test_sqlite_backend_is_selected_from_settings(tmp_path):
+    manager = _manager(tmp_path)
+    try:
+        assert isinstance(manager.db, SQLiteDatabase)
+        assert isinstance(manager.table("participants"), SQLiteTable)
+        assert (tmp_path / "db.sqlite3").exists()
+    finally:
+        manager.close()
+
+
+def test_sqlite_table_matches_tinydb_api(tmp_path):
+    manager = _manager(tmp_path)
+    table = manager.table("participants")
+    query = Query()
+
+    table.insert({"id": "p-1", "event_id": "e-1", "user_id": "u-1", "status": "pending"})
+    table.insert({"id": "p-2", "event_id": "e-1", "user_id": "u-2", "status": "pending"})
+    table.insert({"id": "p-3", "event_id": "e-2", "user_id": "u-1", "status": "approved"})
+
+    assert table.get(query.id == "p-2")["user_id"] == "u-2"
+    assert [doc["id"] for doc in table.search(query.event_id == "e-1")] == ["p-1", "p-2"]
+    match = table.get((query.event_id == "e-2") & (query.user_id == "u-1"))
+    assert match["id"] == "p-3"
+    assert table.search(query.status != "pending")[0]["id"] == "p-3"
+
+    assert table.update({"status": "approved"}, query.id == "p-1") == [1]
+    assert table.remove(query.id == "p-2") == [2]
+    manager.close()
+
+    reopened = _manager(tmp_path)
+    try:
+        records = reopened.table("participants").all()
+        assert [(doc["id"], doc["status"]) for doc in records] == [
+            ("p-1", "approved"),
+            ("p-3", "approved"),
+        ]
+    finally:
+        reopened.close()
+
+
+def test_sqlite_lookups_use_indexes(tmp_path):
+    manager = _manager(tmp_path)
+    try:
+        manager.table("participants")
+        database = manager.db
+        assert isinstance(database, SQLiteDatabase)
+        plan = database.fetch(
+            "EXPLAIN QUERY PLAN SELECT doc_id FROM participants "
+            "WHERE json_extract(data, '$.\"event_id\"') = ? "
+            "AND json_extract(data, '$.\"user_id\"') = ?",
+            ("e-1", "u-1"),
+        )
+        assert "ix_participants_event_id_user_id" in " ".join(str(row) for row in plan)
+        assert database.fetch("PRAGMA journal_mode")[0][0] == "wal"
+    finally:
+        manager.close()
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+from threading import Thread
+
+import pytest
+from tinydb.storages import MemoryStorage
+
+from shared.config import Settings
+from shared.database import DatabaseManager
+
+
+def _manager(tmp_path, **overrides) -> DatabaseManager:
+    return DatabaseManager(Settings(db_path=str(tmp_path / "db.json"), **overrides))
+
+
+def test_failed_transaction_restores_every_written_table():
+    manager = DatabaseManager(Settings(), storage=MemoryStorage)
+    participants = manager.table("participants", indexes=["event_id"])
+    events = manager.table("events", indexes=["id"])
+    events.insert({"id": "e-1", "registered_participants": 0})
+    participants.insert({"id": "p-1", "event_id": "e-1"})
+
+    with pytest.raises(RuntimeError):
+        with manager.transaction():
+            participants.insert({"id": "p-2", "event_id": "e-1"})
+            events.update_where({"registered_participants": 2}, id="e-1")
+            participants.remove_where(id="p-1")
+            raise RuntimeError("boom")
+
+    assert [doc["id"] for doc in participants.find(event_id="e-1")] == ["p-1"]
+    assert events.find_one(id="e-1")["registered_participants"] == 0
+    # Ids handed out inside the rolled back transaction are reused.
+    assert participants.insert({"id": "p-3", "event_id": "e-1"}) == 2
+
+
+def test_rollback_only_restores_the_documents_written():
+    manager = DatabaseManager(Settings(), storage=MemoryStorage)
+    participants = manager.table("participants", indexes=["id", "event_id"])
+    participants.insert_multiple(
+        {"id": f"p-{index}", "event_id": "e-1", "status": "pending"} for index in range(50)
+    )
+
+    with pytest.raises(RuntimeError):
+        with manager.transaction():
+            participants.update_where({"status": "approved"}, id="p-3")
+            participants.update_where({"status": "rejected"}, id="p-3")
+            participants.insert({"id": "p-new", "event_id": "e-1"})
+            raise RuntimeError("boom")
+    with manager.transaction():
+        participants.update_where({"status": "approved"}, id="p-4")
+
+    assert participants.find_one(id="p-3")["status"] == "pending"
+    assert participants.find_one(id="p-new") is None
+    assert len(participants.find(event_id="e-1")) == 50
+    stats = manager.storage_metrics()["transactions"]
+    # One saved document per transaction, not a copy of the 50-document table.
+    assert stats == {"committed": 1, "rolled_back": 1, "undo_documents": 2, "table_copies": 0}
+
+
+def test_query_writes_after_document_writes_still_roll_back():
+    manager = DatabaseManager(Settings(), storage=MemoryStorage)
+    events = manager.table("events", indexes=["id"])
+    events.insert_multiple([{"id": "e-1", "n": 1}, {"id": "e-2", "n": 2}])
+
+    with pytest.raises(RuntimeError):
+        with manager.transaction():
+            events.update_where({"n": 10}, id="e-1")
+            events.truncate()
+            events.insert({"id": "e-3", "n": 3})
+            raise RuntimeError("boom")
+
+    assert sorted((doc["id"], doc["n"]) for doc in events.all()) == [("e-1", 1), ("e-2", 2)]
+    assert events.find_one(id="e-3") is None
+
+
+def test_nested_transactions_join_the_outer_one():
+    manager = DatabaseManager(Settings(), storage=MemoryStorage)
+    events = manager.table("events")
+    with pytest.raises(ValueError):
+        with manager.transaction():
+            events.insert({"id": "e-1"})
+            with manager.transaction():
+                events.insert({"id": "e-2"})
+            raise ValueError
+    assert events.all() == []
+
+
+def test_transaction_blocks_concurrent_writers():
+    manager = DatabaseManager(Settings(), storage=MemoryStorage)
+    counters = manager.table("counters", indexes=["id"])
+    counters.insert({"id": "c", "value": 0})
+
+    def increment() -> None:
+        for _ in range(200):
+            with manager.transaction():
+                value = counters.find_one(id="c")["value"]
+                counters.update_where({"value": value + 1}, id="c")
+
+    threads = [Thread(target=increment) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert counters.find_one(id="c")["value"] == 800
+
+
+def test_durable_transaction_is_flushed_once(tmp_path):
+    manager = _manager(tmp_path, db_flush_max_delay=0)
+    try:
+        with manager.transaction(durable=True):
+            manager.table("events").insert({"id": "e-1"})
+            manager.table("participants").insert({"event_id": "e-1"})
+        metrics = manager.flush_metrics()
+        assert metrics["flushes"] == 1
+        assert metrics["dirty_writes"] == 0
+    finally:
+        manager.close()
+
+
+def test_sqlite_transaction_rolls_back(tmp_path):
+    manager = _manager(tmp_path, db_backend="sqlite")
+    try:
+        events = manager.table("events", indexes=["id"])
+        with pytest.raises(RuntimeError):
+            with manager.transaction():
+                events.insert({"id": "e-1"})
+                raise RuntimeError
+        assert events.all() == []
+    finally:
+        manager.close()
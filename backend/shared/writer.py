@@ -0,0 +1,353 @@
+"""
+Single-writer mode for :class:`~shared.database.DatabaseManager`.
+
+One process per data file holds an exclusive lock and owns the TinyDB
+storage; it serves table operations to the other processes (uvicorn workers)
+on a local Unix socket. Requests and results are pickled through
+``multiprocessing.connection``, so the socket is only as safe as who can
+connect to it: it lives in a directory only the service user can access,
+is created with mode 0600, clients must prove they know the authkey derived
+from ``JWT_SECRET``, and only the methods in :data:`TABLE_METHODS` and
+:data:`MANAGER_METHODS` are served.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import socket
+import tempfile
+from contextlib import contextmanager
+from multiprocessing.connection import Client, Connection, Listener
+from pathlib import Path
+from threading import Condition, Lock, Thread, local
+from typing import TYPE_CHECKING, Any, Callable, Dict, IO, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None  # type: ignore[assignment]
+
+if TYPE_CHECKING:
+    from .database import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+Request = Tuple[Any, ...]
+
+# Manager methods clients may call on the owner.
+MANAGER_METHODS = frozenset(
+    {"commit", "flush", "flush_metrics", "generation", "refresh", "table_version"}
+)
+
+# Table methods clients may call on the owner.
+TABLE_METHODS = frozenset(
+    {
+        "__len__",
+        "all",
+        "contains",
+        "count",
+        "count_where",
+        "find",
+        "find_many",
+        "find_one",
+        "find_page",
+        "get",
+        "insert",
+        "insert_multiple",
+        "remove",
+        "remove_where",
+        "search",
+        "truncate",
+        "update",
+        "update_where",
+        "upsert",
+    }
+)
+
+# AF_UNIX paths are limited to about 108 bytes.
+_MAX_SOCKET_PATH = 100
+
+
+class OwnerUnavailableError(ConnectionError):
+    """The owner process could not be reached.
+
+    ``sent`` tells whether the request may already have reached the owner,
+    in which case retrying it could apply a write twice.
+    """
+
+    def __init__(self, message: str, *, sent: bool) -> None:
+        super().__init__(message)
+        self.sent = sent
+
+
+def socket_address(data_path: Path, configured: str = "") -> str:
+    """
+    ``configured``, or ``socket`` in a ``<data_path>.writer`` directory
+    (one under the temp directory when that path would be too long).
+    """
+    if configured:
+        return configured
+    address = os.path.join(str(data_path) + ".writer", "socket")
+    if len(address.encode()) <= _MAX_SOCKET_PATH:
+        return address
+    digest = hashlib.sha1(str(data_path).encode()).hexdigest()[:16]
+    return os.path.join(tempfile.gettempdir(), f"db-{digest}.writer", "socket")
+
+
+def _private_directory(path: str) -> None:
+    """Create directory ``path`` for this user only; refuse one others can reach."""
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    status = os.stat(path)
+    if status.st_uid != os.getuid() or status.st_mode & 0o077:
+        raise PermissionError(
+            f"{path} must be a directory owned by this user with mode 0700 "
+            "to hold the single-writer socket"
+        )
+
+
+def try_lock(path: Path) -> Optional[IO[str]]:
+    """Take the exclusive owner lock on ``path``; ``None`` if another process has it."""
+    if fcntl is None:
+        raise ValueError("DB_SINGLE_WRITER requires fcntl (Linux or macOS)")
+    handle = open(path, "a+", encoding="utf-8")
+    try:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        handle.close()
+        return None
+    return handle
+
+
+class StorageServer:
+    """Serves table operations of the owning manager on a Unix socket."""
+
+    def __init__(self, manager: "DatabaseManager", address: str, authkey: bytes) -> None:
+        self._manager = manager
+        self._address = address
+        self._authkey = authkey
+        _private_directory(os.path.dirname(address) or ".")
+        if os.path.exists(address):
+            # Left behind by an owner that died; we hold the lock now.
+            os.unlink(address)
+        self._listener = Listener(address, family="AF_UNIX", authkey=authkey)
+        os.chmod(address, 0o600)
+        self._closed = False
+        # Requests being handled; close() waits for them before the manager
+        # shuts its storage down.
+        self._idle = Condition()
+        self._in_flight = 0
+        self._thread = Thread(target=self._accept, name="db-writer-server", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        with self._idle:
+            self._closed = True
+            self._idle.wait_for(lambda: self._in_flight == 0, timeout=30)
+        # Closing the listener does not interrupt a blocked accept(); a bare
+        # connection does. It fails the handshake, so it never waits on a reply.
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as wake:
+                wake.connect(self._address)
+        except OSError:
+            pass
+        self._thread.join(timeout=5)
+        self._listener.close()
+        try:
+            os.unlink(self._address)
+        except FileNotFoundError:
+            pass
+
+    def _accept(self) -> None:
+        while not self._closed:
+            try:
+                connection = self._listener.accept()
+            except Exception:
+                if self._closed:
+                    return
+                logger.exception("Rejected a storage client connection")
+                continue
+            if self._closed:
+                connection.close()
+                return
+            Thread(
+                target=self._serve, args=(connection,), name="db-writer-client", daemon=True
+            ).start()
+
+    def _serve(self, connection: Connection) -> None:
+        transaction: Optional[Any] = None
+        with connection:
+            while True:
+                try:
+                    request = connection.recv()
+                except (EOFError, OSError):
+                    break
+                with self._idle:
+                    if self._closed:
+                        # Not applied; the client reconnects to the next owner.
+                        connection.send(("closed", None))
+                        break
+                    self._in_flight += 1
+                try:
+                    kind = request[0]
+                    if kind == "begin":
+                        transaction = self._manager.transaction()
+                        transaction.__enter__()
+                        result = None
+                    elif kind == "end":
+                        ending, transaction = transaction, None
+                        if ending is not None:
+                            if request[1]:
+                                ending.__exit__(None, None, None)
+                            else:
+                                error = RuntimeError("Transaction aborted by client")
+                                ending.__exit__(RuntimeError, error, None)
+                        result = None
+                    else:
+                        result = self._handle(request)
+                    reply: Tuple[str, Any] = ("ok", result)
+                except Exception as exc:
+                    reply = ("error", exc)
+                finally:
+                    with self._idle:
+                        self._in_flight -= 1
+                        self._idle.notify_all()
+                try:
+                    connection.send(reply)
+                except Exception as exc:
+                    connection.send(("error", RuntimeError(f"Unpicklable storage reply: {exc!r}")))
+        if transaction is not None:
+            error = RuntimeError("Storage client disconnected")
+            transaction.__exit__(RuntimeError, error, None)
+
+    def _handle(self, request: Request) -> Any:
+        kind = request[0]
+        if kind == "table":
+            _, name, indexes, method, args, kwargs = request
+            if method not in TABLE_METHODS:
+                raise ValueError(f"Unsupported table call: {method}")
+            table = self._manager.local_table(name, indexes)
+            return getattr(table, method)(*args, **kwargs)
+        if kind == "manager":
+            _, method, args, kwargs = request
+            if method not in MANAGER_METHODS:
+                raise ValueError(f"Unsupported manager call: {method}")
+            return getattr(self._manager, method)(*args, **kwargs)
+        raise ValueError(f"Unknown storage request: {kind!r}")
+
+
+class StorageClient:
+    """Per-thread connections from a worker process to the owner."""
+
+    def __init__(self, address: str, authkey: bytes) -> None:
+        self._address = address
+        self._authkey = authkey
+        self._local = local()
+        self._lock = Lock()
+        self._connections: List[Connection] = []
+
+    def call(self, request: Request) -> Any:
+        connection = self._connection()
+        try:
+            connection.send(request)
+        except OSError as exc:
+            self._drop(connection)
+            raise OwnerUnavailableError(f"Storage owner went away: {exc}", sent=False) from exc
+        except Exception as exc:
+            # Pickling fails before anything is written, so the connection
+            # is still usable.
+            raise TypeError(
+                f"Storage call cannot be sent to the owner process: {exc}. "
+                "Use keyword lookups (find/update_where) instead of Query objects or callables."
+            ) from exc
+        try:
+            status, value = connection.recv()
+        except (EOFError, OSError) as exc:
+            self._drop(connection)
+            raise OwnerUnavailableError(f"Storage owner went away: {exc}", sent=True) from exc
+        if status == "closed":
+            self._drop(connection)
+            raise OwnerUnavailableError("Storage owner is shutting down", sent=False)
+        if status == "error":
+            raise value
+        return value
+
+    @property
+    def in_transaction(self) -> bool:
+        return getattr(self._local, "depth", 0) > 0
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        depth = getattr(self._local, "depth", 0)
+        if depth == 0:
+            self.call(("begin",))
+        self._local.depth = depth + 1
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self._local.depth = depth
+            if depth == 0:
+                self.call(("end", ok))
+
+    def close(self) -> None:
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            connection.close()
+
+    def _connection(self) -> Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            try:
+                connection = Client(self._address, family="AF_UNIX", authkey=self._authkey)
+            except OSError as exc:
+                raise OwnerUnavailableError(
+                    f"Cannot connect to storage owner at {self._address}: {exc}", sent=False
+                ) from exc
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    def _drop(self, connection: Connection) -> None:
+        self._local.connection = None
+        with self._lock:
+            if connection in self._connections:
+                self._connections.remove(connection)
+        connection.close()
+
+
+class RemoteTable:
+    """Table handle whose operations run in the owner process."""
+
+    def __init__(
+        self,
+        dispatch: Callable[[str, Tuple[Tuple[str, ...], ...], str, tuple, Dict[str, Any]], Any],
+        name: str,
+        indexes: Tuple[Tuple[str, ...], ...],
+    ) -> None:
+        self._dispatch = dispatch
+        self._name = name
+        self._indexes = indexes
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    def __getattr__(self, method: str) -> Callable[..., Any]:
+        if method not in TABLE_METHODS:
+            raise AttributeError(method)
+
+        def call(*args: Any, **kwargs: Any) -> Any:
+            return self._dispatch(self._name, self._indexes, method, args, kwargs)
+
+        return call
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.all())
+
+    def __len__(self) -> int:
+        return int(self._dispatch(self._name, self._indexes, "__len__", (), {}))